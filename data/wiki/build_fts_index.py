@@ -0,0 +1,304 @@
+"""
+Build the DuckDB FTS index of a table in parallel, with progress and resume.
+
+``PRAGMA create_fts_index`` tokenizes the whole table in one statement. This
+builder writes the same index tables (``docs``, ``terms``, ``dict``, ``stats``
+in ``fts_main_<table>``) in four steps:
+
+1. worker processes tokenize rowid partitions of the table (with the FTS
+   extension's own tokenizer, stopwords and stemmer) and write each partition's
+   token occurrences, document lengths and per-term document frequencies to Parquet;
+2. the partial frequencies are summed into the term dictionary;
+3. worker processes map each partition's tokens to term IDs;
+4. the ``match_bm25`` macros are copied from a scaffold index over an empty copy
+   of the table, and the index tables are loaded from the Parquet files.
+
+Every finished partition and step is a file in the work directory, so an
+interrupted build resumes where it stopped; it starts over if the table's size
+or the index options changed. The source database must not be open for writing
+while workers read it. The work directory is removed once the index is in place.
+
+Usage (from ``data/wiki/``):
+    uv run build_fts_index.py --db wiki.db                        # articles(text), keyed by rowid
+    uv run build_fts_index.py --db wiki.db --partitions 256 --processes 8
+    uv run build_fts_index.py --db wiki.db --table sections --id-column section_id --fields heading text
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+
+import duckdb
+from tqdm import tqdm
+
+
+def quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def sql_path(path: str) -> str:
+    return path.replace("'", "''")
+
+
+def copy_to_parquet(conn: duckdb.DuckDBPyConnection, query: str, path: str) -> None:
+    tmp_path = path + ".tmp"
+    conn.execute(f"COPY ({query}) TO '{sql_path(tmp_path)}' (FORMAT PARQUET, COMPRESSION ZSTD);")
+    os.replace(tmp_path, path)
+
+
+def create_scaffold(conn: duckdb.DuckDBPyConnection, table: str, id_column: str, fields: List[str]) -> str:
+    """
+    Create an FTS index over an empty copy of ``source.<table>`` on ``conn``.
+
+    The scaffold holds the extension's tokenizer, stopwords and ``match_bm25``
+    macros for exactly these options, at no indexing cost.
+
+    Returns:
+        Name of the FTS schema, e.g. ``fts_main_articles``
+    """
+    columns = ", ".join(quote(column) for column in dict.fromkeys([id_column, *fields]) if column != "rowid")
+    conn.execute(f"CREATE TABLE {quote(table)} AS SELECT {columns} FROM source.{quote(table)} LIMIT 0;")
+    field_list = ", ".join(f"'{field}'" for field in fields)
+    conn.execute(f"PRAGMA create_fts_index('{table}', '{id_column}', {field_list}, overwrite=1);")
+    return f"fts_main_{table}"
+
+
+def open_source(db_path: str, threads: Optional[int] = None) -> duckdb.DuckDBPyConnection:
+    """In-memory connection with the FTS extension loaded and ``db_path`` attached read-only as ``source``."""
+    conn = duckdb.connect(config={"threads": threads} if threads else {})
+    conn.execute("INSTALL fts; LOAD fts;")
+    conn.execute(f"ATTACH '{sql_path(db_path)}' AS source (READ_ONLY);")
+    return conn
+
+
+def tokenize_partition(db_path: str, plan: dict, part: int, work_dir: str, threads: int) -> int:
+    """Write ``docs``, ``df`` and (last, marking the partition done) ``tokens`` Parquet files of one partition."""
+    table, id_column, fields = plan["table"], plan["id_column"], plan["fields"]
+    start, end = plan["bounds"][part], plan["bounds"][part + 1]
+    conn = open_source(db_path, threads)
+    try:
+        schema = create_scaffold(conn, table, id_column, fields)
+        # Same filters and stemming as create_fts_index; docid is the source rowid
+        tokenized = " UNION ALL ".join(
+            f"""
+            SELECT unnest({schema}.tokenize(src.{quote(field)})) AS w, src.rowid AS docid, {fieldid} AS fieldid
+            FROM source.{quote(table)} AS src
+            WHERE src.rowid >= {start} AND src.rowid < {end}
+            """
+            for fieldid, field in enumerate(fields)
+        )
+        conn.execute(f"""
+            CREATE TABLE tokens AS
+            SELECT stem(t.w, 'porter') AS term, t.docid, t.fieldid
+            FROM ({tokenized}) AS t
+            WHERE t.w NOT NULL
+                AND len(t.w) > 0
+                AND t.w NOT IN (SELECT sw FROM {schema}.stopwords);
+        """)
+        name = "src.rowid" if id_column == "rowid" else f"src.{quote(id_column)}"
+        copy_to_parquet(conn, f"""
+            SELECT src.rowid AS docid, {name} AS name, COALESCE(lengths.len, 0) AS len
+            FROM source.{quote(table)} AS src
+            LEFT JOIN (SELECT docid, count(term) AS len FROM tokens GROUP BY docid) AS lengths
+                ON lengths.docid = src.rowid
+            WHERE src.rowid >= {start} AND src.rowid < {end}
+        """, os.path.join(work_dir, "docs", f"part-{part:06d}.parquet"))
+        copy_to_parquet(
+            conn,
+            "SELECT term, count(DISTINCT docid) AS df FROM tokens GROUP BY term",
+            os.path.join(work_dir, "df", f"part-{part:06d}.parquet"),
+        )
+        copy_to_parquet(conn, "SELECT * FROM tokens", os.path.join(work_dir, "tokens", f"part-{part:06d}.parquet"))
+        return conn.execute("SELECT COUNT(*) FROM tokens;").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def assign_termids(part: int, work_dir: str, threads: int) -> int:
+    """Write the ``terms`` Parquet file of one partition and drop its (larger) ``tokens`` file."""
+    tokens_path = os.path.join(work_dir, "tokens", f"part-{part:06d}.parquet")
+    conn = duckdb.connect(config={"threads": threads})
+    try:
+        copy_to_parquet(conn, f"""
+            SELECT t.docid, t.fieldid, d.termid
+            FROM read_parquet('{sql_path(tokens_path)}') AS t
+            JOIN read_parquet('{sql_path(os.path.join(work_dir, "dict.parquet"))}') AS d ON d.term = t.term
+        """, os.path.join(work_dir, "terms", f"part-{part:06d}.parquet"))
+    finally:
+        conn.close()
+    os.remove(tokens_path)
+    return 1
+
+
+def run_parts(fn, args_by_part: dict, processes: int, unit: str) -> None:
+    with ProcessPoolExecutor(max_workers=max(1, processes)) as pool, tqdm(total=len(args_by_part), unit=unit) as progress:
+        futures = [pool.submit(fn, *args) for args in args_by_part.values()]
+        for future in as_completed(futures):
+            future.result()
+            progress.update(1)
+
+
+def plan_build(db_path: str, table: str, id_column: str, fields: List[str], partitions: int) -> dict:
+    conn = duckdb.connect(database=db_path, read_only=True)
+    try:
+        rows, count = conn.execute(f"SELECT COALESCE(MAX(rowid), -1) + 1, COUNT(*) FROM {quote(table)};").fetchone()
+    finally:
+        conn.close()
+    partitions = max(1, min(partitions, rows))
+    bounds = [rows * i // partitions for i in range(partitions + 1)]
+    return {"table": table, "id_column": id_column, "fields": fields, "rows": rows, "count": count, "bounds": bounds}
+
+
+def load_index(db_path: str, plan: dict, work_dir: str) -> None:
+    """Replace ``fts_main_<table>`` in ``db_path`` with the scaffold's macros and the built tables, in one transaction."""
+    scaffold_path = os.path.join(work_dir, "scaffold.db")
+    if os.path.exists(scaffold_path):
+        os.remove(scaffold_path)
+    conn = open_source(db_path)
+    try:
+        conn.execute(f"ATTACH '{sql_path(scaffold_path)}' AS scaffold;")
+        conn.execute("USE scaffold;")
+        schema = create_scaffold(conn, plan["table"], plan["id_column"], plan["fields"])
+        # Only the FTS schema may be copied into the target
+        conn.execute(f"DROP TABLE {quote(plan['table'])};")
+    finally:
+        conn.close()
+
+    def parts(name: str) -> str:
+        return f"read_parquet('{sql_path(os.path.join(work_dir, name, '*.parquet'))}')"
+
+    conn = duckdb.connect(database=db_path)
+    try:
+        conn.execute("INSTALL fts; LOAD fts;")
+        database = conn.execute("SELECT current_database();").fetchone()[0]
+        conn.execute(f"ATTACH '{sql_path(scaffold_path)}' AS scaffold (READ_ONLY);")
+        conn.execute("BEGIN TRANSACTION;")
+        conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+        conn.execute(f"COPY FROM DATABASE scaffold TO {quote(database)};")
+        conn.execute(f"""
+            CREATE OR REPLACE TABLE {schema}.docs AS
+            SELECT docid::BIGINT AS docid, name, len::BIGINT AS len FROM {parts("docs")} ORDER BY docid;
+        """)
+        conn.execute(f"""
+            CREATE OR REPLACE TABLE {schema}.terms AS
+            SELECT docid::BIGINT AS docid, fieldid::BIGINT AS fieldid, termid::BIGINT AS termid FROM {parts("terms")};
+        """)
+        conn.execute(f"""
+            CREATE OR REPLACE TABLE {schema}.dict AS
+            SELECT termid::BIGINT AS termid, term, df::BIGINT AS df
+            FROM read_parquet('{sql_path(os.path.join(work_dir, "dict.parquet"))}');
+        """)
+        conn.execute(f"""
+            CREATE OR REPLACE TABLE {schema}.stats AS
+            SELECT COUNT(docid) AS num_docs, SUM(len) / COUNT(len) AS avgdl FROM {schema}.docs;
+        """)
+        conn.execute("COMMIT;")
+        conn.execute("DETACH scaffold;")
+        conn.execute("CHECKPOINT;")
+    finally:
+        conn.close()
+
+
+def build_fts_index(
+    db_path: str,
+    table: str = "articles",
+    id_column: str = "rowid",
+    fields: Optional[List[str]] = None,
+    partitions: int = 128,
+    processes: Optional[int] = None,
+    work_dir: Optional[str] = None,
+) -> dict:
+    """
+    Build (or finish building) the FTS index of ``table`` in ``db_path``.
+
+    Equivalent to ``PRAGMA create_fts_index('<table>', '<id_column>', <fields>, overwrite=1)``.
+
+    Returns:
+        The build plan, including the row count indexed
+    """
+    fields = fields or ["text"]
+    processes = processes or os.cpu_count() or 1
+    work_dir = work_dir or db_path + ".fts"
+    plan = plan_build(db_path, table, id_column, fields, partitions)
+
+    plan_path = os.path.join(work_dir, "plan.json")
+    if os.path.exists(plan_path):
+        with open(plan_path, encoding="utf-8") as plan_file:
+            if json.load(plan_file) != plan:
+                print(f"{work_dir} belongs to a different build; starting over")
+                shutil.rmtree(work_dir)
+    for name in ("docs", "df", "tokens", "terms"):
+        os.makedirs(os.path.join(work_dir, name), exist_ok=True)
+    with open(plan_path, "w", encoding="utf-8") as plan_file:
+        json.dump(plan, plan_file)
+
+    partition_count = len(plan["bounds"]) - 1
+    dict_path = os.path.join(work_dir, "dict.parquet")
+    threads = max(1, (os.cpu_count() or 1) // processes)
+
+    started = time.perf_counter()
+    pending = {
+        part: (db_path, plan, part, work_dir, threads)
+        for part in range(partition_count)
+        if not os.path.exists(os.path.join(work_dir, "tokens", f"part-{part:06d}.parquet"))
+        and not os.path.exists(os.path.join(work_dir, "terms", f"part-{part:06d}.parquet"))
+    }
+    print(f"Tokenizing {plan['count']} rows in {partition_count} partitions, {partition_count - len(pending)} already done")
+    run_parts(tokenize_partition, pending, processes, "partition")
+
+    if not os.path.exists(dict_path):
+        conn = duckdb.connect()
+        try:
+            copy_to_parquet(conn, f"""
+                SELECT row_number() OVER (ORDER BY term) - 1 AS termid, term, df
+                FROM (
+                    SELECT term, SUM(df) AS df
+                    FROM read_parquet('{sql_path(os.path.join(work_dir, "df", "*.parquet"))}')
+                    GROUP BY term
+                )
+            """, dict_path)
+        finally:
+            conn.close()
+    print(f"Term dictionary merged ({time.perf_counter() - started:.0f}s)")
+
+    pending = {
+        part: (part, work_dir, threads)
+        for part in range(partition_count)
+        if not os.path.exists(os.path.join(work_dir, "terms", f"part-{part:06d}.parquet"))
+    }
+    print(f"Assigning term IDs, {partition_count - len(pending)} of {partition_count} partitions already done")
+    run_parts(assign_termids, pending, processes, "partition")
+
+    load_index(db_path, plan, work_dir)
+    shutil.rmtree(work_dir)
+    print(f"FTS index of {table} ({', '.join(fields)}) built in {time.perf_counter() - started:.0f}s")
+    return plan
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument("--table", default="articles")
+    parser.add_argument("--id-column", default="rowid", help="Column match_bm25 is called with")
+    parser.add_argument("--fields", nargs="+", default=["text"], help="Columns to index")
+    parser.add_argument("--partitions", type=int, default=128, help="Rowid ranges tokenized independently")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--work-dir", help="Checkpoint directory (default: <db>.fts)")
+    args = parser.parse_args()
+
+    build_fts_index(
+        args.db,
+        table=args.table,
+        id_column=args.id_column,
+        fields=args.fields,
+        partitions=args.partitions,
+        processes=args.processes,
+        work_dir=args.work_dir,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Build the memory-mapped title index (titles.idx) used for exact and prefix title lookups.
+
+Every article title and every redirect title (resolved to its target article) is
+normalized with ``title_index.normalize_title`` in Python (a DuckDB Python UDF is
+~50x slower per row), staged in a temp table, sorted by DuckDB and streamed into
+the index file. Rowids change on rebuilds and incremental updates, so rebuild
+the index whenever wiki.db changes.
+
+Usage (from ``data/wiki/``):
+    uv run build_title_index.py --db wiki.db --output titles.idx
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import duckdb
+
+from bulk_insert import insert_rows
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "python"))
+
+from title_index import normalize_title, write_title_index
+
+
+def has_table(conn: duckdb.DuckDBPyConnection, table: str) -> bool:
+    return conn.execute("SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [table]).fetchone()[0] > 0
+
+
+def iter_title_entries(conn: duckdb.DuckDBPyConnection, batch_size: int = 100000) -> Iterator[Tuple[str, int]]:
+    query = "SELECT title, rowid FROM articles WHERE title IS NOT NULL"
+    if has_table(conn, "redirects"):
+        # Redirect targets may point at a section ("Target#Section"); the article is what resolves
+        query += """
+            UNION ALL
+            SELECT r.title, a.rowid
+            FROM redirects r
+            JOIN articles a ON a.title = split_part(r.target, '#', 1)
+        """
+
+    columns = {"key": "VARCHAR", "article_rowid": "BIGINT"}
+    conn.execute("CREATE OR REPLACE TEMP TABLE title_keys (key VARCHAR, article_rowid BIGINT);")
+    reader = conn.cursor()
+    reader.execute(query)
+    while True:
+        rows = reader.fetchmany(batch_size)
+        if not rows:
+            break
+        insert_rows(conn, "title_keys", columns, ((normalize_title(title), rowid) for title, rowid in rows))
+    reader.close()
+
+    cursor = conn.execute("SELECT key, article_rowid FROM title_keys WHERE key <> '' ORDER BY key, article_rowid;")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument("--output", default="titles.idx")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conn = duckdb.connect(database=args.db, read_only=True)
+    try:
+        count = write_title_index(args.output, iter_title_entries(conn))
+    finally:
+        conn.close()
+    print(f"{count} titles written to {args.output} in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Bulk-load Python rows into DuckDB.
+
+``executemany`` binds one row at a time (a few hundred rows/s for article-sized
+strings), and the pinned duckdb 0.10 can only scan in-memory columns through
+pandas/pyarrow. Staging the rows as newline-delimited JSON and loading them with
+``read_json`` is ~50x faster and needs neither.
+"""
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, Sequence
+
+import duckdb
+
+
+def insert_rows(conn: duckdb.DuckDBPyConnection, table: str, columns: Dict[str, str], rows: Iterable[Sequence]) -> int:
+    """
+    Insert ``rows`` into ``table``.
+
+    Args:
+        conn: Connection to insert with
+        table: Target table; its columns must be ``columns`` in order
+        columns: Column name to DuckDB type, in table order
+        rows: Tuples of values in the same order as ``columns``
+
+    Returns:
+        Number of rows inserted
+    """
+    names = list(columns)
+    fd, path = tempfile.mkstemp(suffix=".jsonl")
+    try:
+        count = 0
+        with os.fdopen(fd, "w", encoding="utf-8") as staging:
+            for row in rows:
+                staging.write(json.dumps(dict(zip(names, row))))
+                staging.write("\n")
+                count += 1
+        if count:
+            spec = ", ".join(f"{name}: '{column_type}'" for name, column_type in columns.items())
+            conn.execute(f"""
+                INSERT INTO {table}
+                SELECT * FROM read_json('{path}', format = 'newline_delimited', columns = {{{spec}}});
+            """)
+        return count
+    finally:
+        os.remove(path)
@@ -0,0 +1,89 @@
+"""
+Split articles into sections with their own FTS index, for section-level retrieval.
+
+Sections are keyed by ``page_id`` rather than rowid, so they survive incremental
+updates and row group compaction. Requires an articles table with ``page_id``
+(any build from update_wiki.sh / multistream_import.py).
+
+Usage (from ``data/wiki/``):
+    uv run chunk_articles.py                  # (re)build all sections
+    uv run chunk_articles.py --only-missing   # chunk articles that have no sections yet
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import duckdb
+from tqdm import tqdm
+
+from bulk_insert import insert_rows
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "python"))
+
+from wiki_text import split_sections
+
+SECTION_COLUMNS = {
+    "section_id": "BIGINT",
+    "page_id": "BIGINT",
+    "position": "INTEGER",
+    "heading": "VARCHAR",
+    "text": "VARCHAR",
+}
+
+
+def chunk(conn: duckdb.DuckDBPyConnection, only_missing: bool = False, max_chars: int = 2000, batch_size: int = 5000) -> int:
+    """
+    Fill the ``sections`` table and rebuild its FTS index.
+
+    Returns:
+        Number of sections written
+    """
+    if not only_missing:
+        conn.execute("DROP TABLE IF EXISTS sections;")
+    columns = ", ".join(f"{name} {column_type}" for name, column_type in SECTION_COLUMNS.items())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS sections ({columns});")
+    next_id = conn.execute("SELECT COALESCE(MAX(section_id), 0) + 1 FROM sections;").fetchone()[0]
+
+    where = "WHERE page_id NOT IN (SELECT page_id FROM sections)" if only_missing else ""
+    total = conn.execute(f"SELECT COUNT(*) FROM articles {where};").fetchone()[0]
+    reader = conn.cursor()
+    reader.execute(f"SELECT page_id, text FROM articles {where};")
+
+    written = 0
+    with tqdm(total=total, unit="article") as progress:
+        while True:
+            articles = reader.fetchmany(batch_size)
+            if not articles:
+                break
+            rows = []
+            for page_id, text in articles:
+                for position, (heading, section_text) in enumerate(split_sections(text or "", max_chars=max_chars)):
+                    rows.append((next_id, page_id, position, heading, section_text))
+                    next_id += 1
+            written += insert_rows(conn, "sections", SECTION_COLUMNS, rows)
+            progress.update(len(articles))
+    reader.close()
+
+    conn.execute("CREATE INDEX IF NOT EXISTS sections_page_id_idx ON sections (page_id);")
+    conn.execute("PRAGMA create_fts_index('sections', 'section_id', 'heading', 'text', overwrite=1);")
+    print(f"{written} sections written")
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument("--only-missing", action="store_true", help="Only chunk articles without sections")
+    parser.add_argument("--max-chars", type=int, default=2000, help="Target section size in characters")
+    args = parser.parse_args()
+
+    conn = duckdb.connect(database=args.db)
+    try:
+        conn.execute("INSTALL fts; LOAD fts;")
+        chunk(conn, only_missing=args.only_missing, max_chars=args.max_chars)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
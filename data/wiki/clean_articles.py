@@ -0,0 +1,114 @@
+"""
+Materialize ``articles.clean_text`` so the offline Wikipedia service can skip runtime cleaning.
+
+Usage (from ``data/wiki/``):
+    uv run clean_articles.py                   # add/refresh clean_text
+    uv run clean_articles.py --verify          # compare clean_text against the runtime cleaner
+    uv run clean_articles.py --verify --sample 0   # ...for every article
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict
+
+import duckdb
+from duckdb.typing import VARCHAR
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "python"))
+
+from wiki_text import remove_consecutive_short_lines
+
+
+def clean_article_text(text: str) -> str:
+    return remove_consecutive_short_lines(text)
+
+
+def add_columns(conn: duckdb.DuckDBPyConnection, table: str, columns: Dict[str, str]) -> None:
+    """
+    Add the missing ``columns`` (name -> type) to ``table``.
+
+    DuckDB 0.10 refuses to alter a table that has an index (``articles_title_idx``),
+    so the table's indexes are dropped around the ALTERs and recreated. The steps
+    run as separate statements: DuckDB 1.5 aborts committing all three at once.
+    """
+    existing = {
+        row[0]
+        for row in conn.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = 'main' AND table_name = ?;",
+            [table],
+        ).fetchall()
+    }
+    missing = {name: type_ for name, type_ in columns.items() if name not in existing}
+    if not missing:
+        return
+    indexes = conn.execute(
+        "SELECT index_name, sql FROM duckdb_indexes() WHERE schema_name = 'main' AND table_name = ?;",
+        [table],
+    ).fetchall()
+    for index_name, _ in indexes:
+        conn.execute(f"DROP INDEX {index_name};")
+    try:
+        for name, type_ in missing.items():
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {type_};")
+    finally:
+        for _, index_sql in indexes:
+            conn.execute(index_sql)
+
+
+def materialize(conn: duckdb.DuckDBPyConnection, only_missing: bool = False) -> None:
+    conn.create_function(
+        "clean_article_text",
+        clean_article_text,
+        [VARCHAR],
+        VARCHAR,
+    )
+    add_columns(conn, "articles", {"clean_text": "VARCHAR"})
+    where = "WHERE clean_text IS NULL" if only_missing else ""
+    conn.execute(f"UPDATE articles SET clean_text = clean_article_text(text) {where};")
+    updated = conn.execute("SELECT COUNT(*) FROM articles WHERE clean_text IS NOT NULL;").fetchone()[0]
+    print(f"clean_text materialized for {updated} articles")
+
+
+def verify(conn: duckdb.DuckDBPyConnection, sample: int, batch_size: int = 1000) -> int:
+    query = "SELECT rowid, title, text, clean_text FROM articles"
+    if sample:
+        query += f" USING SAMPLE {int(sample)} ROWS"
+
+    checked = 0
+    mismatches = 0
+    # Streamed in batches: with --sample 0 every article's text is compared
+    cursor = conn.execute(query)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for rowid, title, text, clean_text in rows:
+            checked += 1
+            expected = clean_article_text(text) if text is not None else None
+            if clean_text != expected:
+                mismatches += 1
+                print(f"mismatch: rowid={rowid} title={title!r}")
+
+    print(f"verified {checked} articles, {mismatches} mismatches")
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument("--only-missing", action="store_true", help="Only clean rows whose clean_text is NULL")
+    parser.add_argument("--verify", action="store_true", help="Check clean_text instead of writing it")
+    parser.add_argument("--sample", type=int, default=1000, help="Articles to verify (0 for all)")
+    args = parser.parse_args()
+
+    conn = duckdb.connect(database=args.db, read_only=args.verify)
+    try:
+        if args.verify:
+            sys.exit(1 if verify(conn, args.sample) else 0)
+        materialize(conn, only_missing=args.only_missing)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Move article bodies out of wiki.db into a memory-mapped file of zstd frames (articles.zst).
+
+The body the service reads (``clean_text`` when clean_articles.py ran, else
+``text``) is compressed per article with a shared trained dictionary, and
+wiki.db is rewritten without its text columns. DuckDB does not shrink a file
+when columns are cleared, so the database is copied into a fresh file;
+``articles`` is rebuilt over ``range(max(rowid) + 1)`` so every rowid (and
+therefore every topic ID and FTS document) stays the same, with empty rows
+standing in for deleted articles. The FTS and section tables are unaffected.
+
+When the bodies are cleaned text, the raw ``text`` is compressed as well, into
+articles.raw.zst next to the output. The service never reads it; it is kept
+because the FTS index, ``clean_text`` and leads are derived from the raw text,
+which incremental_update.py restores (with ``clean_text``) before applying an
+update.
+
+The service reads articles.zst when it exists, which needs the optional
+``zstandard`` package.
+
+Usage (from ``data/wiki/``):
+    uv run compress_articles.py --db wiki.db --output articles.zst
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import duckdb
+
+from bulk_insert import insert_rows
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "python"))
+
+from compressed_articles import CompressedArticles, train_dictionary, write_compressed_articles
+
+
+def text_columns(conn: duckdb.DuckDBPyConnection) -> List[str]:
+    return [
+        row[0]
+        for row in conn.execute("""
+            SELECT column_name FROM duckdb_columns()
+            WHERE table_name = 'articles' AND column_name IN ('text', 'clean_text')
+            ORDER BY column_name = 'clean_text' DESC
+        """).fetchall()
+    ]
+
+
+def iter_bodies(conn: duckdb.DuckDBPyConnection, column: str, batch_size: int = 10000) -> Iterator[Tuple[int, str]]:
+    cursor = conn.execute(f"SELECT rowid, {column} FROM articles WHERE title IS NOT NULL ORDER BY rowid;")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def compact(source_path: str, target_path: str, row_count: int, cleared_columns: List[str]) -> None:
+    """
+    Copy a database into a new file with ``cleared_columns`` of ``articles`` set to NULL.
+
+    ``articles`` is written in rowid order over every rowid below ``row_count``,
+    so rowids are preserved even where articles were deleted.
+    """
+    if os.path.exists(target_path):
+        os.remove(target_path)
+    conn = duckdb.connect()
+    try:
+        conn.execute(f"ATTACH '{source_path.replace(chr(39), chr(39) * 2)}' AS source (READ_ONLY);")
+        conn.execute(f"ATTACH '{target_path.replace(chr(39), chr(39) * 2)}' AS compact;")
+        conn.execute("COPY FROM DATABASE source TO compact (SCHEMA);")
+        tables = conn.execute("""
+            SELECT schema_name, table_name FROM duckdb_tables() WHERE database_name = 'source'
+        """).fetchall()
+        cleared = ", ".join(f"NULL::VARCHAR AS {column}" for column in cleared_columns)
+        for schema, table in tables:
+            if (schema, table) == ("main", "articles"):
+                conn.execute(f"""
+                    INSERT INTO compact.main.articles
+                    SELECT a.* REPLACE ({cleared})
+                    FROM range(?) r(i)
+                    LEFT JOIN source.main.articles a ON a.rowid = r.i
+                    ORDER BY r.i;
+                """, [row_count])
+            else:
+                conn.execute(f'INSERT INTO compact."{schema}"."{table}" SELECT * FROM source."{schema}"."{table}";')
+
+        # Older DuckDB versions copy no indexes with the schema
+        existing = {row[0] for row in conn.execute("""
+            SELECT index_name FROM duckdb_indexes() WHERE database_name = 'compact'
+        """).fetchall()}
+        indexes = conn.execute("""
+            SELECT index_name, sql FROM duckdb_indexes() WHERE database_name = 'source'
+        """).fetchall()
+        conn.execute("USE compact;")
+        for name, sql in indexes:
+            if name not in existing:
+                conn.execute(sql)
+    finally:
+        conn.close()
+
+
+def raw_bodies_path(bodies_path: str) -> str:
+    """Where the raw text is kept when ``bodies_path`` holds cleaned text."""
+    return os.path.splitext(bodies_path)[0] + ".raw.zst"
+
+
+def restore_text(conn: duckdb.DuckDBPyConnection, bodies_path: str, batch_size: int = 10000) -> int:
+    """
+    Write the bodies in ``bodies_path`` back into the cleared text columns of ``articles``.
+
+    Cleaned bodies go back into ``clean_text`` and the raw text into ``text``
+    from the file next to them (see ``raw_bodies_path``).
+
+    Returns:
+        Number of articles restored
+    """
+    bodies = CompressedArticles(bodies_path)
+    if not bodies.cleaned:
+        return _restore_column(conn, bodies, "text", batch_size)
+
+    raw_path = raw_bodies_path(bodies_path)
+    if not os.path.exists(raw_path):
+        raise ValueError(
+            f"{bodies_path} holds cleaned text and {raw_path} is missing, so the raw article text "
+            "cannot be restored; rebuild wiki.db from the dump instead"
+        )
+    _restore_column(conn, CompressedArticles(raw_path), "text", batch_size)
+    return _restore_column(conn, bodies, "clean_text", batch_size)
+
+
+def _restore_column(conn: duckdb.DuckDBPyConnection, bodies: CompressedArticles, column: str, batch_size: int) -> int:
+    conn.execute("CREATE OR REPLACE TEMP TABLE restored_bodies (article_rowid BIGINT, body VARCHAR);")
+    staging = {"article_rowid": "BIGINT", "body": "VARCHAR"}
+    reader = conn.cursor()
+    reader.execute("SELECT rowid FROM articles WHERE title IS NOT NULL;")
+    restored = 0
+    while True:
+        rowids = reader.fetchmany(batch_size)
+        if not rowids:
+            break
+        rows = []
+        for (rowid,) in rowids:
+            body = bodies.get(rowid)
+            if body is not None:
+                rows.append((rowid, body[0]))
+        restored += insert_rows(conn, "restored_bodies", staging, rows)
+    reader.close()
+
+    conn.execute(f"""
+        UPDATE articles SET {column} = r.body
+        FROM restored_bodies r
+        WHERE articles.rowid = r.article_rowid;
+    """)
+    conn.execute("DROP TABLE restored_bodies;")
+    return restored
+
+
+def compress_column(
+    conn: duckdb.DuckDBPyConnection, column: str, output_path: str, level: int, dict_size: int, samples: int
+) -> int:
+    dictionary = b""
+    if dict_size > 0:
+        # Leading characters are enough to learn shared boilerplate and vocabulary
+        sample_rows = conn.execute(f"""
+            SELECT left({column}, 4096) FROM articles
+            WHERE {column} IS NOT NULL
+            USING SAMPLE reservoir({int(samples)} ROWS) REPEATABLE (42);
+        """).fetchall()
+        dictionary = train_dictionary((row[0] for row in sample_rows), dict_size)
+
+    return write_compressed_articles(
+        output_path,
+        iter_bodies(conn, column),
+        dictionary=dictionary,
+        level=level,
+        cleaned=column == "clean_text",
+    )
+
+
+def compress_database(
+    db_path: str,
+    output_path: str,
+    level: int = 9,
+    dict_size: int = 112640,
+    samples: int = 20000,
+) -> int:
+    """
+    Write the article bodies of ``db_path`` to ``output_path`` and compact ``db_path`` without them.
+
+    When the bodies are ``clean_text``, the raw ``text`` is written to
+    ``raw_bodies_path(output_path)`` so it can be restored later.
+
+    Returns:
+        Number of articles compressed
+    """
+    raw_path = raw_bodies_path(output_path)
+    conn = duckdb.connect(database=db_path, read_only=True)
+    try:
+        columns = text_columns(conn)
+        column = columns[0]
+        if conn.execute(f"SELECT COUNT({column}) FROM articles;").fetchone()[0] == 0:
+            raise ValueError(f"{db_path} has no article text; it is already compressed")
+        row_count = conn.execute("SELECT COALESCE(MAX(rowid), -1) + 1 FROM articles;").fetchone()[0]
+
+        count = compress_column(conn, column, output_path, level, dict_size, samples)
+        if "text" in columns[1:]:
+            compress_column(conn, "text", raw_path, level, dict_size, samples)
+        elif os.path.exists(raw_path):
+            # Left by an earlier compression of a cleaned build
+            os.remove(raw_path)
+    finally:
+        conn.close()
+
+    compact_path = db_path + ".compact"
+    compact(db_path, compact_path, row_count, columns)
+    os.replace(compact_path, db_path)
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument("--output", default="articles.zst")
+    parser.add_argument("--level", type=int, default=9, help="zstd compression level")
+    parser.add_argument("--dict-size", type=int, default=112640, help="Trained dictionary size in bytes (0 disables)")
+    parser.add_argument("--samples", type=int, default=20000, help="Articles sampled to train the dictionary")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db_size = os.path.getsize(args.db)
+    try:
+        count = compress_database(args.db, args.output, args.level, args.dict_size, args.samples)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        sys.exit(1)
+    print(
+        f"{count} articles compressed in {time.perf_counter() - started:.0f}s: "
+        f"{args.db} {db_size / 2**20:.0f} MiB -> {os.path.getsize(args.db) / 2**20:.0f} MiB, "
+        f"{args.output} {os.path.getsize(args.output) / 2**20:.0f} MiB"
+    )
+    raw_path = raw_bodies_path(args.output)
+    if os.path.exists(raw_path):
+        print(f"raw article text kept for updates in {raw_path} {os.path.getsize(raw_path) / 2**20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Embed article leads (or sections) and write the memory-mapped dense vector index (vectors.idx).
+
+Each article is embedded as its title plus the first ``--lead-chars`` characters
+of its cleaned text; ``--sections`` embeds every section written by
+chunk_articles.py instead (several vectors per article). Vectors are staged in a
+float16 memmap, IVF centroids are trained on a sample with spherical k-means,
+and ``write_dense_index`` groups the vectors by list. Rowids change on rebuilds
+and incremental updates, so re-embed whenever wiki.db changes.
+
+The embedder is one of ``dense_index.load_embedder``'s backends and its spec is
+stored in the index, so the service embeds queries with the same model.
+
+Usage (from ``data/wiki/``):
+    uv run embed_articles.py --db wiki.db --output vectors.idx
+    uv run embed_articles.py --embedder hashing:256   # no model download; word overlap only
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import duckdb
+import numpy as np
+from tqdm import tqdm
+
+from compress_articles import text_columns
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "python"))
+
+from compressed_articles import CompressedArticles
+from dense_index import load_embedder, train_centroids, write_dense_index
+
+DEFAULT_EMBEDDER = "sentence-transformers:sentence-transformers/all-MiniLM-L6-v2"
+
+
+def count_units(conn: duckdb.DuckDBPyConnection, sections: bool) -> int:
+    if sections:
+        return conn.execute("""
+            SELECT COUNT(*) FROM sections s JOIN articles a ON a.page_id = s.page_id WHERE a.title IS NOT NULL
+        """).fetchone()[0]
+    return conn.execute("SELECT COUNT(*) FROM articles WHERE title IS NOT NULL;").fetchone()[0]
+
+
+def iter_units(
+    conn: duckdb.DuckDBPyConnection,
+    lead_chars: int,
+    sections: bool,
+    bodies_path: str,
+    batch_size: int = 1000,
+) -> Iterator[Tuple[int, str]]:
+    """``(article_rowid, text to embed)`` in rowid order."""
+    bodies = None
+    if sections:
+        query = """
+            SELECT a.rowid, a.title || '\n' || s.heading || '\n' || left(s.text, ?)
+            FROM sections s
+            JOIN articles a ON a.page_id = s.page_id
+            WHERE a.title IS NOT NULL
+            ORDER BY a.rowid, s.position
+        """
+    else:
+        column = text_columns(conn)[0]
+        if conn.execute(f"SELECT COUNT({column}) FROM articles;").fetchone()[0] == 0 and os.path.exists(bodies_path):
+            # Compressed by compress_articles.py: the text lives in articles.zst
+            bodies = CompressedArticles(bodies_path)
+            column = "NULL"
+        query = f"""
+            SELECT rowid, title || '\n' || COALESCE(left({column}, ?), '')
+            FROM articles
+            WHERE title IS NOT NULL
+            ORDER BY rowid
+        """
+
+    cursor = conn.execute(query, [lead_chars])
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        for rowid, text in rows:
+            if bodies is not None:
+                body = bodies.get(rowid, lead_chars)
+                text += body[0] if body else ""
+            yield rowid, text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument("--output", default="vectors.idx")
+    parser.add_argument("--bodies", default="articles.zst", help="Compressed bodies, used when wiki.db has no text")
+    parser.add_argument("--embedder", default=DEFAULT_EMBEDDER, help="dense_index.load_embedder spec")
+    parser.add_argument("--lead-chars", type=int, default=1000, help="Characters of text embedded per article or section")
+    parser.add_argument("--sections", action="store_true", help="Embed sections instead of article leads")
+    parser.add_argument("--lists", type=int, default=0, help="IVF lists (default: 4 * sqrt(vectors))")
+    parser.add_argument("--train-sample", type=int, default=100000, help="Vectors sampled to train the IVF centroids")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    embedder = load_embedder(args.embedder)
+    conn = duckdb.connect(database=args.db, read_only=True)
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    with tempfile.NamedTemporaryFile(dir=output_dir, suffix=".f16") as staging:
+        try:
+            count = count_units(conn, args.sections)
+            if count == 0:
+                print(f"{args.db} has nothing to embed", file=sys.stderr)
+                sys.exit(1)
+            vectors = np.memmap(staging.name, dtype=np.float16, mode="w+", shape=(count, embedder.dimension))
+            rowids = np.empty(count, dtype=np.int64)
+
+            written = 0
+            batch = []
+            with tqdm(total=count, unit="vector") as progress:
+                for unit in iter_units(conn, args.lead_chars, args.sections, args.bodies):
+                    batch.append(unit)
+                    if len(batch) == args.batch_size:
+                        vectors[written:written + len(batch)] = embedder.embed([text for _, text in batch])
+                        rowids[written:written + len(batch)] = [rowid for rowid, _ in batch]
+                        written += len(batch)
+                        progress.update(len(batch))
+                        batch.clear()
+                if batch:
+                    vectors[written:written + len(batch)] = embedder.embed([text for _, text in batch])
+                    rowids[written:written + len(batch)] = [rowid for rowid, _ in batch]
+                    written += len(batch)
+                    progress.update(len(batch))
+        finally:
+            conn.close()
+
+        lists = args.lists or max(1, min(65536, int(4 * math.sqrt(written))))
+        rng = np.random.default_rng(0)
+        sample = vectors[np.sort(rng.choice(written, min(written, args.train_sample), replace=False))]
+        centroids = train_centroids(sample, lists)
+        write_dense_index(args.output, rowids[:written], vectors[:written], centroids, args.embedder)
+        del vectors
+    print(f"{written} vectors ({len(centroids)} lists) written to {args.output} in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Materialize ``articles.lead`` and ``articles.summary`` for fast search snippets.
+
+The lead is the text before an article's first heading (bounded by
+``--lead-chars``) and the summary its first sentences. With
+``WIKI_FAST_SEARCH=1`` the offline Wikipedia service builds search snippets
+from these columns and reads the article text only for hits whose lead never
+mentions a search word. Run it while wiki.db still has its text, i.e. before
+compress_articles.py.
+
+Usage (from ``data/wiki/``):
+    uv run extract_leads.py                  # add/refresh lead and summary
+    uv run extract_leads.py --only-missing   # only articles whose lead is NULL
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import duckdb
+from duckdb.typing import VARCHAR
+
+from clean_articles import add_columns
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "python"))
+
+from wiki_text import extract_lead, truncate_at_sentence
+
+
+def materialize_leads(
+    conn: duckdb.DuckDBPyConnection,
+    only_missing: bool = False,
+    lead_chars: int = 1500,
+    summary_chars: int = 300,
+) -> int:
+    """
+    Fill ``lead`` and ``summary`` from the raw ``text`` column.
+
+    Returns:
+        Number of articles that have a lead
+    """
+    conn.create_function(
+        "article_lead",
+        lambda text: extract_lead(text, max_chars=lead_chars)[0],
+        [VARCHAR],
+        VARCHAR,
+    )
+    conn.create_function(
+        "article_summary",
+        lambda lead: truncate_at_sentence(lead, summary_chars),
+        [VARCHAR],
+        VARCHAR,
+    )
+    add_columns(conn, "articles", {"lead": "VARCHAR", "summary": "VARCHAR"})
+    where = "AND lead IS NULL" if only_missing else ""
+    conn.execute(f"UPDATE articles SET lead = article_lead(text) WHERE text IS NOT NULL {where};")
+    where = "AND summary IS NULL" if only_missing else ""
+    conn.execute(f"UPDATE articles SET summary = article_summary(lead) WHERE lead IS NOT NULL {where};")
+    updated = conn.execute("SELECT COUNT(*) FROM articles WHERE lead IS NOT NULL;").fetchone()[0]
+    print(f"lead and summary materialized for {updated} articles")
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument("--only-missing", action="store_true", help="Only extract leads of rows whose lead is NULL")
+    parser.add_argument("--lead-chars", type=int, default=1500)
+    parser.add_argument("--summary-chars", type=int, default=300)
+    args = parser.parse_args()
+
+    conn = duckdb.connect(database=args.db)
+    try:
+        # fetchall closes the result; DuckDB refuses to register the UDFs while one is pending
+        has_text = conn.execute("SELECT COUNT(text) FROM articles;").fetchall()[0][0] > 0
+        if not has_text:
+            print(f"{args.db} has no article text (compressed?); restore it before extracting leads", file=sys.stderr)
+            sys.exit(1)
+        materialize_leads(conn, only_missing=args.only_missing, lead_chars=args.lead_chars, summary_chars=args.summary_chars)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,11 @@ INSTALL fts;
 LOAD fts;
 
 CREATE TABLE IF NOT EXISTS articles AS
-SELECT title, text
-FROM read_json_auto('extracted_json/*/*');
+SELECT page_id, revid, title, text
+FROM read_parquet('parquet/*.parquet');
+
+CREATE INDEX IF NOT EXISTS articles_title_idx ON articles (title);
 
 PRAGMA create_fts_index('articles', 'rowid', 'text');
+
+-- Redirect and disambiguation tables: uv run link_tables.py --db wiki.db
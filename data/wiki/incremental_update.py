@@ -0,0 +1,200 @@
+"""
+Apply a new extraction (multistream_import.py Parquet or wikiextractor JSON) to an
+existing wiki.db without a full rebuild.
+
+Articles are diffed against the current table by page id and revision: only new,
+changed and removed pages are written. Changed revisions are updated in place, so
+unchanged and edited articles keep their rowids (and therefore their topic IDs)
+unless DuckDB compacts a row group that lost many rows. The update runs on a
+staging copy of the database, whose FTS index is rebuilt (in parallel, by
+build_fts_index.py) before it atomically replaces wiki.db.
+
+If wiki.db was compressed by compress_articles.py, the text is restored from
+articles.zst (and the raw text from articles.raw.zst) first and the then stale
+files are removed once the update is in place; rerun compress_articles.py to
+compress the updated database.
+
+Usage (from ``data/wiki/``):
+    uv run incremental_update.py --db wiki.db --extracted 'parquet/*.parquet' \
+        --redirects 'parquet/redirects/*.parquet' --disambiguations 'parquet/disambiguations/*.parquet' \
+        --facts 'parquet/facts/*.parquet'
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+
+import duckdb
+
+from build_fts_index import build_fts_index
+from chunk_articles import chunk
+from clean_articles import materialize
+from compress_articles import raw_bodies_path, restore_text
+from extract_leads import materialize_leads
+from link_tables import load_link_tables
+from load_facts import load_facts
+
+
+def has_column(conn: duckdb.DuckDBPyConnection, table: str, column: str) -> bool:
+    return conn.execute(
+        "SELECT COUNT(*) FROM duckdb_columns() WHERE table_name = ? AND column_name = ?",
+        [table, column],
+    ).fetchall()[0][0] > 0
+
+
+def incoming_source(extracted_glob: str) -> str:
+    escaped = extracted_glob.replace("'", "''")
+    if extracted_glob.endswith(".parquet"):
+        return f"SELECT page_id, revid, title, text FROM read_parquet('{escaped}')"
+    return f"""
+        SELECT CAST(id AS BIGINT) AS page_id, CAST(revid AS BIGINT) AS revid, title, text
+        FROM read_json_auto('{escaped}')
+    """
+
+
+def apply_update(conn: duckdb.DuckDBPyConnection, extracted_glob: str) -> dict:
+    conn.execute(f"CREATE TEMP TABLE incoming AS {incoming_source(extracted_glob)};")
+    conn.execute("""
+        CREATE TEMP TABLE changed AS
+        SELECT i.*
+        FROM incoming i
+        LEFT JOIN articles a ON a.page_id = i.page_id AND a.revid = i.revid
+        WHERE a.page_id IS NULL;
+    """)
+
+    counts = {
+        "incoming": conn.execute("SELECT COUNT(*) FROM incoming;").fetchone()[0],
+        "upserted": conn.execute("SELECT COUNT(*) FROM changed;").fetchone()[0],
+        "deleted": conn.execute("""
+            SELECT COUNT(*) FROM articles WHERE page_id NOT IN (SELECT page_id FROM incoming);
+        """).fetchone()[0],
+    }
+
+    # Changed revisions are updated in place so they keep their rowid; only
+    # removed pages and renamed ones (title is indexed) are deleted.
+    # Columns derived from the text are reset and recomputed below
+    reset_derived = "".join(
+        f", {column} = NULL" for column in ("clean_text", "lead", "summary") if has_column(conn, "articles", column)
+    )
+    conn.execute("BEGIN TRANSACTION;")
+    conn.execute(f"""
+        UPDATE articles AS a
+        SET revid = c.revid, text = c.text{reset_derived}
+        FROM changed c
+        WHERE a.page_id = c.page_id AND a.title = c.title;
+    """)
+    conn.execute("""
+        DELETE FROM articles
+        WHERE page_id NOT IN (SELECT page_id FROM incoming)
+            OR page_id IN (
+                SELECT c.page_id FROM changed c
+                JOIN articles a ON a.page_id = c.page_id
+                WHERE a.title <> c.title
+            );
+    """)
+    conn.execute("""
+        INSERT INTO articles (page_id, revid, title, text)
+        SELECT page_id, revid, title, text FROM changed
+        WHERE page_id NOT IN (SELECT page_id FROM articles);
+    """)
+    conn.execute("COMMIT;")
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument(
+        "--extracted",
+        default="parquet/*.parquet",
+        help="Glob of multistream_import.py Parquet parts or wikiextractor --json output",
+    )
+    parser.add_argument(
+        "--redirects",
+        default="parquet/redirects/*.parquet",
+        help="Glob of multistream_import.py redirect parts; empty to keep the current link tables",
+    )
+    parser.add_argument("--disambiguations", default="parquet/disambiguations/*.parquet")
+    parser.add_argument(
+        "--facts",
+        default="parquet/facts/*.parquet",
+        help="Glob of multistream_import.py infobox fact parts; empty to keep the current facts table",
+    )
+    parser.add_argument("--bodies", default="articles.zst", help="Compressed article bodies written by compress_articles.py")
+    args = parser.parse_args()
+
+    staging_path = args.db + ".staging"
+    fts_work_dir = staging_path + ".fts"
+    if os.path.exists(staging_path):
+        os.remove(staging_path)
+    # Checkpoints of an interrupted index build belong to the discarded staging copy
+    shutil.rmtree(fts_work_dir, ignore_errors=True)
+
+    started = time.perf_counter()
+    shutil.copy2(args.db, staging_path)
+
+    conn = duckdb.connect(database=staging_path)
+    try:
+        if not has_column(conn, "articles", "page_id"):
+            print("articles has no page_id/revid columns; run a full rebuild first", file=sys.stderr)
+            sys.exit(1)
+
+        conn.execute("INSTALL fts; LOAD fts;")
+        compressed = os.path.exists(args.bodies)
+        if compressed:
+            try:
+                restored = restore_text(conn, args.bodies)
+            except ValueError as error:
+                print(error, file=sys.stderr)
+                sys.exit(1)
+            print(f"{restored} article bodies restored from {args.bodies}")
+        counts = apply_update(conn, args.extracted)
+        print(
+            f"incoming {counts['incoming']} articles: "
+            f"{counts['upserted']} new or changed, {counts['deleted']} removed"
+        )
+
+        if args.redirects:
+            # Redirects and disambiguations are small, so they are replaced wholesale rather than diffed
+            load_link_tables(conn, args.redirects, args.disambiguations)
+
+        if args.facts:
+            # Infobox facts are replaced wholesale too, keyed by title rather than rowid
+            load_facts(conn, args.facts)
+
+        if has_column(conn, "articles", "clean_text"):
+            materialize(conn, only_missing=True)
+
+        if has_column(conn, "articles", "lead"):
+            materialize_leads(conn, only_missing=True)
+
+        if has_column(conn, "sections", "section_id"):
+            # Sections are keyed by page_id; re-chunk changed pages and drop removed ones
+            conn.execute("""
+                DELETE FROM sections
+                WHERE page_id IN (SELECT page_id FROM changed)
+                    OR page_id NOT IN (SELECT page_id FROM articles);
+            """)
+            chunk(conn, only_missing=True)
+
+        conn.execute("CHECKPOINT;")
+        conn.close()
+        # DuckDB FTS indexes cannot be updated in place; rebuilding on the staging copy keeps wiki.db serving meanwhile
+        build_fts_index(staging_path, work_dir=fts_work_dir)
+    except BaseException:
+        conn.close()
+        os.remove(staging_path)
+        shutil.rmtree(fts_work_dir, ignore_errors=True)
+        raise
+
+    os.replace(staging_path, args.db)
+    if compressed:
+        os.remove(args.bodies)
+        if os.path.exists(raw_bodies_path(args.bodies)):
+            os.remove(raw_bodies_path(args.bodies))
+    print(f"{args.db} updated in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
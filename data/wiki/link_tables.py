@@ -0,0 +1,68 @@
+"""
+Load the redirect and disambiguation tables written by multistream_import.py into wiki.db.
+
+``title_key`` is the lowercased title (without a trailing "(disambiguation)"), which
+the offline Wikipedia service matches search terms against to expand queries.
+
+Usage (from ``data/wiki/``):
+    uv run link_tables.py --db wiki.db
+"""
+import argparse
+
+import duckdb
+
+
+def load_link_tables(
+    conn: duckdb.DuckDBPyConnection,
+    redirects_glob: str = "parquet/redirects/*.parquet",
+    disambiguations_glob: str = "parquet/disambiguations/*.parquet",
+) -> dict:
+    """
+    Replace the ``redirects`` and ``disambiguations`` tables from Parquet.
+
+    Returns:
+        Row counts per table
+    """
+    redirects = redirects_glob.replace("'", "''")
+    disambiguations = disambiguations_glob.replace("'", "''")
+    # Redirect targets may point at a section ("Target#Section"); the article is what resolves
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE redirects AS
+        SELECT title, split_part(target, '#', 1) AS target, lower(title) AS title_key
+        FROM read_parquet('{redirects}');
+    """)
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE disambiguations AS
+        SELECT
+            title,
+            lower(regexp_replace(title, '\\s*\\(disambiguation\\)$', '')) AS title_key,
+            target,
+            position
+        FROM read_parquet('{disambiguations}')
+        ORDER BY title_key, position;
+    """)
+    conn.execute("CREATE INDEX redirects_title_key_idx ON redirects (title_key);")
+    conn.execute("CREATE INDEX disambiguations_title_key_idx ON disambiguations (title_key);")
+    return {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
+        for table in ("redirects", "disambiguations")
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument("--redirects", default="parquet/redirects/*.parquet")
+    parser.add_argument("--disambiguations", default="parquet/disambiguations/*.parquet")
+    args = parser.parse_args()
+
+    conn = duckdb.connect(database=args.db)
+    try:
+        counts = load_link_tables(conn, args.redirects, args.disambiguations)
+    finally:
+        conn.close()
+    print(f"{counts['redirects']} redirects, {counts['disambiguations']} disambiguation links loaded")
+
+
+if __name__ == "__main__":
+    main()
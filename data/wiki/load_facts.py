@@ -0,0 +1,50 @@
+"""
+Load the infobox facts written by multistream_import.py into wiki.db.
+
+``facts`` holds one ``(page_id, title, title_key, key, value, position)`` row per
+infobox field, where ``title_key`` is the lowercased article title. The offline
+Wikipedia service answers ``lookup_facts`` with one query on the ``title_key``
+index, without touching the articles table.
+
+Usage (from ``data/wiki/``):
+    uv run load_facts.py --db wiki.db
+"""
+import argparse
+
+import duckdb
+
+
+def load_facts(conn: duckdb.DuckDBPyConnection, facts_glob: str = "parquet/facts/*.parquet") -> int:
+    """
+    Replace the ``facts`` table from Parquet.
+
+    Returns:
+        Number of facts loaded
+    """
+    facts = facts_glob.replace("'", "''")
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE facts AS
+        SELECT page_id, title, lower(title) AS title_key, key, value, position
+        FROM read_parquet('{facts}')
+        ORDER BY title_key, position;
+    """)
+    conn.execute("CREATE INDEX facts_title_key_idx ON facts (title_key);")
+    return conn.execute("SELECT COUNT(*) FROM facts;").fetchone()[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument("--facts", default="parquet/facts/*.parquet")
+    args = parser.parse_args()
+
+    conn = duckdb.connect(database=args.db)
+    try:
+        count = load_facts(conn, args.facts)
+    finally:
+        conn.close()
+    print(f"{count} infobox facts loaded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Import a Wikipedia multistream dump straight to Parquet, in parallel.
+
+The multistream index lists the byte offset of every bz2 stream (~100 pages each),
+so streams can be decompressed independently. Streams are grouped into parts;
+worker processes decompress, parse and clean each part and write it as one
+Parquet file, which DuckDB then loads with ``read_parquet``. Redirect pages are
+written to ``redirects/`` as ``(title, target)`` rows and disambiguation pages to
+``disambiguations/`` as ``(title, target, position)`` rows, one per listed link;
+neither becomes an article. Infobox fields of every article are written to
+``facts/`` as ``(page_id, title, key, value, position)`` rows. Finished parts are
+skipped on restart, so an interrupted import resumes where it stopped.
+
+Usage (from ``data/wiki/``):
+    uv run multistream_import.py \\
+        --dump enwiki-20250101-pages-articles-multistream.xml.bz2 \\
+        --index enwiki-20250101-pages-articles-multistream-index.txt.bz2 \\
+        --output parquet --processes 12
+"""
+import argparse
+import bz2
+import os
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import duckdb
+import mwparserfromhell
+from tqdm import tqdm
+
+from bulk_insert import insert_rows
+
+_REF_PATTERN = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.DOTALL | re.IGNORECASE)
+_COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+# {{Disambiguation}}, {{Dab}}, {{Hndis}}, {{Geodis}}, {{Place name disambiguation}}, ...
+_DISAMBIGUATION_PATTERN = re.compile(
+    r"\{\{\s*(?:disambig\w*|dab|disamb|hndis|geodis|[^{}|]*disambiguation)\s*[|}]",
+    re.IGNORECASE,
+)
+
+# {{Birth date and age|1867|11|7}}, {{Start date|2004|2|4}}, {{Film date|...}}, ...
+_DATE_TEMPLATE_PATTERN = re.compile(r"^(?:birth|death|start|end|film|release)?[ _]?date\b", re.IGNORECASE)
+_LIST_TEMPLATES = {"plainlist", "plain list", "flatlist", "flat list", "hlist", "ubl", "unbulleted list"}
+_MAX_FACT_VALUE_CHARS = 300
+# Infobox fields that hold layout or media rather than facts
+_SKIPPED_FACT_KEY_PREFIXES = ("image", "caption", "alt", "signature", "logo", "map", "pushpin", "module", "embed")
+_BREAK_PATTERN = re.compile(r"<br\s*/?>", re.IGNORECASE)
+
+ARTICLE_COLUMNS = {"page_id": "BIGINT", "revid": "BIGINT", "title": "VARCHAR", "text": "VARCHAR"}
+REDIRECT_COLUMNS = {"title": "VARCHAR", "target": "VARCHAR"}
+DISAMBIGUATION_COLUMNS = {"title": "VARCHAR", "target": "VARCHAR", "position": "INTEGER"}
+FACT_COLUMNS = {"page_id": "BIGINT", "title": "VARCHAR", "key": "VARCHAR", "value": "VARCHAR", "position": "INTEGER"}
+
+
+def read_stream_offsets(index_path: str) -> List[int]:
+    """Return the sorted, unique stream offsets listed in a multistream index (``offset:page_id:title``)."""
+    offsets = set()
+    with bz2.open(index_path, "rt", encoding="utf-8") as index:
+        for line in index:
+            offset, _, _ = line.partition(":")
+            if offset:
+                offsets.add(int(offset))
+    return sorted(offsets)
+
+
+def plan_parts(offsets: List[int], dump_size: int, streams_per_part: int) -> List[List[Tuple[int, int]]]:
+    ranges = list(zip(offsets, offsets[1:] + [dump_size]))
+    return [ranges[i:i + streams_per_part] for i in range(0, len(ranges), streams_per_part)]
+
+
+def wikitext_to_plain(wikitext: str) -> str:
+    wikitext = _COMMENT_PATTERN.sub("", wikitext)
+    wikitext = _REF_PATTERN.sub("", wikitext)
+    text = mwparserfromhell.parse(wikitext).strip_code(normalize=True, collapse=True)
+    return _BLANK_LINES_PATTERN.sub("\n\n", text).strip()
+
+
+def is_disambiguation(title: str, wikitext: str) -> bool:
+    return title.endswith("(disambiguation)") or _DISAMBIGUATION_PATTERN.search(wikitext) is not None
+
+
+def disambiguation_targets(wikitext: str) -> List[str]:
+    """The first article link of every bullet line, in page order."""
+    targets = []
+    for line in wikitext.split("\n"):
+        if not line.startswith("*"):
+            continue
+        for link in mwparserfromhell.parse(line).filter_wikilinks():
+            target = str(link.title).strip().split("#")[0]
+            # Skip namespaced links (File:, Category:, wikt:) but keep titles like "Mercury: A Novel"
+            if target and not re.match(r"^[A-Za-z]+:\S", target):
+                targets.append(target[0].upper() + target[1:])
+                break
+    return list(dict.fromkeys(targets))
+
+
+def render_fact_value(value: mwparserfromhell.wikicode.Wikicode) -> str:
+    """
+    Plain text of one infobox value.
+
+    ``strip_code`` drops templates, so the ones that carry the value are rendered
+    first: date templates as ISO dates, ``{{convert}}`` as "amount unit" and
+    list templates as comma-separated items.
+    """
+    for template in value.filter_templates(recursive=False):
+        name = str(template.name).strip().lower()
+        positional = [str(param.value).strip() for param in template.params if not param.showkey]
+        if _DATE_TEMPLATE_PATTERN.match(name):
+            numbers = [part for part in positional if part.isdigit()][:3]
+            rendered = "-".join(numbers[:1] + [number.zfill(2) for number in numbers[1:]])
+        elif name == "convert" and len(positional) >= 2:
+            rendered = " ".join(positional[:2])
+        elif name in _LIST_TEMPLATES:
+            rendered = ", ".join(render_fact_value(mwparserfromhell.parse(part)) for part in positional if part)
+        else:
+            continue
+        value.replace(template, rendered)
+
+    text = value.strip_code(normalize=True, collapse=True)
+    # List items and <br />-separated values end up on separate lines
+    text = ", ".join(line.strip(" *#,") for line in text.split("\n") if line.strip(" *#,"))
+    text = " ".join(text.split())
+    if len(text) > _MAX_FACT_VALUE_CHARS:
+        text = text[:_MAX_FACT_VALUE_CHARS].rstrip() + " …"
+    return text
+
+
+def infobox_facts(wikitext: str) -> List[Tuple[str, str]]:
+    """``(key, value)`` pairs of the article's first infobox, in order; keys are lowercased with underscores."""
+    wikitext = _COMMENT_PATTERN.sub("", wikitext)
+    wikitext = _REF_PATTERN.sub("", wikitext)
+    wikitext = _BREAK_PATTERN.sub("\n", wikitext)
+    for template in mwparserfromhell.parse(wikitext).filter_templates(recursive=False):
+        if not str(template.name).strip().lower().startswith("infobox"):
+            continue
+        facts = []
+        for param in template.params:
+            if not param.showkey:
+                continue
+            key = "_".join(str(param.name).strip().lower().replace("_", " ").split())
+            if key.startswith(_SKIPPED_FACT_KEY_PREFIXES):
+                continue
+            value = render_fact_value(param.value)
+            if key and value:
+                facts.append((key, value))
+        return facts
+    return []
+
+
+def iter_stream_pages(xml_bytes: bytes) -> Iterator[ET.Element]:
+    # Streams hold bare <page> elements; the final one also closes </mediawiki>
+    xml_bytes = xml_bytes.replace(b"</mediawiki>", b"")
+    root = ET.fromstring(b"<pages>" + xml_bytes + b"</pages>")
+    yield from root.iter("page")
+
+
+def parse_page(page: ET.Element) -> Optional[Tuple[int, int, str, str]]:
+    revision = page.find("revision")
+    if revision is None:
+        return None
+    text = wikitext_to_plain(revision.findtext("text") or "")
+    if not text:
+        return None
+    return int(page.findtext("id")), int(revision.findtext("id")), page.findtext("title"), text
+
+
+def write_parquet(rows: List[tuple], columns: Dict[str, str], path: str) -> None:
+    tmp_path = path + ".tmp"
+    conn = duckdb.connect()
+    try:
+        definitions = ", ".join(f"{name} {column_type}" for name, column_type in columns.items())
+        conn.execute(f"CREATE TABLE pages ({definitions});")
+        insert_rows(conn, "pages", columns, rows)
+        escaped = tmp_path.replace("'", "''")
+        conn.execute(f"COPY pages TO '{escaped}' (FORMAT PARQUET, COMPRESSION ZSTD);")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+def import_part(
+    dump_path: str,
+    streams: List[Tuple[int, int]],
+    part_path: str,
+    redirect_path: str,
+    disambiguation_path: str,
+    fact_path: str,
+) -> int:
+    rows = []
+    redirects = []
+    disambiguations = []
+    facts = []
+    with open(dump_path, "rb") as dump:
+        for start, end in streams:
+            dump.seek(start)
+            xml_bytes = bz2.decompress(dump.read(end - start))
+            for page in iter_stream_pages(xml_bytes):
+                if page.findtext("ns") != "0":
+                    continue
+                redirect = page.find("redirect")
+                if redirect is not None:
+                    if redirect.get("title"):
+                        redirects.append((page.findtext("title"), redirect.get("title")))
+                    continue
+                title = page.findtext("title") or ""
+                wikitext = page.findtext("revision/text") or ""
+                if is_disambiguation(title, wikitext):
+                    disambiguations.extend(
+                        (title, target, position) for position, target in enumerate(disambiguation_targets(wikitext))
+                    )
+                    continue
+                row = parse_page(page)
+                if row is not None:
+                    rows.append(row)
+                    facts.extend(
+                        (row[0], title, key, value, position)
+                        for position, (key, value) in enumerate(infobox_facts(wikitext))
+                    )
+
+    write_parquet(redirects, REDIRECT_COLUMNS, redirect_path)
+    write_parquet(disambiguations, DISAMBIGUATION_COLUMNS, disambiguation_path)
+    write_parquet(facts, FACT_COLUMNS, fact_path)
+    # The article part is written last: its existence marks the whole part as done, which is what resume relies on
+    write_parquet(rows, ARTICLE_COLUMNS, part_path)
+    return len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dump", required=True, help="pages-articles-multistream.xml.bz2")
+    parser.add_argument("--index", required=True, help="pages-articles-multistream-index.txt.bz2")
+    parser.add_argument("--output", default="parquet", help="Directory for part-*.parquet files")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--streams-per-part", type=int, default=200, help="bz2 streams (~100 pages each) per Parquet file")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.join(args.output, "redirects"), exist_ok=True)
+    os.makedirs(os.path.join(args.output, "disambiguations"), exist_ok=True)
+    os.makedirs(os.path.join(args.output, "facts"), exist_ok=True)
+    offsets = read_stream_offsets(args.index)
+    parts = plan_parts(offsets, os.path.getsize(args.dump), args.streams_per_part)
+    part_paths = [os.path.join(args.output, f"part-{i:06d}.parquet") for i in range(len(parts))]
+    redirect_paths = [os.path.join(args.output, "redirects", f"part-{i:06d}.parquet") for i in range(len(parts))]
+    disambiguation_paths = [
+        os.path.join(args.output, "disambiguations", f"part-{i:06d}.parquet") for i in range(len(parts))
+    ]
+    fact_paths = [os.path.join(args.output, "facts", f"part-{i:06d}.parquet") for i in range(len(parts))]
+    pending = [i for i, path in enumerate(part_paths) if not os.path.exists(path)]
+    print(f"{len(offsets)} streams in {len(parts)} parts, {len(parts) - len(pending)} already done")
+
+    articles = 0
+    with ProcessPoolExecutor(max_workers=args.processes) as pool, tqdm(
+        total=len(parts), initial=len(parts) - len(pending), unit="part"
+    ) as progress:
+        futures = {
+            pool.submit(
+                import_part,
+                args.dump,
+                parts[i],
+                part_paths[i],
+                redirect_paths[i],
+                disambiguation_paths[i],
+                fact_paths[i],
+            ): i
+            for i in pending
+        }
+        for future in as_completed(futures):
+            articles += future.result()
+            progress.update(1)
+            progress.set_postfix(articles=articles)
+
+    print(f"Imported {articles} articles into {args.output}/ (load with read_parquet('{args.output}/*.parquet'))")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Split wiki.db into N shard databases, each with its own FTS index.
+
+Article ``rowid`` is the topic ID handed to the LLM, so every shard keeps it as
+``source_rowid`` and is indexed on it; shard ``i`` holds the articles with
+``source_rowid % N == i``. Spreading articles round-robin keeps each shard's
+BM25 statistics (document frequencies, average length) close to the global
+ones, so scores from different shards can be merged directly. Sections built by
+chunk_articles.py follow their article into its shard; the redirect and
+disambiguation tables are copied to shard 0, which serves query expansion.
+
+Shards are built side by side in ``<output>.staging`` and swapped in when all
+of them are done. Re-run after every wiki.db rebuild or incremental update,
+before compress_articles.py clears the article text in wiki.db.
+
+Usage (from ``data/wiki/``):
+    uv run shard_wiki.py --db wiki.db --shards 4 --output shards
+Then start the service with ``WIKI_SHARDS=4``.
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import duckdb
+
+
+def shard_path(shard_dir: str, shard: int) -> str:
+    return os.path.join(shard_dir, f"wiki-{shard:02d}.db")
+
+
+def build_shard(db_path: str, shard_dir: str, shard: int, shards: int) -> int:
+    conn = duckdb.connect(database=shard_path(shard_dir, shard))
+    try:
+        conn.execute("INSTALL fts; LOAD fts;")
+        escaped = db_path.replace("'", "''")
+        conn.execute(f"ATTACH '{escaped}' AS source (READ_ONLY);")
+        conn.execute("""
+            CREATE TABLE articles AS
+            SELECT rowid AS source_rowid, *
+            FROM source.articles
+            WHERE rowid % ? = ?
+            ORDER BY rowid;
+        """, [shards, shard])
+        has_sections = conn.execute("""
+            SELECT COUNT(*) FROM duckdb_tables() WHERE database_name = 'source' AND table_name = 'sections'
+        """).fetchone()[0] > 0
+        if has_sections:
+            conn.execute("""
+                CREATE TABLE sections AS
+                SELECT * FROM source.sections
+                WHERE page_id IN (SELECT page_id FROM articles)
+                ORDER BY section_id;
+            """)
+        if shard == 0:
+            for table in ("redirects", "disambiguations", "facts"):
+                source_has_table = conn.execute(
+                    "SELECT COUNT(*) FROM duckdb_tables() WHERE database_name = 'source' AND table_name = ?",
+                    [table],
+                ).fetchone()[0] > 0
+                if source_has_table:
+                    conn.execute(f"CREATE TABLE {table} AS SELECT * FROM source.{table};")
+                    conn.execute(f"CREATE INDEX {table}_title_key_idx ON {table} (title_key);")
+        conn.execute("DETACH source;")
+        conn.execute("CREATE INDEX articles_source_rowid_idx ON articles (source_rowid);")
+        conn.execute("PRAGMA create_fts_index('articles', 'source_rowid', 'text', overwrite=1);")
+        if has_sections:
+            conn.execute("CREATE INDEX sections_page_id_idx ON sections (page_id);")
+            conn.execute("PRAGMA create_fts_index('sections', 'section_id', 'heading', 'text', overwrite=1);")
+        conn.execute("CHECKPOINT;")
+        return conn.execute("SELECT COUNT(*) FROM articles;").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def build_shards(db_path: str, shard_dir: str, shards: int, processes: int = 1) -> list:
+    """
+    Build ``shards`` shard databases from ``db_path`` into ``shard_dir``, replacing any previous set.
+
+    Returns:
+        Article count per shard
+    """
+    staging_dir = shard_dir.rstrip("/") + ".staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+
+    with ProcessPoolExecutor(max_workers=max(1, min(processes, shards))) as pool:
+        futures = [pool.submit(build_shard, db_path, staging_dir, i, shards) for i in range(shards)]
+        counts = [future.result() for future in futures]
+
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    os.replace(staging_dir, shard_dir)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="wiki.db")
+    parser.add_argument("--shards", type=int, required=True)
+    parser.add_argument("--output", default="shards", help="Directory for wiki-NN.db shard files")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Shards built concurrently")
+    args = parser.parse_args()
+
+    conn = duckdb.connect(database=args.db, read_only=True)
+    try:
+        has_text = conn.execute("SELECT COUNT(text) FROM articles;").fetchone()[0] > 0
+    finally:
+        conn.close()
+    if not has_text:
+        print(f"{args.db} has no article text (compressed by compress_articles.py); shard it before compressing", file=sys.stderr)
+        sys.exit(1)
+
+    started = time.perf_counter()
+    counts = build_shards(args.db, args.output, args.shards, args.processes)
+    print(f"{args.shards} shards ({', '.join(map(str, counts))} articles) built in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import shutil
+
+import duckdb
+import pytest
+
+from build_fts_index import build_fts_index
+
+TEXTS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Foxes are small omnivorous mammals; the red fox is the largest of the true foxes.",
+    "Dogs were domesticated from wolves. A lazy dog sleeps all day.",
+    "Marie Curie was a physicist and chemist who conducted pioneering research on radioactivity.",
+    "Radioactivity was discovered by Henri Becquerel; Curie coined the term.",
+    "Paris is the capital of France and its largest city.",
+    "The Seine flows through Paris before reaching the English Channel.",
+    "Chemistry studies matter; physics studies energy, matter and their interactions.",
+]
+QUERIES = ["fox", "lazy dog", "radioactivity curie", "paris", "matter physics", "wolves domesticated", "nothingmatches"]
+
+
+@pytest.fixture
+def fts_available():
+    conn = duckdb.connect()
+    try:
+        conn.execute("LOAD fts;")
+    except duckdb.Error:
+        pytest.skip("DuckDB FTS extension is not installed")
+    finally:
+        conn.close()
+
+
+def _scores(db_path, queries):
+    conn = duckdb.connect(db_path, read_only=True)
+    try:
+        conn.execute("LOAD fts;")
+        return {
+            query: [
+                (rowid, round(score, 9))
+                for rowid, score in conn.execute("""
+                    SELECT rowid, score FROM (
+                        SELECT rowid, fts_main_articles.match_bm25(rowid, ?) AS score FROM articles
+                    )
+                    WHERE score IS NOT NULL
+                    ORDER BY score DESC, rowid;
+                """, [query]).fetchall()
+            ]
+            for query in queries
+        }
+    finally:
+        conn.close()
+
+
+def test_parallel_build_matches_pragma_bm25(tmp_path, fts_available):
+    built_path = str(tmp_path / "built.db")
+    pragma_path = str(tmp_path / "pragma.db")
+    conn = duckdb.connect(built_path)
+    conn.execute("CREATE TABLE articles (title VARCHAR, text VARCHAR);")
+    conn.executemany("INSERT INTO articles VALUES (?, ?);", [(f"Article {i}", text) for i, text in enumerate(TEXTS)])
+    conn.close()
+    shutil.copy2(built_path, pragma_path)
+
+    conn = duckdb.connect(pragma_path)
+    conn.execute("LOAD fts;")
+    conn.execute("PRAGMA create_fts_index('articles', 'rowid', 'text', overwrite=1);")
+    conn.close()
+    # More partitions than a single worker would need, so partial frequencies are merged
+    build_fts_index(built_path, partitions=3, processes=2, work_dir=str(tmp_path / "fts"))
+
+    expected = _scores(pragma_path, QUERIES)
+    assert any(expected.values())
+    assert _scores(built_path, QUERIES) == expected
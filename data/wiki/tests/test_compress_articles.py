@@ -0,0 +1,75 @@
+import os
+
+import duckdb
+import pytest
+
+pytest.importorskip("zstandard")
+
+from compress_articles import compress_database, raw_bodies_path, restore_text
+
+ARTICLES = [
+    (1, 10, "Alpha", "'''Alpha''' is the [[first letter]].", "Alpha is the first letter."),
+    (2, 20, "Beta", "'''Beta''' follows {{lang|el|alpha}}.", "Beta follows alpha."),
+    (3, 30, "Gamma", "'''Gamma''' is third.", "Gamma is third."),
+]
+
+
+def _build(path, cleaned=True):
+    conn = duckdb.connect(path)
+    conn.execute("CREATE TABLE articles (page_id BIGINT, revid BIGINT, title VARCHAR, text VARCHAR, clean_text VARCHAR);")
+    conn.executemany("INSERT INTO articles VALUES (?, ?, ?, ?, ?);", ARTICLES)
+    if not cleaned:
+        conn.execute("ALTER TABLE articles DROP COLUMN clean_text;")
+    conn.close()
+
+
+def _texts(path, columns):
+    conn = duckdb.connect(path, read_only=True)
+    try:
+        return conn.execute(f"SELECT page_id, {columns} FROM articles WHERE title IS NOT NULL ORDER BY page_id;").fetchall()
+    finally:
+        conn.close()
+
+
+def test_restore_keeps_raw_and_cleaned_text_apart(tmp_path):
+    db_path = str(tmp_path / "wiki.db")
+    bodies_path = str(tmp_path / "articles.zst")
+    _build(db_path)
+
+    assert compress_database(db_path, bodies_path, dict_size=0) == len(ARTICLES)
+    assert os.path.exists(raw_bodies_path(bodies_path))
+    assert _texts(db_path, "text, clean_text") == [(page_id, None, None) for page_id, *_ in ARTICLES]
+
+    conn = duckdb.connect(db_path)
+    assert restore_text(conn, bodies_path) == len(ARTICLES)
+    conn.close()
+    assert _texts(db_path, "text, clean_text") == [(page_id, text, clean) for page_id, _, _, text, clean in ARTICLES]
+
+
+def test_raw_text_build_restores_without_raw_file(tmp_path):
+    db_path = str(tmp_path / "wiki.db")
+    bodies_path = str(tmp_path / "articles.zst")
+    _build(db_path, cleaned=False)
+
+    compress_database(db_path, bodies_path, dict_size=0)
+    assert not os.path.exists(raw_bodies_path(bodies_path))
+
+    conn = duckdb.connect(db_path)
+    restore_text(conn, bodies_path)
+    conn.close()
+    assert _texts(db_path, "text") == [(page_id, text) for page_id, _, _, text, _ in ARTICLES]
+
+
+def test_cleaned_bodies_without_raw_text_refuse_to_restore(tmp_path):
+    db_path = str(tmp_path / "wiki.db")
+    bodies_path = str(tmp_path / "articles.zst")
+    _build(db_path)
+    compress_database(db_path, bodies_path, dict_size=0)
+    os.remove(raw_bodies_path(bodies_path))
+
+    conn = duckdb.connect(db_path)
+    try:
+        with pytest.raises(ValueError, match="raw article text"):
+            restore_text(conn, bodies_path)
+    finally:
+        conn.close()
@@ -0,0 +1,54 @@
+import duckdb
+
+from incremental_update import apply_update
+
+CURRENT = [
+    (1, 100, "Unchanged", "Same text.", "Same text."),
+    (2, 200, "Edited", "Old revision.", "Old revision."),
+    (3, 300, "Removed", "Gone soon.", "Gone soon."),
+    (4, 400, "Old name", "Renamed page.", "Renamed page."),
+]
+INCOMING = [
+    (1, 100, "Unchanged", "Same text."),
+    (2, 201, "Edited", "New revision."),
+    (4, 401, "New name", "Renamed page."),
+    (5, 500, "Added", "Brand new."),
+]
+
+
+def _rowids(conn):
+    return {page_id: rowid for page_id, rowid in conn.execute("SELECT page_id, rowid FROM articles;").fetchall()}
+
+
+def test_unchanged_and_edited_articles_keep_their_rowids(tmp_path):
+    conn = duckdb.connect(str(tmp_path / "wiki.db"))
+    conn.execute("""
+        CREATE TABLE articles (page_id BIGINT, revid BIGINT, title VARCHAR, text VARCHAR, clean_text VARCHAR);
+    """)
+    conn.executemany("INSERT INTO articles VALUES (?, ?, ?, ?, ?);", CURRENT)
+    conn.execute("CREATE INDEX articles_title_idx ON articles (title);")
+    before = _rowids(conn)
+
+    incoming_path = str(tmp_path / "part-0.parquet")
+    conn.execute("CREATE TEMP TABLE extracted (page_id BIGINT, revid BIGINT, title VARCHAR, text VARCHAR);")
+    conn.executemany("INSERT INTO extracted VALUES (?, ?, ?, ?);", INCOMING)
+    conn.execute(f"COPY extracted TO '{incoming_path}' (FORMAT PARQUET);")
+    conn.execute("DROP TABLE extracted;")
+
+    counts = apply_update(conn, incoming_path)
+
+    assert counts == {"incoming": 4, "upserted": 3, "deleted": 1}
+    after = _rowids(conn)
+    assert after[1] == before[1]
+    assert after[2] == before[2]
+    assert 3 not in after
+    # A renamed page is deleted and reinserted, like a new one
+    assert {4, 5} <= set(after)
+    rows = conn.execute("SELECT page_id, revid, title, text, clean_text FROM articles ORDER BY page_id;").fetchall()
+    assert rows == [
+        (1, 100, "Unchanged", "Same text.", "Same text."),
+        (2, 201, "Edited", "New revision.", None),
+        (4, 401, "New name", "Renamed page.", None),
+        (5, 500, "Added", "Brand new.", None),
+    ]
+    conn.close()
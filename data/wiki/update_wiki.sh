@@ -1,22 +1,78 @@
 set -e
 D=$(date +%Y%m01)
 BASE=https://dumps.wikimedia.org/enwiki/$D
+DUMP=enwiki-${D}-pages-articles-multistream.xml.bz2
+INDEX=enwiki-${D}-pages-articles-multistream-index.txt.bz2
 
-# TODO: If the file already exists, skip the download
+if [ -f "$DUMP.complete" ]; then
+  echo "$DUMP already downloaded, skipping download"
+else
+  curl -L -O -C - "$BASE/$DUMP"
 
-curl -L -O -C - "$BASE/enwiki-${D}-pages-articles-multistream.xml.bz2"
+  if [ ! -s "$DUMP" ]; then
+    echo "No dump available for $D, nothing to update"
+    rm -f "$DUMP"
+    exit 0
+  fi
+  curl -L -O -C - "$BASE/$INDEX"
+  touch "$DUMP.complete"
+  # Parts from a previous dump must not be resumed into this one
+  rm -rf parquet
+fi
 
-# TODO: If the downloaded file is 0 bytes, delete it and exit (there's no update to download)
+# Resumable: parts already written to parquet/ are skipped
+uv run multistream_import.py --dump "$DUMP" --index "$INDEX" --output parquet --processes 12
 
-uv run -- wikiextractor --json --processes 12 --output extracted_json enwiki-${D}-pages-articles-multistream.xml.bz2
+if [ -f wiki.db ]; then
+  # Upserts only new/changed pages on a staging copy, then swaps it in
+  # (restoring text from articles.zst first when wiki.db was compressed)
+  WITH_ZSTD=""
+  if [ -f articles.zst ]; then WITH_ZSTD="--with zstandard"; fi
+  uv run $WITH_ZSTD incremental_update.py --db wiki.db --extracted 'parquet/*.parquet' \
+    --redirects 'parquet/redirects/*.parquet' --disambiguations 'parquet/disambiguations/*.parquet' \
+    --facts 'parquet/facts/*.parquet'
+else
+  # Bodies compressed from a previous wiki.db do not match the rebuilt rowids
+  rm -f articles.zst articles.raw.zst
+  # Built as wiki.db.build, so an interrupted build is resumed here (every step below
+  # is rerunnable and the FTS index build checkpoints) instead of looking finished
+  duckdb wiki.db.build <<SQL
+CREATE TABLE IF NOT EXISTS articles AS
+SELECT page_id, revid, title, text
+FROM read_parquet('parquet/*.parquet');
 
-duckdb wiki.db <<EOF
-INSTALL fts;  
-LOAD fts;
+CREATE INDEX IF NOT EXISTS articles_title_idx ON articles (title);
+SQL
 
-CREATE TABLE IF NOT EXISTS articles AS
-SELECT title, text
-FROM read_json_auto('extracted_json/*/*');
+  # Parallel equivalent of PRAGMA create_fts_index('articles', 'rowid', 'text')
+  uv run build_fts_index.py --db wiki.db.build --processes 12
+  uv run link_tables.py --db wiki.db.build
+  uv run load_facts.py --db wiki.db.build
+  uv run clean_articles.py --db wiki.db.build
+  uv run extract_leads.py --db wiki.db.build
+  uv run chunk_articles.py --db wiki.db.build
+  mv wiki.db.build wiki.db
+fi
+
+# Rowids may have changed, so the title index is always rebuilt
+uv run build_title_index.py --db wiki.db --output titles.idx
+
+# Optional: rebuild the shard set served when WIKI_SHARDS is set
+if [ "${WIKI_SHARDS:-0}" -gt 0 ]; then
+  uv run shard_wiki.py --db wiki.db --shards "$WIKI_SHARDS" --output shards
+fi
+
+# Optional: embed article leads into vectors.idx for hybrid BM25 + dense search, e.g.
+# WIKI_EMBEDDER=sentence-transformers:sentence-transformers/all-MiniLM-L6-v2
+# (rowids may have changed, so an index from the previous build is removed otherwise)
+if [ -n "${WIKI_EMBEDDER:-}" ]; then
+  uv run embed_articles.py --db wiki.db --output vectors.idx --embedder "$WIKI_EMBEDDER"
+else
+  rm -f vectors.idx
+fi
 
-PRAGMA create_fts_index('articles', 'rowid', 'text', overwrite=1);
-EOF
\ No newline at end of file
+# Optional: move article bodies into zstd-compressed articles.zst (needs zstandard in the service);
+# the raw text of a cleaned build goes to articles.raw.zst for later incremental updates
+if [ "${WIKI_COMPRESS:-0}" = "1" ]; then
+  uv run --with zstandard compress_articles.py --db wiki.db --output articles.zst
+fi
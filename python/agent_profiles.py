@@ -14,7 +14,10 @@ AGENT_ORCHESTRATOR = "orchestrator"
 
 TOOL_SEARCH_MEMORIES = "search_memories"
 TOOL_PERFORM_RESEARCH = "perform_research"
+TOOL_PERFORM_RESEARCH_BATCH = "perform_research_batch"
+TOOL_LOOKUP_FACTS = "lookup_facts"
 TOOL_GET_FULL_TOPIC_DETAILS = "get_full_topic_details"
+TOOL_GET_TOPIC_SECTIONS = "get_topic_sections"
 TOOL_SAVE_MEMORY = "save_memory"
 TOOL_EDIT_MEMORY = "edit_memory"
 TOOL_TERMINAL_COMMAND = "terminal_command"
@@ -110,7 +113,10 @@ def get_agent_profile(agent_id: Optional[str]) -> AgentProfile:
             allowed_tool_names={
                 TOOL_SEARCH_MEMORIES,
                 TOOL_PERFORM_RESEARCH,
+                TOOL_PERFORM_RESEARCH_BATCH,
+                TOOL_LOOKUP_FACTS,
                 TOOL_GET_FULL_TOPIC_DETAILS,
+                TOOL_GET_TOPIC_SECTIONS,
             },
             system_instructions=(
                 f"Always cite the article ID when providing information from `{perform_research_tool_name}`. Only include information that can be found within the article. If the article does not contain the information, do not include it in your response."
@@ -0,0 +1,119 @@
+"""
+Compare the plain wiki.db layout against zstd-compressed article bodies (articles.zst).
+
+Reports the on-disk size of both layouts and the latency of fetching one
+article the way the service does: a snippet window (the first 20000
+characters, as perform_research reads) and the whole article.
+
+Usage (from ``python/``):
+    uv run --with zstandard benchmarks/compression_benchmark.py --articles 20000
+    uv run --with zstandard benchmarks/compression_benchmark.py --db ../data/wiki/wiki.db  # works on a copy
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "data" / "wiki"))
+
+from compress_articles import compress_database, text_columns
+from compressed_articles import CompressedArticles
+from synthetic_wiki import build_synthetic_wiki
+
+SNIPPET_WINDOW_CHARS = 20000
+
+
+def measure(fetch, rowids):
+    timings = []
+    for rowid in rowids:
+        started = time.perf_counter()
+        fetch(rowid)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return timings
+
+
+def report(name, timings):
+    print(
+        f"{name:>24}: mean {statistics.mean(timings):10.1f} us  "
+        f"p50 {timings[len(timings) // 2]:10.1f} us  "
+        f"p99 {timings[int(len(timings) * 0.99) - 1]:10.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="Existing wiki.db to copy instead of building a synthetic corpus")
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    parser.add_argument("--fetches", type=int, default=1000)
+    parser.add_argument("--level", type=int, default=9)
+    parser.add_argument("--dict-size", type=int, default=112640)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_path = os.path.join(tmp, "plain.db")
+        compressed_path = os.path.join(tmp, "wiki.db")
+        bodies_path = os.path.join(tmp, "articles.zst")
+        if args.db:
+            shutil.copy2(args.db, plain_path)
+        else:
+            print(f"Building synthetic corpus with {args.articles} articles...")
+            build_synthetic_wiki(plain_path, articles=args.articles, paragraphs=args.paragraphs)
+        shutil.copy2(plain_path, compressed_path)
+
+        started = time.perf_counter()
+        count = compress_database(compressed_path, bodies_path, level=args.level, dict_size=args.dict_size)
+        print(f"{count} articles compressed at level {args.level} in {time.perf_counter() - started:.1f}s")
+
+        plain_size = os.path.getsize(plain_path)
+        compressed_size = os.path.getsize(compressed_path) + os.path.getsize(bodies_path)
+        print(f"{'plain wiki.db':>24}: {plain_size / 2**20:10.1f} MiB")
+        print(
+            f"{'wiki.db + articles.zst':>24}: {compressed_size / 2**20:10.1f} MiB "
+            f"({os.path.getsize(bodies_path) / 2**20:.1f} MiB of bodies, {compressed_size / plain_size:.0%} of plain)"
+        )
+
+        plain = duckdb.connect(database=plain_path, read_only=True)
+        compressed = duckdb.connect(database=compressed_path, read_only=True)
+        try:
+            column = text_columns(plain)[0]
+            rowids = [
+                row[0]
+                for row in plain.execute(
+                    f"SELECT rowid FROM articles USING SAMPLE reservoir({int(args.fetches)} ROWS) REPEATABLE (7);"
+                ).fetchall()
+            ]
+            bodies = CompressedArticles(bodies_path)
+
+            def fetch_plain(max_chars):
+                sql = f"SELECT title, left({column}, ?), length({column}) FROM articles WHERE rowid = ?"
+                return lambda rowid: plain.execute(sql, [max_chars, rowid]).fetchall()
+
+            def fetch_compressed(max_chars):
+                def fetch(rowid):
+                    compressed.execute("SELECT title FROM articles WHERE rowid = ?", [rowid]).fetchall()
+                    return bodies.get(rowid, max_chars)
+                return fetch
+
+            full = 2**31 - 1
+            report("plain snippet window", measure(fetch_plain(SNIPPET_WINDOW_CHARS), rowids))
+            report("zstd snippet window", measure(fetch_compressed(SNIPPET_WINDOW_CHARS), rowids))
+            report("plain full article", measure(fetch_plain(full), rowids))
+            report("zstd full article", measure(fetch_compressed(None), rowids))
+            report("zstd decompress only", measure(bodies.get, rowids))
+        finally:
+            plain.close()
+            compressed.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Retrieval regression suite for the offline Wikipedia service.
+
+Runs a fixed, labeled query set through ``fulltext_search`` and
+``get_full_wikipedia_article`` and reports latency percentiles, DuckDB rows
+scanned (from the query profiler), bytes returned and recall@k. The search
+cache is disabled, so every run does the full work.
+
+Without ``--data-dir`` a synthetic corpus is built and answer terms are planted
+in known articles, so the labels are exact; "content" queries search for the
+planted terms and "title" queries for an article title. With ``--data-dir`` (a
+directory holding wiki.db and the files built next to it) a JSONL query file is
+required, one ``{"terms": [...], "relevant": ["Article title", ...]}`` per line.
+
+Results are printed and, with ``--output``, written as JSON for regression tracking.
+
+Usage (from ``python/``):
+    uv run benchmarks/retrieval_benchmark.py --articles 5000 --output retrieval.json
+    uv run benchmarks/retrieval_benchmark.py --data-dir ../data/wiki --queries queries.jsonl --output retrieval.json
+    uv run benchmarks/retrieval_benchmark.py --articles 5000 --fast   # snippets from precomputed leads
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "data" / "wiki"))
+
+from build_title_index import iter_title_entries
+from extract_leads import materialize_leads
+from synthetic_wiki import build_synthetic_wiki
+from title_index import write_title_index
+
+RECALL_AT = (1, 5, 10, 25)
+RESULT_HEADING = re.compile(r"^# \[\d+\]: .* \(([0-9a-v]+)\)$", re.MULTILINE)
+
+
+def answer_words(count: int, vocabulary: List[str]) -> List[str]:
+    """Pseudo-words longer than any vocabulary word, so planted terms only occur where planted."""
+    rng = random.Random(4321)
+    longest = max(len(word) for word in vocabulary)
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(longest + 2)))
+    return sorted(words)
+
+
+def plant_answers(conn: duckdb.DuckDBPyConnection, vocabulary: List[str], count: int, seed: int = 11) -> List[dict]:
+    """
+    Append answer terms to known articles and return the labeled query set.
+
+    Each content query has two planted terms: the target article gets both
+    twice, and a few distractors get one of them once.
+    """
+    rng = random.Random(seed)
+    titles = dict(conn.execute("SELECT rowid, title FROM articles;").fetchall())
+    rowids = sorted(titles)
+    words = answer_words(2 * count, vocabulary)
+
+    additions: Dict[int, List[str]] = {}
+    queries = []
+    for i in range(count):
+        first, second = words[2 * i], words[2 * i + 1]
+        target = rng.choice(rowids)
+        additions.setdefault(target, []).append(f"{first.capitalize()} {second} {first} {second}.")
+        for word in (first, second):
+            for distractor in rng.sample(rowids, 4):
+                additions.setdefault(distractor, []).append(f"{word.capitalize()}.")
+        queries.append({"kind": "content", "terms": [first, second], "relevant": [titles[target]]})
+    for target in rng.sample(rowids, max(1, count // 2)):
+        queries.append({"kind": "title", "terms": [titles[target]], "relevant": [titles[target]]})
+
+    conn.executemany(
+        "UPDATE articles SET text = text || ? WHERE rowid = ?;",
+        [("\n" + " ".join(sentences), rowid) for rowid, sentences in additions.items()],
+    )
+    return queries
+
+
+def build_corpus(data_dir: str, articles: int, paragraphs: int, queries: int) -> List[dict]:
+    db_path = os.path.join(data_dir, "wiki.db")
+    vocabulary = build_synthetic_wiki(db_path, articles=articles, paragraphs=paragraphs)
+    conn = duckdb.connect(database=db_path)
+    try:
+        conn.execute("LOAD fts;")
+        labeled = plant_answers(conn, vocabulary, queries)
+        conn.execute("PRAGMA create_fts_index('articles', 'rowid', 'text', overwrite=1);")
+        write_title_index(os.path.join(data_dir, "titles.idx"), iter_title_entries(conn))
+        materialize_leads(conn)
+    finally:
+        conn.close()
+    return labeled
+
+
+def load_queries(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as query_file:
+        return [{"kind": "labeled", **json.loads(line)} for line in query_file if line.strip()]
+
+
+class ProfiledCursor:
+    """Pool cursor wrapper that adds the rows each query scanned (per DuckDB's profiler) to a counter."""
+
+    def __init__(self, cursor: duckdb.DuckDBPyConnection, profile_path: str, counter: Dict[str, int]):
+        self._cursor = cursor
+        self._profile_path = profile_path
+        self._counter = counter
+
+    def execute(self, *args, **kwargs):
+        self._cursor.execute(*args, **kwargs)
+        return self
+
+    def _record(self, result):
+        with open(self._profile_path, encoding="utf-8") as profile:
+            self._counter["rows_scanned"] += json.load(profile).get("cumulative_rows_scanned", 0)
+        return result
+
+    def fetchall(self):
+        return self._record(self._cursor.fetchall())
+
+    def fetchone(self):
+        return self._record(self._cursor.fetchone())
+
+    def fetchmany(self, size: int = 1):
+        return self._record(self._cursor.fetchmany(size))
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+
+def profile_pools(service, profile_dir: str, counter: Dict[str, int]) -> None:
+    """Turn on JSON profiling for every pooled cursor and count rows scanned through them."""
+    for pool_number, pool in enumerate(service._pools):
+        cursors = [pool._idle.get() for _ in range(pool._size)]
+        paths = {}
+        for cursor_number, cursor in enumerate(cursors):
+            path = os.path.join(profile_dir, f"profile-{pool_number}-{cursor_number}.json")
+            cursor.execute("SET enable_profiling = 'json';")
+            cursor.execute(f"SET profiling_output = '{path}';")
+            paths[id(cursor)] = path
+            pool._idle.put(cursor)
+
+        @contextmanager
+        def profiled_cursor(checkout=pool.cursor, paths=paths):
+            with checkout() as cursor:
+                yield ProfiledCursor(cursor, paths[id(cursor)], counter)
+
+        pool.cursor = profiled_cursor
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(timings: List[float], scanned: List[int], returned: List[int]) -> dict:
+    return {
+        "calls": len(timings),
+        "latency_ms": {
+            "mean": statistics.mean(timings),
+            "p50": percentile(timings, 50),
+            "p95": percentile(timings, 95),
+            "p99": percentile(timings, 99),
+        },
+        "rows_scanned": {"mean": statistics.mean(scanned), "p50": percentile(scanned, 50), "max": max(scanned)},
+        "bytes_returned": {"mean": statistics.mean(returned), "total": sum(returned)},
+    }
+
+
+def recall(rankings: List[List[int]], relevant: List[List[int]]) -> Dict[str, float]:
+    return {
+        f"@{k}": statistics.mean(
+            len(set(ranked[:k]) & set(wanted)) / len(wanted) for ranked, wanted in zip(rankings, relevant)
+        )
+        for k in RECALL_AT
+    }
+
+
+def run_suite(service, queries: List[dict], relevant: List[List[int]], runs: int, counter: Dict[str, int]) -> dict:
+    def timed(call):
+        scanned_before = counter["rows_scanned"]
+        started = time.perf_counter()
+        result = call()
+        return result, (time.perf_counter() - started) * 1000, counter["rows_scanned"] - scanned_before
+
+    # One untimed pass warms DuckDB's buffer pool and the title index pages
+    for query in queries:
+        service.fulltext_search(query["terms"])
+
+    search = ([], [], [])
+    fetch = ([], [], [])
+    rankings = []
+    for run in range(runs):
+        for query, wanted in zip(queries, relevant):
+            result, elapsed, scanned = timed(lambda: service.fulltext_search(query["terms"]))
+            for values, value in zip(search, (elapsed, scanned, len(result.encode("utf-8")))):
+                values.append(value)
+            if run == 0:
+                rankings.append([service.decode_topic_id(topic_id) for topic_id in RESULT_HEADING.findall(result)])
+
+            topic_ids = [service.encode_topic_id(rowid) for rowid in wanted]
+            result, elapsed, scanned = timed(lambda: service.get_full_wikipedia_article(topic_ids))
+            for values, value in zip(fetch, (elapsed, scanned, len(result.encode("utf-8")))):
+                values.append(value)
+
+    by_kind = {}
+    for kind in sorted({query["kind"] for query in queries}):
+        picked = [i for i, query in enumerate(queries) if query["kind"] == kind]
+        by_kind[kind] = recall([rankings[i] for i in picked], [relevant[i] for i in picked])
+
+    return {
+        "fulltext_search": {**summarize(*search), "recall": recall(rankings, relevant), "recall_by_kind": by_kind},
+        "get_full_wikipedia_article": summarize(*fetch),
+    }
+
+
+def resolve_relevant(db_path: str, queries: List[dict]) -> List[List[int]]:
+    """Map the labeled titles of every query to rowids (topic IDs); unknown titles are dropped."""
+    conn = duckdb.connect(database=db_path, read_only=True)
+    try:
+        resolved = []
+        for query in queries:
+            rowids = []
+            for title in query["relevant"]:
+                rowids.extend(row[0] for row in conn.execute("SELECT rowid FROM articles WHERE title = ?;", [title]).fetchall())
+            if not rowids:
+                raise ValueError(f"no article matches the labels of query {query['terms']!r}")
+            resolved.append(rowids)
+        return resolved
+    finally:
+        conn.close()
+
+
+def print_report(results: dict) -> None:
+    for name in ("fulltext_search", "get_full_wikipedia_article"):
+        metrics = results[name]
+        latency = metrics["latency_ms"]
+        print(
+            f"{name:>26}: p50 {latency['p50']:8.2f} ms  p95 {latency['p95']:8.2f} ms  p99 {latency['p99']:8.2f} ms  "
+            f"rows scanned {metrics['rows_scanned']['mean']:12.0f}  "
+            f"bytes {metrics['bytes_returned']['mean']:10.0f}"
+        )
+    search = results["fulltext_search"]
+    print(f"{'recall':>26}: " + "  ".join(f"{k} {value:.3f}" for k, value in search["recall"].items()))
+    for kind, values in search["recall_by_kind"].items():
+        print(f"{'recall (' + kind + ')':>26}: " + "  ".join(f"{k} {value:.3f}" for k, value in values.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", help="Existing wiki data directory instead of a synthetic corpus")
+    parser.add_argument("--queries", help="JSONL labeled queries (required with --data-dir)")
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--paragraphs", type=int, default=40, help="Maximum paragraphs per article")
+    parser.add_argument("--query-count", type=int, default=40, help="Synthetic content queries (plus half as many title queries)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--fast", action="store_true", help="Build snippets from precomputed leads (WIKI_FAST_SEARCH=1)")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    if args.data_dir and not args.queries:
+        parser.error("--queries is required with --data-dir")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        if args.data_dir:
+            queries = load_queries(args.queries)
+        else:
+            print(f"Building synthetic corpus with {args.articles} articles...")
+            queries = build_corpus(tmp, args.articles, args.paragraphs, args.query_count)
+        relevant = resolve_relevant(os.path.join(data_dir, "wiki.db"), queries)
+
+        os.environ["WIKI_DATA_DIR"] = data_dir
+        os.environ["WIKI_SEARCH_CACHE_SIZE"] = "0"
+        os.environ["WIKI_FAST_SEARCH"] = "1" if args.fast else "0"
+        from offline_wikipedia_service import _OfflineWikipediaService
+
+        service = _OfflineWikipediaService()
+        counter = {"rows_scanned": 0}
+        profile_pools(service, tmp, counter)
+        results = {
+            "config": {
+                "data_dir": args.data_dir,
+                "articles": None if args.data_dir else args.articles,
+                "queries": len(queries),
+                "runs": args.runs,
+                "fast": args.fast,
+                "duckdb": duckdb.__version__,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            },
+            **run_suite(service, queries, relevant, args.runs, counter),
+        }
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
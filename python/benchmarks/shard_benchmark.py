@@ -0,0 +1,138 @@
+"""
+Compare BM25 search on one wiki.db against scatter-gather over N shards.
+
+Shards are built with data/wiki/shard_wiki.py; the sharded search mirrors
+``_OfflineWikipediaService.score_articles`` (per-shard top-k merged by score).
+Overlap is the fraction of the unsharded top 25 that the sharded search also returns.
+
+Usage (from ``python/``):
+    uv run benchmarks/shard_benchmark.py --articles 20000 --shards 2 4 8 --fanout 4
+"""
+import argparse
+import heapq
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "data" / "wiki"))
+
+from shard_wiki import build_shards, shard_path
+from synthetic_wiki import build_synthetic_wiki
+
+LIMIT = 25
+
+SCORE_QUERY = """
+SELECT {id}, score
+FROM (
+    SELECT {id}, fts_main_articles.match_bm25({id}, ?) AS score
+    FROM articles
+)
+WHERE score IS NOT NULL
+ORDER BY score DESC
+LIMIT ?;
+"""
+
+
+def open_cursor(db_path):
+    conn = duckdb.connect(database=db_path, read_only=True)
+    conn.execute("LOAD fts;")
+    return conn
+
+
+def search_unsharded(conn, fts_query):
+    return conn.execute(SCORE_QUERY.format(id="rowid"), [fts_query, LIMIT]).fetchall()
+
+
+def search_sharded(conns, executor, fts_query):
+    query = SCORE_QUERY.format(id="source_rowid")
+
+    def score_shard(conn):
+        cursor = conn.cursor()
+        try:
+            return cursor.execute(query, [fts_query, LIMIT]).fetchall()
+        finally:
+            cursor.close()
+
+    shard_results = executor.map(score_shard, conns)
+    return heapq.nlargest(LIMIT, (row for rows in shard_results for row in rows), key=lambda row: row[1])
+
+
+def measure(search, queries, runs):
+    timings = []
+    results = {}
+    for _ in range(runs):
+        for fts_query in queries:
+            started = time.perf_counter()
+            results[fts_query] = search(fts_query)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings, results
+
+
+def report(name, timings, overlap=None):
+    line = (
+        f"{name:>22}: mean {statistics.mean(timings):8.2f} ms  "
+        f"p50 {timings[len(timings) // 2]:8.2f} ms  "
+        f"p95 {timings[int(len(timings) * 0.95) - 1]:8.2f} ms"
+    )
+    if overlap is not None:
+        line += f"  top-{LIMIT} overlap {overlap:6.1%}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--paragraphs", type=int, default=40, help="Maximum paragraphs per article")
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--fanout", type=int, default=None, help="Concurrent shard queries (default: shard count)")
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "wiki.db")
+        print(f"Building synthetic corpus with {args.articles} articles...")
+        words = build_synthetic_wiki(db_path, articles=args.articles, paragraphs=args.paragraphs)
+
+        rng = random.Random(7)
+        queries = [" OR ".join(rng.sample(words, 3)) for _ in range(args.queries)]
+
+        conn = open_cursor(db_path)
+        try:
+            search_unsharded(conn, queries[0])
+            timings, baseline = measure(lambda q: search_unsharded(conn, q), queries, args.runs)
+            report("unsharded", timings)
+        finally:
+            conn.close()
+
+        for shards in args.shards:
+            shard_dir = os.path.join(tmp, f"shards-{shards}")
+            build_shards(db_path, shard_dir, shards, processes=shards)
+            conns = [open_cursor(shard_path(shard_dir, i)) for i in range(shards)]
+            fanout = args.fanout or shards
+            try:
+                with ThreadPoolExecutor(max_workers=fanout) as executor:
+                    search = lambda q: search_sharded(conns, executor, q)
+                    search(queries[0])
+                    timings, results = measure(search, queries, args.runs)
+                overlap = statistics.mean(
+                    len({r for r, _ in results[q]} & {r for r, _ in baseline[q]}) / max(1, len(baseline[q]))
+                    for q in queries
+                )
+                report(f"{shards} shards, fan-out {fanout}", timings, overlap)
+            finally:
+                for shard_conn in conns:
+                    shard_conn.close()
+
+
+if __name__ == "__main__":
+    main()
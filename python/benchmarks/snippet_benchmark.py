@@ -0,0 +1,97 @@
+"""
+Micro-benchmark search snippet extraction on large articles.
+
+Compares the previous per-word ``re.finditer`` extractor (full-text lowercasing,
+sort + merge, repeated string concatenation) with the single-pass
+``wiki_text.build_snippet``.
+
+Usage (from ``python/``):
+    uv run benchmarks/snippet_benchmark.py
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_wiki import make_article, vocabulary
+from wiki_text import build_snippet, compile_terms_pattern
+
+SNIPPET_WINDOW_CHARS = 20000
+
+
+def legacy_snippet(text, terms, ctx=50):
+    lower_text = text.lower()
+    spans = [(0, min(len(text), 400))]
+    for word in " ".join(terms).split():
+        for m in re.finditer(re.escape(word.lower()), lower_text):
+            spans.append((m.start(), m.end()))
+
+    spans.sort(key=lambda x: x[0])
+    merged = [spans[0]]
+    for start, end in spans[1:]:
+        prev_start, prev_end = merged[-1]
+        if start <= prev_end + ctx:
+            merged[-1] = (prev_start, max(prev_end, end))
+        else:
+            merged.append((start, end))
+
+    contexts = []
+    for start, end in merged:
+        cs = max(0, start - ctx)
+        ce = min(len(text), end + ctx)
+        snippet = text[cs:ce].strip()
+        if cs > 0:
+            snippet = "… " + snippet
+        if ce < len(text):
+            snippet += " …"
+        contexts.append(snippet)
+
+    best_context = contexts[0]
+    for snippet in contexts[1:]:
+        best_context = best_context.rstrip(" …")
+        snippet = snippet.lstrip("… ")
+        best_context = f"{best_context} … {snippet}"
+    if len(best_context) > 800:
+        best_context = best_context[:800].rstrip() + " …"
+    return best_context
+
+
+def time_per_call(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    words = vocabulary()
+    # Common words make for many matches, as real queries like "history" do
+    terms = [" ".join(rng.sample(words[:50], 2)), rng.choice(words[:50])]
+    pattern = compile_terms_pattern(terms)
+
+    print(f"terms: {terms}")
+    for paragraphs in (20, 100, 400, 1600):
+        text = make_article(rng, words[:500], paragraphs)
+        legacy_ms = time_per_call(lambda: legacy_snippet(text, terms), args.repeat)
+        full_ms = time_per_call(lambda: build_snippet(text, pattern), args.repeat)
+        window_ms = time_per_call(
+            lambda: build_snippet(text, pattern, window_chars=SNIPPET_WINDOW_CHARS), args.repeat
+        )
+        print(
+            f"{len(text) / 1024:8.0f} KiB  legacy {legacy_ms:8.3f} ms  "
+            f"single-pass {full_ms:8.3f} ms  single-pass/{SNIPPET_WINDOW_CHARS // 1000}k window {window_ms:8.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measure process startup: importing inference_service.py and standalone_mcp_server.py,
+and opening the offline Wikipedia service, each in a fresh interpreter.
+
+Importing the servers no longer opens wiki.db; the "open wiki" column is what
+the first search (or a ``WIKI_PREWARM=1`` background pre-warm) pays instead.
+Run it against the real data/wiki files to see the cost for your build.
+
+Usage (from ``python/``):
+    uv run benchmarks/startup_benchmark.py --repeats 5
+    uv run benchmarks/startup_benchmark.py --modules inference_service --no-open
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PYTHON_DIR = Path(__file__).resolve().parents[1]
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+__import__({module!r})
+imported = time.perf_counter()
+opened = imported
+if {open_wiki!r}:
+    from offline_wikipedia_service import offline_wikipedia_service
+    offline_wikipedia_service.get()
+    opened = time.perf_counter()
+print("STARTUP " + json.dumps({{"import_ms": (imported - started) * 1000, "open_ms": (opened - imported) * 1000}}))
+"""
+
+
+def run_child(code: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PYTHON_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "WIKI_PREWARM": "0"},
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError(f"startup measurement failed:\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=["inference_service", "standalone_mcp_server"])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--no-open", action="store_true", help="Only measure imports (no wiki.db needed)")
+    args = parser.parse_args()
+
+    print(f"{'':>24}  {'import p50':>12}  {'open wiki p50':>14}  {'total p50':>11}")
+    for module in args.modules:
+        code = CHILD.format(module=module, open_wiki=not args.no_open)
+        runs = [run_child(code) for _ in range(args.repeats)]
+        imports = statistics.median(run["import_ms"] for run in runs)
+        opens = statistics.median(run["open_ms"] for run in runs)
+        print(f"{module:>24}  {imports:9.0f} ms  {opens:11.0f} ms  {imports + opens:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import random
+from typing import List
+
+import duckdb
+
+VOCABULARY_SIZE = 5000
+
+
+def vocabulary(size: int = VOCABULARY_SIZE) -> List[str]:
+    """Deterministic pseudo-words, so benchmark queries are stable across runs."""
+    rng = random.Random(1234)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    return sorted(words)
+
+
+def make_article(rng: random.Random, words: List[str], paragraphs: int) -> str:
+    """Build article text shaped like wikiextractor output: long paragraphs separated by short heading lines."""
+    lines = []
+    for paragraph in range(paragraphs):
+        if paragraph and paragraph % 4 == 0:
+            lines.append(" ".join(rng.choices(words, k=2)).title() + ".")
+        sentence_count = rng.randint(3, 8)
+        sentences = []
+        for _ in range(sentence_count):
+            sentence = " ".join(rng.choices(words, k=rng.randint(8, 20)))
+            sentences.append(sentence.capitalize() + ".")
+        lines.append(" ".join(sentences))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def build_synthetic_wiki(db_path: str, articles: int = 5000, paragraphs: int = 40, seed: int = 42) -> List[str]:
+    """
+    Create an ``articles(title, text)`` table with an FTS index, matching the wiki.db layout.
+
+    Returns:
+        The vocabulary used to generate the articles
+    """
+    rng = random.Random(seed)
+    words = vocabulary()
+    conn = duckdb.connect(database=db_path)
+    try:
+        conn.execute("INSTALL fts; LOAD fts;")
+        conn.execute("CREATE OR REPLACE TABLE articles (title VARCHAR, text VARCHAR);")
+        batch = []
+        for i in range(articles):
+            title = " ".join(rng.choices(words, k=rng.randint(1, 3))).title() + f" {i}"
+            batch.append((title, make_article(rng, words, rng.randint(paragraphs // 4, paragraphs))))
+            if len(batch) >= 500:
+                conn.executemany("INSERT INTO articles VALUES (?, ?);", batch)
+                batch.clear()
+        if batch:
+            conn.executemany("INSERT INTO articles VALUES (?, ?);", batch)
+        conn.execute("CREATE INDEX articles_title_idx ON articles (title);")
+        conn.execute("PRAGMA create_fts_index('articles', 'rowid', 'text', overwrite=1);")
+    finally:
+        conn.close()
+    return words
@@ -0,0 +1,100 @@
+"""
+Compare title lookups in the memory-mapped title index against DuckDB queries on wiki.db.
+
+Usage (from ``python/``):
+    uv run benchmarks/title_index_benchmark.py --articles 50000 --lookups 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "data" / "wiki"))
+
+from build_title_index import iter_title_entries
+from synthetic_wiki import build_synthetic_wiki
+from title_index import TitleIndex, write_title_index
+
+
+def measure(lookup, titles):
+    timings = []
+    for title in titles:
+        started = time.perf_counter()
+        lookup(title)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return timings
+
+
+def report(name, timings):
+    print(
+        f"{name:>24}: mean {statistics.mean(timings):10.1f} us  "
+        f"p50 {timings[len(timings) // 2]:10.1f} us  "
+        f"p99 {timings[int(len(timings) * 0.99) - 1]:10.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=50000)
+    parser.add_argument("--paragraphs", type=int, default=4, help="Maximum paragraphs per article (text is not searched)")
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "wiki.db")
+        index_path = os.path.join(tmp, "titles.idx")
+        print(f"Building synthetic corpus with {args.articles} articles...")
+        build_synthetic_wiki(db_path, articles=args.articles, paragraphs=args.paragraphs)
+
+        conn = duckdb.connect(database=db_path, read_only=True)
+        try:
+            started = time.perf_counter()
+            write_title_index(index_path, iter_title_entries(conn))
+            print(f"Title index built in {time.perf_counter() - started:.1f}s ({os.path.getsize(index_path) / 1024:.0f} KiB)")
+
+            titles = [row[0] for row in conn.execute("SELECT title FROM articles;").fetchall()]
+            rng = random.Random(7)
+            sample = rng.sample(titles, min(args.lookups, len(titles)))
+            prefixes = [title[: max(4, len(title) // 2)] for title in sample]
+
+            index = TitleIndex(index_path)
+            report("mmap exact", measure(index.exact, [title.upper() for title in sample]))
+            report("mmap prefix", measure(index.prefix, prefixes))
+
+            cursor = conn.cursor()
+            report(
+                "duckdb title = ?",
+                measure(lambda t: cursor.execute("SELECT rowid FROM articles WHERE title = ?", [t]).fetchall(), sample),
+            )
+            report(
+                "duckdb lower(title) = ?",
+                measure(
+                    lambda t: cursor.execute("SELECT rowid FROM articles WHERE lower(title) = lower(?)", [t]).fetchall(),
+                    sample,
+                ),
+            )
+            report(
+                "duckdb prefix LIKE",
+                measure(
+                    lambda p: cursor.execute(
+                        "SELECT rowid FROM articles WHERE lower(title) LIKE lower(?) || '%' ORDER BY length(title) LIMIT 5",
+                        [p],
+                    ).fetchall(),
+                    prefixes,
+                ),
+            )
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
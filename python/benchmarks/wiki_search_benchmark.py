@@ -0,0 +1,110 @@
+"""
+Compare single-phase and two-phase Wikipedia search queries on a synthetic corpus.
+
+Usage (from ``python/``):
+    uv run benchmarks/wiki_search_benchmark.py --articles 5000 --runs 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic_wiki import build_synthetic_wiki
+
+SNIPPET_WINDOW_CHARS = 20000
+
+SINGLE_PHASE_QUERY = """
+SELECT
+    rowid,
+    title,
+    text,
+    fts_main_articles.match_bm25(rowid, ?) AS score
+FROM articles
+WHERE score IS NOT NULL
+ORDER BY score DESC
+LIMIT 25;
+"""
+
+SCORE_QUERY = """
+SELECT rowid, score
+FROM (
+    SELECT rowid, fts_main_articles.match_bm25(rowid, ?) AS score
+    FROM articles
+)
+WHERE score IS NOT NULL
+ORDER BY score DESC
+LIMIT 25;
+"""
+
+
+def single_phase(conn, fts_query):
+    rows = conn.execute(SINGLE_PHASE_QUERY, [fts_query]).fetchall()
+    return sum(len(text) for _, _, text, _ in rows)
+
+
+def two_phase(conn, fts_query):
+    scored = conn.execute(SCORE_QUERY, [fts_query]).fetchall()
+    if not scored:
+        return 0
+    placeholders = ", ".join("?" for _ in scored)
+    rows = conn.execute(
+        f"SELECT rowid, title, left(text, ?) FROM articles WHERE rowid IN ({placeholders})",
+        [SNIPPET_WINDOW_CHARS, *(rowid for rowid, _ in scored)],
+    ).fetchall()
+    return sum(len(text) for _, _, text in rows)
+
+
+def measure(strategy, conn, queries, runs):
+    timings = []
+    returned = 0
+    for _ in range(runs):
+        for fts_query in queries:
+            started = time.perf_counter()
+            returned += strategy(conn, fts_query)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings, returned // runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--paragraphs", type=int, default=40, help="Maximum paragraphs per article")
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "wiki.db")
+        print(f"Building synthetic corpus with {args.articles} articles...")
+        words = build_synthetic_wiki(db_path, articles=args.articles, paragraphs=args.paragraphs)
+
+        rng = random.Random(7)
+        queries = [" OR ".join(rng.sample(words, 3)) for _ in range(args.queries)]
+
+        conn = duckdb.connect(database=db_path, read_only=True)
+        conn.execute("LOAD fts;")
+        try:
+            # Warm the buffer pool so both strategies read from memory
+            single_phase(conn, queries[0])
+            for name, strategy in (("single-phase", single_phase), ("two-phase", two_phase)):
+                timings, returned = measure(strategy, conn, queries, args.runs)
+                timings.sort()
+                print(
+                    f"{name:>12}: mean {statistics.mean(timings):8.2f} ms  "
+                    f"p50 {timings[len(timings) // 2]:8.2f} ms  "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1]:8.2f} ms  "
+                    f"text returned per pass {returned / 1024:10.1f} KiB"
+                )
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import codecs
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from array import array
+from typing import Iterable, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for builds compressed by data/wiki/compress_articles.py
+    zstandard = None
+
+_MAGIC = b"WIKIZST1"
+# magic, rowid slots, dictionary size, 1 if the bodies are cleaned text
+_HEADER = struct.Struct("<8sQQQ")
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise RuntimeError("compressed article bodies need the zstandard package (pip install zstandard)")
+
+
+def train_dictionary(samples: Iterable[str], dict_size: int = 112640) -> bytes:
+    """Train a zstd dictionary on sample article texts; it mostly helps short articles."""
+    _require_zstandard()
+    return zstandard.train_dictionary(dict_size, [sample.encode("utf-8") for sample in samples]).as_bytes()
+
+
+def write_compressed_articles(
+    path: str,
+    entries: Iterable[Tuple[int, str]],
+    dictionary: bytes = b"",
+    level: int = 9,
+    cleaned: bool = True,
+) -> int:
+    """
+    Write article bodies as one zstd frame each.
+
+    Layout: header (magic, rowid slots, dictionary size, cleaned flag), the
+    dictionary, ``slots + 1`` frame offsets, ``slots`` character lengths (-1 for
+    rowids without an article), then the frames back to back. Integers use
+    native byte order, so the file is built on the machine that serves it.
+
+    Args:
+        path: Output path, replaced atomically
+        entries: ``(rowid, text)`` in ascending rowid order
+        dictionary: Optional trained dictionary shared by every frame
+        level: zstd compression level
+        cleaned: Whether ``text`` is already cleaned (``clean_text``) or raw article text
+
+    Returns:
+        Number of articles written
+    """
+    _require_zstandard()
+    dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+    compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+    offsets = array("q", [0])
+    lengths = array("q")
+    written = 0
+    with tempfile.TemporaryFile() as frames:
+        for rowid, text in entries:
+            if rowid < len(lengths):
+                raise ValueError(f"compressed article entries are not in rowid order: {rowid}")
+            while len(lengths) < rowid:
+                lengths.append(-1)
+                offsets.append(offsets[-1])
+            text = text or ""
+            frame = compressor.compress(text.encode("utf-8"))
+            frames.write(frame)
+            offsets.append(offsets[-1] + len(frame))
+            lengths.append(len(text))
+            written += 1
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(_HEADER.pack(_MAGIC, len(lengths), len(dictionary), int(cleaned)))
+            out.write(dictionary)
+            offsets.tofile(out)
+            lengths.tofile(out)
+            frames.seek(0)
+            shutil.copyfileobj(frames, out)
+    os.replace(tmp_path, path)
+    return written
+
+
+class CompressedArticles:
+    """
+    Memory-mapped zstd article bodies keyed by rowid.
+
+    Only the frame of a requested article is read and decompressed, and a
+    ``max_chars`` prefix stops decompressing once enough text is produced.
+    """
+
+    def __init__(self, path: str):
+        _require_zstandard()
+        with open(path, "rb") as bodies_file:
+            self._map = mmap.mmap(bodies_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, dict_size, cleaned = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a compressed article file")
+        start = _HEADER.size
+        dictionary = self._map[start:start + dict_size]
+        self._dict_data = zstandard.ZstdCompressionDict(dictionary) if dict_size else None
+        start += dict_size
+        view = memoryview(self._map)
+        self._offsets = view[start:start + (count + 1) * 8].cast("q")
+        start += (count + 1) * 8
+        self._lengths = view[start:start + count * 8].cast("q")
+        self._frames_start = start + count * 8
+        self._count = count
+        self.cleaned = bool(cleaned)
+        # ZstdDecompressor instances must not be shared between threads
+        self._local = threading.local()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _decompressor(self):
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = zstandard.ZstdDecompressor(dict_data=self._dict_data)
+            self._local.decompressor = decompressor
+        return decompressor
+
+    def length(self, rowid: int) -> Optional[int]:
+        """Character length of an article, or None when the rowid has no article."""
+        if not 0 <= rowid < self._count or self._lengths[rowid] < 0:
+            return None
+        return self._lengths[rowid]
+
+    def get(self, rowid: int, max_chars: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """
+        Decompress one article.
+
+        Returns:
+            ``(text, full_length)`` with ``text`` cut to ``max_chars``, or None when the rowid has no article
+        """
+        full_length = self.length(rowid)
+        if full_length is None:
+            return None
+        frame = self._map[self._frames_start + self._offsets[rowid]:self._frames_start + self._offsets[rowid + 1]]
+        if max_chars is None or max_chars >= full_length:
+            return self._decompressor().decompress(frame).decode("utf-8"), full_length
+
+        # Every character takes at least one byte, so reading the missing
+        # character count in bytes never decodes past max_chars
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        parts = []
+        chars = 0
+        with self._decompressor().stream_reader(frame) as reader:
+            while chars < max_chars:
+                chunk = reader.read(max_chars - chars)
+                if not chunk:
+                    break
+                text = decoder.decode(chunk)
+                parts.append(text)
+                chars += len(text)
+        return "".join(parts), full_length
@@ -0,0 +1,224 @@
+import hashlib
+import mmap
+import os
+import re
+import struct
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_MAGIC = b"WIKIVEC1"
+# magic, vectors, dimension, IVF lists, embedder spec length
+_HEADER = struct.Struct("<8sQQQQ")
+
+
+class HashingEmbedder:
+    """
+    Dependency-free embedder: signed feature hashing of lowercased words.
+
+    It only captures word overlap, so it is a baseline for testing the dense
+    path rather than a semantic model.
+    """
+
+    def __init__(self, dimension: str = "256"):
+        self.dimension = int(dimension or 256)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                digest = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+                vectors[i, digest % self.dimension] += 1.0 if digest >> 63 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model (the ``sentence-transformers`` package is imported on first use)."""
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", batch_size: int = 64):
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name or "sentence-transformers/all-MiniLM-L6-v2")
+        self._batch_size = batch_size
+        self.dimension = self._model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self._model.encode(
+            texts,
+            batch_size=self._batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        ).astype(np.float32)
+
+
+# Embedder kinds a spec may name. The service reads the spec from vectors.idx, so a
+# data file only selects among these; a new backend is added here, not imported by name.
+_EMBEDDERS = {
+    "sentence-transformers": SentenceTransformerEmbedder,
+    "hashing": HashingEmbedder,
+}
+
+
+def load_embedder(spec: str):
+    """
+    Create an embedder from ``kind:argument``: ``sentence-transformers:<model>`` or ``hashing:<dimension>``.
+
+    An embedder has a ``dimension`` and an ``embed(texts)`` method returning
+    L2-normalized float32 rows.
+    """
+    kind, _, argument = spec.partition(":")
+    if kind not in _EMBEDDERS:
+        raise ValueError(f"Unknown embedder {kind!r}; expected one of {', '.join(_EMBEDDERS)}")
+    return _EMBEDDERS[kind](argument)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+    """Index of the most similar centroid for every row."""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), batch_size):
+        chunk = np.asarray(vectors[start:start + batch_size], dtype=np.float32)
+        assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+def train_centroids(sample: np.ndarray, lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on normalized vectors; returns ``lists`` unit-length float32 centroids."""
+    sample = np.asarray(sample, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    lists = min(lists, len(sample))
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign_lists(sample, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=lists)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.add.reduceat(sample[order], starts, axis=0)
+        # reduceat yields the next row for empty lists; reseed those from random vectors
+        empty = counts == 0
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+def write_dense_index(
+    path: str,
+    rowids: np.ndarray,
+    vectors: np.ndarray,
+    centroids: np.ndarray,
+    embedder_spec: str,
+    chunk_size: int = 65536,
+) -> int:
+    """
+    Write an IVF index whose vectors are stored as float16, grouped by list.
+
+    Layout: header (magic, count, dimension, lists, spec length), the embedder
+    spec padded to 8 bytes, ``count`` article rowids, ``lists + 1`` list offsets,
+    the float32 centroids, then the float16 vectors. Vectors of one list are
+    contiguous, so a probe reads one slice of the file. Integers use native byte
+    order, so the file is built on the machine that serves it.
+
+    Args:
+        path: Output path, replaced atomically
+        rowids: Article rowid of every vector (an article may have several)
+        vectors: L2-normalized vectors, e.g. a float16 ``np.memmap``
+        centroids: Output of ``train_centroids``
+        embedder_spec: ``load_embedder`` spec the service embeds queries with
+
+    Returns:
+        Number of vectors written
+    """
+    count, dimension = vectors.shape
+    assignments = assign_lists(vectors, centroids, batch_size=chunk_size)
+    order = np.argsort(assignments, kind="stable")
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=len(centroids))))).astype(np.int64)
+    spec = embedder_spec.encode("utf-8")
+    spec += b"\0" * (-len(spec) % 8)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(_HEADER.pack(_MAGIC, count, dimension, len(centroids), len(spec)))
+        out.write(spec)
+        out.write(np.asarray(rowids, dtype=np.int64)[order].tobytes())
+        out.write(offsets.tobytes())
+        out.write(np.ascontiguousarray(centroids, dtype=np.float32).tobytes())
+        for start in range(0, count, chunk_size):
+            # Sorted indices keep reads from a memory-mapped input mostly sequential
+            picked = order[start:start + chunk_size]
+            sorted_picked = np.sort(picked)
+            block = np.asarray(vectors[sorted_picked], dtype=np.float16)
+            out.write(block[np.searchsorted(sorted_picked, picked)].tobytes())
+    os.replace(tmp_path, path)
+    return count
+
+
+class DenseIndex:
+    """
+    Memory-mapped IVF index over float16 article vectors.
+
+    A search scores the query against the centroids, then only the vectors of
+    the ``nprobe`` closest lists, so the pages touched per query stay small.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as index_file:
+            self._map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, dimension, lists, spec_length = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a dense vector index")
+        start = _HEADER.size
+        self.embedder_spec = self._map[start:start + spec_length].rstrip(b"\0").decode("utf-8")
+        start += spec_length
+        self._rowids = np.frombuffer(self._map, dtype=np.int64, count=count, offset=start)
+        start += count * 8
+        self._offsets = np.frombuffer(self._map, dtype=np.int64, count=lists + 1, offset=start)
+        start += (lists + 1) * 8
+        self._centroids = np.frombuffer(self._map, dtype=np.float32, count=lists * dimension, offset=start).reshape(lists, dimension)
+        start += lists * dimension * 4
+        self._vectors = np.frombuffer(self._map, dtype=np.float16, count=count * dimension, offset=start).reshape(count, dimension)
+        self.dimension = dimension
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def search(self, query: np.ndarray, k: int = 25, nprobe: int = 16) -> List[Tuple[int, float]]:
+        """``(rowid, cosine similarity)`` of the ``k`` best articles, best first; an article counts once."""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        centroid_scores = self._centroids @ query
+        nprobe = min(nprobe, len(centroid_scores))
+        probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        rowids = []
+        scores = []
+        for list_id in probed:
+            start, end = self._offsets[list_id], self._offsets[list_id + 1]
+            if start == end:
+                continue
+            # numpy has no fast float16 matmul, so each probed slice is widened first
+            scores.append(self._vectors[start:end].astype(np.float32) @ query)
+            rowids.append(self._rowids[start:end])
+        if not scores:
+            return []
+        rowids = np.concatenate(rowids)
+        scores = np.concatenate(scores)
+
+        best = {}
+        for i in np.argsort(-scores):
+            rowid = int(rowids[i])
+            if rowid not in best:
+                best[rowid] = float(scores[i])
+                if len(best) == k:
+                    break
+        return list(best.items())
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[int]], k: int = 60, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+    """Fuse ranked rowid lists: each list adds ``1 / (k + rank)`` per rowid (rank from 1); best first."""
+    fused = {}
+    for ranking in rankings:
+        for rank, rowid in enumerate(ranking, 1):
+            fused[rowid] = fused.get(rowid, 0.0) + 1.0 / (k + rank)
+    ranked = sorted(fused.items(), key=lambda item: -item[1])
+    return ranked[:limit] if limit is not None else ranked
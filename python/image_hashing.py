@@ -0,0 +1,27 @@
+from PIL import Image
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute a difference hash (dHash) of an image.
+
+    The image is reduced to a ``(hash_size + 1) x hash_size`` grayscale thumbnail and
+    each bit records whether a pixel is darker than its right-hand neighbour, so
+    re-encoded, rescaled or lightly edited copies of an image hash to nearby values.
+
+    Args:
+        image: The image to hash
+        hash_size: Number of bits per row/column (8 gives a 64-bit hash)
+
+    Returns:
+        The hash as an unsigned integer of ``hash_size * hash_size`` bits
+    """
+    thumbnail = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = thumbnail.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return value
+
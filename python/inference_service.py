@@ -4,7 +4,8 @@ import base64
 import io
 import subprocess
 import threading
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Literal, Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Query, Request
@@ -18,6 +19,8 @@ import logging
 import os
 
 import memory_storage_service
+from image_hashing import dhash
+from offline_wikipedia_service import prewarm_from_env as prewarm_wikipedia_from_env
 from streaming_inference_service import (
     cache_manager,
     describe_image,
@@ -30,6 +33,9 @@ logger = logging.getLogger("inference_service")
 
 app = FastAPI()
 
+# wiki.db is opened on the first search; WIKI_PREWARM=1 opens it in the background at startup instead
+prewarm_wikipedia_from_env()
+
 _STREAM_HEADERS = {
     "Cache-Control": "no-cache",
     "Connection": "keep-alive",
@@ -71,6 +77,38 @@ def get_memories_by_tag(tag_id: int = Query(..., description="Tag ID")):
     return {"memories": memories}
 
 
+@app.get("/api/query_memories/")
+def query_memories(
+    text: Optional[List[str]] = Query(None, description="Text terms (any may match)"),
+    tag_id: Optional[List[int]] = Query(None, description="Tag IDs"),
+    tag_match: Literal["any", "all"] = Query("any", description="Require any or all of the tag IDs"),
+    created_after: Optional[datetime] = Query(None, description="Inclusive lower bound on creation time"),
+    created_before: Optional[datetime] = Query(None, description="Exclusive upper bound on creation time"),
+    limit: int = Query(50, ge=1, le=500, description="Number of memories to fetch"),
+    offset: int = Query(0, ge=0, description="Number of memories to skip"),
+):
+    memories = memory_storage_service.query_memories(
+        text_terms=text,
+        tag_ids=tag_id,
+        tag_match=tag_match,
+        created_after=created_after,
+        created_before=created_before,
+        limit=limit,
+        offset=offset,
+    )
+    return {"memories": memories, "limit": limit, "offset": offset}
+
+
+@app.get("/api/similar_images/")
+def get_similar_images(
+    memory_id: int = Query(..., description="Memory ID of the reference image"),
+    max_distance: int = Query(10, ge=0, le=64, description="Maximum perceptual hash distance in bits"),
+    limit: int = Query(20, ge=1, le=100, description="Number of memories to fetch"),
+):
+    memories = memory_storage_service.get_similar_image_memories(memory_id, max_distance=max_distance, limit=limit)
+    return {"memories": memories}
+
+
 class SaveMemoryRequest(BaseModel):
     memory_text: Optional[str] = None
     memory_image_base64: Optional[str] = None
@@ -87,9 +125,32 @@ def _process_image_memory(base64_string: str, memory_text: Optional[str] = None,
     decoded_bytes = base64.b64decode(base64_string)
     image = Image.open(io.BytesIO(decoded_bytes))
     image = ImageOps.exif_transpose(image).convert("RGB")
-    image_description = describe_image(image, memory_text)
+    image_hash = dhash(image)
+
+    # The description depends on the memory text it was generated with, so only
+    # an image described with the same text is a candidate for reuse
+    image_prompt = memory_text or ""
+    image_description = None
+    max_distance = int(os.getenv("IMAGE_DEDUP_MAX_DISTANCE", "0"))
+    if max_distance >= 0:
+        matches = memory_storage_service.find_similar_images(
+            image_hash, max_distance=max_distance, limit=1, image_prompt=image_prompt
+        )
+        if matches and matches[0][2]:
+            logger.info("Reusing description of memory %s for near-identical image (distance %s)", matches[0][0], matches[0][1])
+            image_description = matches[0][2]
+    if image_description is None:
+        image_description = describe_image(image, memory_text)
+
     final_memory = f"{memory_text}\n\nImage: {image_description}" if memory_text else f"Image: {image_description}"
-    memory_storage_service.save_memory(final_memory, decoded_bytes, tag_ids=tags)
+    memory_storage_service.save_memory(
+        final_memory,
+        decoded_bytes,
+        tag_ids=tags,
+        image_hash=image_hash,
+        image_description=image_description,
+        image_prompt=image_prompt,
+    )
 
 
 @app.post("/api/save_memory/")
@@ -1,7 +1,11 @@
+import atexit
 import base64
 import duckdb
 import logging
-from threading import Lock
+import os
+import time
+from datetime import datetime
+from threading import Event, Lock, Thread
 
 db_path = '../data/memories.duckdb'
 
@@ -18,6 +22,7 @@ class _MemoriesStorageService:
                 cls._instance = super().__new__(cls)
             if not cls._initialized:
                 cls._instance._initialize_schema()
+                cls._instance._mirror = _MemoryMirror.from_env()
                 cls._initialized = True
         return cls._instance
     
@@ -25,43 +30,240 @@ class _MemoriesStorageService:
         conn = duckdb.connect(database=db_path, read_only=False)
         try:
             cursor = conn.cursor()
-            cursor.execute("""
-                CREATE SEQUENCE IF NOT EXISTS memories_id_seq START 1;
-            """)
-            cursor.execute("""
-                CREATE SEQUENCE IF NOT EXISTS tags_id_seq START 1;
-            """)
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS memories (
-                    id INTEGER DEFAULT nextval('memories_id_seq') PRIMARY KEY,
-                    memory TEXT,
-                    image BLOB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """)
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tags (
-                    id INTEGER DEFAULT nextval('tags_id_seq') PRIMARY KEY,
-                    label TEXT UNIQUE NOT NULL
-                );
-            """)
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS memory_tags (
-                    memory_id INTEGER,
-                    tag_id INTEGER,
-                    PRIMARY KEY (memory_id, tag_id),
-                    FOREIGN KEY (memory_id) REFERENCES memories(id),
-                    FOREIGN KEY (tag_id) REFERENCES tags(id)
-                );
-            """)
+            _create_schema(cursor)
+            _advance_sequences(cursor)
             conn.commit()
             cursor.close()
         finally:
             conn.close()
 
+_ID_SEQUENCES = {"memories": "memories_id_seq", "tags": "tags_id_seq"}
+
+def _advance_sequences(cursor):
+    """
+    Move each id sequence past its table's largest id.
+
+    Rows are inserted with explicit ids (see ``_next_id``); when the mirror drew
+    them, the on-disk sequence never advanced and would hand them out again.
+    """
+    # A freshly opened database reports the next value of each sequence as start_value
+    sequence_starts = dict(cursor.execute("""
+        SELECT sequence_name, start_value FROM duckdb_sequences() WHERE database_name = current_database();
+    """).fetchall())
+    for table, sequence in _ID_SEQUENCES.items():
+        max_id = cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table};").fetchone()[0]
+        behind = max_id + 1 - sequence_starts.get(sequence, 1)
+        if behind > 0:
+            cursor.execute(f"SELECT MAX(nextval('{sequence}')) FROM range(?);", (behind,))
+
+def _create_schema(cursor, memories_id_start=1, tags_id_start=1):
+    cursor.execute(f"""
+        CREATE SEQUENCE IF NOT EXISTS memories_id_seq START {int(memories_id_start)};
+    """)
+    cursor.execute(f"""
+        CREATE SEQUENCE IF NOT EXISTS tags_id_seq START {int(tags_id_start)};
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS memories (
+            id INTEGER DEFAULT nextval('memories_id_seq') PRIMARY KEY,
+            memory TEXT,
+            image BLOB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER DEFAULT nextval('tags_id_seq') PRIMARY KEY,
+            label TEXT UNIQUE NOT NULL
+        );
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS memory_tags (
+            memory_id INTEGER,
+            tag_id INTEGER,
+            PRIMARY KEY (memory_id, tag_id),
+            FOREIGN KEY (memory_id) REFERENCES memories(id),
+            FOREIGN KEY (tag_id) REFERENCES tags(id)
+        );
+    """)
+
+    cursor.execute("""
+        ALTER TABLE memories ADD COLUMN IF NOT EXISTS image_hash UBIGINT;
+    """)
+    cursor.execute("""
+        ALTER TABLE memories ADD COLUMN IF NOT EXISTS image_description TEXT;
+    """)
+    cursor.execute("""
+        ALTER TABLE memories ADD COLUMN IF NOT EXISTS image_prompt TEXT;
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS memories_created_at_idx ON memories (created_at);
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS memories_image_hash_idx ON memories (image_hash);
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS memory_tags_tag_id_idx ON memory_tags (tag_id);
+    """)
+
+class _MemoryMirror:
+    """
+    In-memory copy of the memory database that serves all reads.
+
+    Enabled with ``MEMORY_DB_MIRROR``:
+        - ``off`` (default): every query opens the on-disk database
+        - ``write-through``: writes hit the disk first, then the mirror
+        - ``write-behind``: writes hit the mirror and are replayed to disk every
+          ``MEMORY_DB_CHECKPOINT_SECONDS`` (and at exit)
+
+    The mirror assumes this process is the only writer of ``memories.duckdb``;
+    writes made by other processes are not visible until restart.
+    """
+
+    _TABLES = ("memories", "tags", "memory_tags")
+    _MODES = ("write-through", "write-behind")
+    # A write-behind statement that fails this many checkpoints in a row is set aside
+    _MAX_REPLAY_ATTEMPTS = 3
+
+    def __init__(self, mode, checkpoint_seconds):
+        self._mode = mode
+        self._checkpoint_seconds = checkpoint_seconds
+        self._connection = duckdb.connect(database=":memory:")
+        self._write_lock = Lock()
+        self._pending = []
+        self._replay_failures = 0
+        self.quarantined = []
+        self._stop = Event()
+        self._warm_up()
+        if mode == "write-behind":
+            Thread(target=self._checkpoint_loop, name="memory-mirror-checkpoint", daemon=True).start()
+            atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls):
+        mode = os.getenv("MEMORY_DB_MIRROR", "off").strip().lower()
+        if mode in ("", "0", "off"):
+            return None
+        if mode not in cls._MODES:
+            logger.warning("Unknown MEMORY_DB_MIRROR mode %r, mirror disabled", mode)
+            return None
+        checkpoint_seconds = float(os.getenv("MEMORY_DB_CHECKPOINT_SECONDS", "30"))
+        return cls(mode, checkpoint_seconds)
+
+    def _warm_up(self):
+        started = time.perf_counter()
+        cursor = self._connection.cursor()
+        try:
+            escaped_path = db_path.replace("'", "''")
+            cursor.execute(f"ATTACH '{escaped_path}' AS disk (READ_ONLY)")
+            try:
+                # A freshly opened database reports the next value of each sequence as start_value
+                sequence_starts = dict(cursor.execute("""
+                    SELECT sequence_name, start_value FROM duckdb_sequences() WHERE database_name = 'disk';
+                """).fetchall())
+                max_ids = cursor.execute("""
+                    SELECT
+                        (SELECT COALESCE(MAX(id), 0) FROM disk.main.memories),
+                        (SELECT COALESCE(MAX(id), 0) FROM disk.main.tags);
+                """).fetchone()
+                _create_schema(
+                    cursor,
+                    memories_id_start=max(sequence_starts.get("memories_id_seq", 1), max_ids[0] + 1),
+                    tags_id_start=max(sequence_starts.get("tags_id_seq", 1), max_ids[1] + 1),
+                )
+                row_counts = {}
+                for table in self._TABLES:
+                    cursor.execute(f"INSERT INTO memory.main.{table} SELECT * FROM disk.main.{table};")
+                    row_counts[table] = cursor.execute(f"SELECT COUNT(*) FROM memory.main.{table};").fetchone()[0]
+            finally:
+                cursor.execute("DETACH disk")
+            mirror_size = cursor.execute("""
+                SELECT memory_usage FROM pragma_database_size() WHERE database_name = 'memory';
+            """).fetchone()[0]
+        finally:
+            cursor.close()
+
+        logger.info(
+            "Memory mirror (%s) warmed up in %.1f ms: %s rows, %s in memory",
+            self._mode,
+            (time.perf_counter() - started) * 1000,
+            ", ".join(f"{table}={count}" for table, count in row_counts.items()),
+            mirror_size,
+        )
+
+    def execute(self, query, params=(), fetch=False):
+        if _is_read_query(query):
+            return self._execute_local(query, params, fetch)
+
+        with self._write_lock:
+            if self._mode == "write-through":
+                results = _execute_on_disk(query, params, fetch)
+                try:
+                    self._execute_local(query, params, fetch)
+                except Exception:
+                    logger.exception("Memory mirror diverged from disk after write-through")
+                return results
+            results = self._execute_local(query, params, fetch)
+            self._pending.append((query, params))
+            return results
+
+    def _execute_local(self, query, params, fetch):
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall() if fetch else None
+        finally:
+            cursor.close()
+
+    def checkpoint(self):
+        with self._write_lock:
+            if not self._pending:
+                return
+            started = time.perf_counter()
+            flushed = 0
+            # Statements are replayed one by one, as DuckDB rejects deleting a
+            # parent row in the same transaction that deleted its children
+            while self._pending:
+                query, params = self._pending[0]
+                try:
+                    _execute_on_disk(query, params)
+                except Exception:
+                    self._replay_failures += 1
+                    if self._replay_failures < self._MAX_REPLAY_ATTEMPTS:
+                        raise
+                    # Retrying forever would hold back every later write; keep it for inspection instead
+                    logger.exception(
+                        "Memory mirror write failed %s times on disk, dropping it from the replay: %s %r",
+                        self._replay_failures,
+                        " ".join(query.split()),
+                        params,
+                    )
+                    self.quarantined.append((query, params))
+                else:
+                    flushed += 1
+                self._pending.pop(0)
+                self._replay_failures = 0
+        logger.info(
+            "Memory mirror checkpoint flushed %s writes in %.1f ms",
+            flushed,
+            (time.perf_counter() - started) * 1000,
+        )
+
+    def _checkpoint_loop(self):
+        while not self._stop.wait(self._checkpoint_seconds):
+            try:
+                self.checkpoint()
+            except Exception:
+                logger.exception("Memory mirror checkpoint failed, will retry")
+
+    def close(self):
+        self._stop.set()
+        self.checkpoint()
+
 def process_memory_rows(rows):
     processed_rows = []
     for memory_row in rows:
@@ -90,8 +292,17 @@ def process_memory_rows(rows):
     
     return processed_rows
 
+def _is_read_query(query):
+    keyword = query.lstrip().split(None, 1)[0].upper()
+    return keyword in ("SELECT", "WITH")
+
 def _execute_query(query, params=(), fetch=False):
-    _MemoriesStorageService()  # Ensure schema is initialized
+    service = _MemoriesStorageService()  # Ensure schema is initialized
+    if service._mirror is not None:
+        return service._mirror.execute(query, params, fetch)
+    return _execute_on_disk(query, params, fetch)
+
+def _execute_on_disk(query, params=(), fetch=False):
     conn = duckdb.connect(database=db_path, read_only=False)
     try:
         cursor = conn.cursor()
@@ -103,15 +314,23 @@ def _execute_query(query, params=(), fetch=False):
     finally:
         conn.close()
 
-def save_memory(memory, media = None, tag_ids = None):
-    rows = _execute_query("""
-        INSERT INTO memories (memory, image) VALUES (?, ?) RETURNING id;
-    """, (memory, media), fetch=True)
-    
-    if not rows:
-        return
+def _next_id(table):
+    """
+    Draw the id of a new row from its sequence.
+
+    Inserts then bind the id explicitly, so a write replayed from the memory
+    mirror gets the same id on disk even if the two sequences drifted (a failed
+    insert still consumes a sequence value).
+    """
+    return _execute_query(f"SELECT nextval('{_ID_SEQUENCES[table]}');", fetch=True)[0][0]
 
-    memory_id = rows[0][0]
+def save_memory(memory, media = None, tag_ids = None, image_hash = None, image_description = None, image_prompt = None):
+    memory_id = _next_id("memories")
+    # created_at is bound here so a replayed write-behind insert keeps its original timestamp
+    _execute_query("""
+        INSERT INTO memories (id, memory, image, created_at, image_hash, image_description, image_prompt)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+    """, (memory_id, memory, media, datetime.now(), image_hash, image_description, image_prompt))
     
     if tag_ids:
         for tag_id in tag_ids:
@@ -135,11 +354,11 @@ def delete_memory(memory_id):
 
 def add_tag(label):
     try:
-        rows = _execute_query("""
-            INSERT INTO tags (label) VALUES (?) RETURNING id;
-        """, (label,), fetch=True)
-        if rows:
-            return rows[0][0]
+        tag_id = _next_id("tags")
+        _execute_query("""
+            INSERT INTO tags (id, label) VALUES (?, ?);
+        """, (tag_id, label))
+        return tag_id
     except Exception:
         try:
             rows = _execute_query("""
@@ -250,6 +469,168 @@ def get_memories_by_tag_id(tag_id):
     
     return process_memory_rows(rows)
 
+def query_memories(
+    text_terms=None,
+    tag_ids=None,
+    tag_match="any",
+    created_after=None,
+    created_before=None,
+    limit=50,
+    offset=0,
+):
+    """
+    Filter memories by text, tags and creation time in a single query.
+
+    Args:
+        text_terms: Terms matched (case-insensitively, any of them) against memory text and tag labels
+        tag_ids: Tag IDs the memory must carry
+        tag_match: "any" to require at least one of ``tag_ids``, "all" to require every one of them
+        created_after: Inclusive lower bound on ``created_at``
+        created_before: Exclusive upper bound on ``created_at``
+        limit: Maximum number of memories to return
+        offset: Number of matching memories to skip, newest first
+
+    Returns:
+        Processed memory rows ``(id, memory, image, created_at, tags)``
+    """
+    if isinstance(text_terms, str):
+        text_terms = [text_terms]
+    if tag_match not in ("any", "all"):
+        raise ValueError("tag_match must be 'any' or 'all'")
+
+    where_clauses = []
+    params = []
+
+    text_terms = [t for t in (text_terms or []) if t and t.strip()]
+    if text_terms:
+        term_clauses = []
+        for term in text_terms:
+            term_clauses.append("""(
+                LOWER(m.memory) LIKE CONCAT('%', LOWER(?), '%')
+                OR EXISTS (
+                    SELECT 1 FROM memory_tags mt
+                    JOIN tags t ON mt.tag_id = t.id
+                    WHERE mt.memory_id = m.id AND LOWER(t.label) LIKE CONCAT('%', LOWER(?), '%')
+                )
+            )""")
+            params.append(term)
+            params.append(term)
+        where_clauses.append("(" + " OR ".join(term_clauses) + ")")
+
+    tag_ids = list(dict.fromkeys(tag_ids or []))
+    if tag_ids:
+        placeholders = ", ".join("?" for _ in tag_ids)
+        if tag_match == "all":
+            where_clauses.append(f"""m.id IN (
+                SELECT memory_id FROM memory_tags
+                WHERE tag_id IN ({placeholders})
+                GROUP BY memory_id
+                HAVING COUNT(DISTINCT tag_id) = ?
+            )""")
+            params.extend(tag_ids)
+            params.append(len(tag_ids))
+        else:
+            where_clauses.append(f"m.id IN (SELECT memory_id FROM memory_tags WHERE tag_id IN ({placeholders}))")
+            params.extend(tag_ids)
+
+    if created_after is not None:
+        where_clauses.append("m.created_at >= ?")
+        params.append(created_after)
+    if created_before is not None:
+        where_clauses.append("m.created_at < ?")
+        params.append(created_before)
+
+    where_sql = " AND ".join(where_clauses) if where_clauses else "TRUE"
+    params.append(limit)
+    params.append(offset)
+
+    query = f"""
+        WITH matches AS (
+            SELECT m.id, m.memory, m.image, m.created_at
+            FROM memories m
+            WHERE {where_sql}
+            ORDER BY m.created_at DESC, m.id DESC
+            LIMIT ? OFFSET ?
+        )
+        SELECT 
+            m.id, 
+            m.memory, 
+            m.image, 
+            m.created_at,
+            list(t.label) FILTER (t.label IS NOT NULL) as tags
+        FROM matches m
+        LEFT JOIN memory_tags mt ON m.id = mt.memory_id
+        LEFT JOIN tags t ON mt.tag_id = t.id
+        GROUP BY m.id, m.memory, m.image, m.created_at
+        ORDER BY m.created_at DESC, m.id DESC;
+    """
+
+    rows = _execute_query(query, tuple(params), fetch=True)
+    return process_memory_rows(rows)
+
+def find_similar_images(image_hash, max_distance=10, limit=10, exclude_memory_id=None, image_prompt=None):
+    """
+    Find image memories whose perceptual hash is within ``max_distance`` bits of ``image_hash``.
+
+    With ``image_prompt``, only images that were described with that same prompt
+    context (the memory text sent along with the image) are returned.
+
+    Returns:
+        Rows ``(id, distance, image_description)`` ordered by distance, then newest first
+    """
+    prompt_filter = "AND image_prompt = ?" if image_prompt is not None else ""
+    prompt_params = (image_prompt,) if image_prompt is not None else ()
+    exact = _execute_query(f"""
+        SELECT id, 0 AS distance, image_description
+        FROM memories
+        WHERE image_hash = ? AND id IS DISTINCT FROM ? {prompt_filter}
+        ORDER BY created_at DESC
+        LIMIT ?;
+    """, (image_hash, exclude_memory_id, *prompt_params, limit), fetch=True)
+    if len(exact) >= limit or max_distance <= 0:
+        return exact
+
+    return _execute_query(f"""
+        SELECT id, bit_count(xor(image_hash, ?::UBIGINT)) AS distance, image_description
+        FROM memories
+        WHERE image_hash IS NOT NULL
+            AND id IS DISTINCT FROM ?
+            AND bit_count(xor(image_hash, ?::UBIGINT)) <= ?
+            {prompt_filter}
+        ORDER BY distance, created_at DESC
+        LIMIT ?;
+    """, (image_hash, exclude_memory_id, image_hash, max_distance, *prompt_params, limit), fetch=True)
+
+def get_similar_image_memories(memory_id, max_distance=10, limit=20):
+    rows = _execute_query("""
+        SELECT image_hash FROM memories WHERE id = ?;
+    """, (memory_id,), fetch=True)
+    if not rows or rows[0][0] is None:
+        return []
+
+    similar = find_similar_images(rows[0][0], max_distance=max_distance, limit=limit, exclude_memory_id=memory_id)
+    if not similar:
+        return []
+
+    distances = {similar_id: distance for similar_id, distance, _ in similar}
+    placeholders = ", ".join("?" for _ in distances)
+    rows = _execute_query(f"""
+        SELECT 
+            m.id, 
+            m.memory, 
+            m.image, 
+            m.created_at,
+            list(t.label) FILTER (t.label IS NOT NULL) as tags
+        FROM memories m
+        LEFT JOIN memory_tags mt ON m.id = mt.memory_id
+        LEFT JOIN tags t ON mt.tag_id = t.id
+        WHERE m.id IN ({placeholders})
+        GROUP BY m.id, m.memory, m.image, m.created_at;
+    """, tuple(distances), fetch=True)
+
+    rows.sort(key=lambda row: distances[row[0]])
+    return process_memory_rows(rows)
+
 def get_all_memories():
     return _execute_query("""
         SELECT 
@@ -1,215 +1,982 @@
 import duckdb
+import heapq
 import logging
-import re
-import uuid
-from typing import List, Tuple
-from tools.tool_definitions import get_full_topic_details_tool_name
+import os
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock, Thread
+from typing import Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple
+from compressed_articles import CompressedArticles
+from title_index import TitleIndex
+from tools.tool_definitions import get_full_topic_details_tool_name, perform_research_tool_name
+from wiki_text import build_snippet, compile_terms_pattern, remove_consecutive_short_lines
 
 logger = logging.getLogger("offline_wikipedia")
 
+class _ReaderPool:
+    """
+    Fixed set of read-only cursors on one DuckDB database, shared across threads.
+
+    Each cursor is its own DuckDB connection, so queries checked out by different
+    threads (e.g. parallel subagents) run concurrently on DuckDB's shared worker
+    pool instead of contending for one connection. ``threads`` caps the workers
+    of that pool; DuckDB applies it per database, not per query.
+    """
+
+    def __init__(self, db_path: str, size: int, threads: Optional[int] = None):
+        config = {"threads": threads} if threads else {}
+        self._connection = duckdb.connect(database=db_path, read_only=True, config=config)
+        self._size = max(1, size)
+        self._idle: "queue.Queue[duckdb.DuckDBPyConnection]" = queue.Queue()
+        for _ in range(self._size):
+            self._idle.put(self._connection.cursor())
+        self._closed = False
+        self._stats_lock = Lock()
+        self._queries = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._total_query_seconds = 0.0
+
+    @contextmanager
+    def cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        requested = time.perf_counter()
+        cursor = self._idle.get()
+        if self._closed:
+            self._idle.put(cursor)
+            raise RuntimeError("Offline Wikipedia was reopened after a rebuild; retry the call")
+        acquired = time.perf_counter()
+        waited = acquired - requested
+        with self._stats_lock:
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._total_wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        try:
+            yield cursor
+        finally:
+            elapsed = time.perf_counter() - acquired
+            self._idle.put(cursor)
+            with self._stats_lock:
+                self._in_use -= 1
+                self._queries += 1
+                self._total_query_seconds += elapsed
+
+    def close(self) -> None:
+        """Close the database once every checked-out cursor is back; later checkouts raise."""
+        self._closed = True
+        cursors = [self._idle.get() for _ in range(self._size)]
+        for cursor in cursors:
+            cursor.close()
+        self._connection.close()
+        # Returned closed, so checkouts waiting on the queue wake up and raise
+        for cursor in cursors:
+            self._idle.put(cursor)
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            queries = self._queries
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "queries": queries,
+                "avg_wait_ms": self._total_wait_seconds / queries * 1000 if queries else 0.0,
+                "max_wait_ms": self._max_wait_seconds * 1000,
+                "avg_query_ms": self._total_query_seconds / queries * 1000 if queries else 0.0,
+            }
+
+class _SearchResultCache:
+    """
+    Bounded LRU cache of rendered search results with a TTL.
+
+    It lives as long as its service; a rebuilt wiki.db gets a new service (see
+    ``_LazyOfflineWikipediaService``), so cached topic IDs never outlive their build.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, str]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        if self._max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self._ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: str) -> None:
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class ArticlePage(NamedTuple):
+    title: str
+    text: str
+    offset: int
+    full_length: int
+    # Token that reads the next page (``topic_id:offset``), or None on the last page
+    continuation: Optional[str]
+
+
 class _OfflineWikipediaService:
+    _TOPIC_ID_DIGITS = "0123456789abcdefghijklmnopqrstuv"
+    # Search snippets are capped at 800 characters, so matches far into an
+    # article never reach the result; only this much text is read per hit.
+    _SNIPPET_WINDOW_CHARS = 20000
+    # Title hits are placed ahead of BM25 results, so keep them from crowding it out
+    _MAX_TITLE_MATCHES = 5
+    _MIN_PREFIX_CHARS = 4
+    _MAX_DISAMBIGUATION_TARGETS = 5
+    # fulltext_search_many runs at most this many searches per call
+    _MAX_BATCH_QUERIES = 5
+    # lookup_facts answers for at most this many subjects, with at most this many facts each
+    _MAX_FACT_SUBJECTS = 5
+    _MAX_FACTS_PER_SUBJECT = 40
+
     def __init__(self):
-        self._db_path = "../data/wiki/wiki.db"
-        self._connection = duckdb.connect(database=self._db_path, read_only=True)
-        self._id_to_title = {}
-        self._title_to_id = {}
-        
+        # Directory with wiki.db and the files built next to it by data/wiki/
+        data_dir = os.getenv("WIKI_DATA_DIR", "../data/wiki")
+        # WIKI_SHARDS=N serves the shards built by data/wiki/shard_wiki.py instead of wiki.db;
+        # shard i holds the articles whose topic ID (source_rowid) is i modulo N.
+        shards = int(os.getenv("WIKI_SHARDS", "0"))
+        if shards > 0:
+            self._db_paths = [os.path.join(data_dir, "shards", f"wiki-{i:02d}.db") for i in range(shards)]
+            self._id_column = "source_rowid"
+        else:
+            self._db_paths = [os.path.join(data_dir, "wiki.db")]
+            self._id_column = "rowid"
+        # Every file the service reads; when one is replaced (update_wiki.sh swaps in a rebuilt
+        # wiki.db) the lazy wrapper opens a new service rather than serve the replaced files
+        self._data_paths = self._db_paths + [
+            os.path.join(data_dir, name) for name in ("titles.idx", "vectors.idx", "articles.zst")
+        ]
+        self._data_signature = self.data_signature(self._data_paths)
+        threads = os.getenv("WIKI_DUCKDB_THREADS")
+        pool_size = int(os.getenv("WIKI_READER_POOL_SIZE", "4"))
+        self._pools = [
+            _ReaderPool(db_path, size=pool_size, threads=int(threads) if threads else None)
+            for db_path in self._db_paths
+        ]
+        # Batched searches run concurrently, one per pooled cursor; kept apart from the
+        # shard executor so a search never waits on its own shard fan-out
+        self._query_executor = ThreadPoolExecutor(max_workers=max(1, pool_size), thread_name_prefix="wiki-query")
+        # Shard queries fan out on this executor; WIKI_SHARD_FANOUT caps how many run at once
+        self._shard_executor = None
+        if len(self._pools) > 1:
+            fanout = int(os.getenv("WIKI_SHARD_FANOUT", str(len(self._pools))))
+            self._shard_executor = ThreadPoolExecutor(max_workers=max(1, fanout), thread_name_prefix="wiki-shard")
+        # Builds that ran data/wiki/clean_articles.py store pre-cleaned text
+        self._text_column = "clean_text" if self._has_column("articles", "clean_text") else "text"
+        # Built by data/wiki/compress_articles.py, which clears the text columns of wiki.db;
+        # article text is then decompressed from it on fetch (needs the zstandard package)
+        self._bodies = None
+        bodies_path = os.path.join(data_dir, "articles.zst")
+        if os.path.exists(bodies_path):
+            self._bodies = CompressedArticles(bodies_path)
+        self._precleaned = self._bodies.cleaned if self._bodies is not None else self._text_column == "clean_text"
+        # Builds that ran data/wiki/extract_leads.py store each article's lead and summary;
+        # WIKI_FAST_SEARCH=1 then builds snippets from them instead of the article text
+        self._has_leads = self._has_column("articles", "lead")
+        self._fast_search = os.getenv("WIKI_FAST_SEARCH", "0") == "1"
+        # In fast mode, hits whose lead never mentions a search word still read a text
+        # window for match context unless WIKI_FAST_SEARCH_MATCH_WINDOWS=0
+        self._fast_match_windows = os.getenv("WIKI_FAST_SEARCH_MATCH_WINDOWS", "1") == "1"
+        # Builds that ran data/wiki/chunk_articles.py can serve single sections
+        self._has_sections = self._has_column("sections", "section_id")
+        # Loaded by data/wiki/link_tables.py; used to expand search terms
+        self._has_link_tables = (
+            self._has_column("redirects", "title_key") and self._has_column("disambiguations", "title_key")
+        )
+        # Loaded by data/wiki/load_facts.py; serves lookup_facts
+        self._has_facts = self._has_column("facts", "title_key")
+        # Built by data/wiki/build_title_index.py; without it searches use BM25 only
+        self._title_index = None
+        title_index_path = os.path.join(data_dir, "titles.idx")
+        if os.path.exists(title_index_path):
+            self._title_index = TitleIndex(title_index_path)
+        # Built by data/wiki/embed_articles.py; searches then fuse BM25 with the nearest
+        # articles by embedding. The embedder named in the index is loaded on first use.
+        self._dense_index = None
+        self._embedder = None
+        self._embedder_lock = Lock()
+        self._dense_nprobe = int(os.getenv("WIKI_DENSE_NPROBE", "16"))
+        dense_index_path = os.path.join(data_dir, "vectors.idx")
+        if os.path.exists(dense_index_path):
+            # Imported here so numpy is only loaded when there is a vectors.idx to search
+            from dense_index import DenseIndex
+            self._dense_index = DenseIndex(dense_index_path)
+        self._search_cache = _SearchResultCache(
+            max_entries=int(os.getenv("WIKI_SEARCH_CACHE_SIZE", "256")),
+            ttl_seconds=float(os.getenv("WIKI_SEARCH_CACHE_TTL_SECONDS", "3600")),
+        )
+
     @staticmethod
-    def merge_intervals(intervals: List[Tuple[int, int]], gap: int = 0) -> List[Tuple[int, int]]:
-        if not intervals:
-            return []
-        intervals = sorted(intervals, key=lambda x: x[0])
-        merged = [intervals[0]]
-        for start, end in intervals[1:]:
-            prev_start, prev_end = merged[-1]
-            if start <= prev_end + gap:
-                merged[-1] = (prev_start, max(prev_end, end))
+    def data_signature(paths: List[str]) -> Tuple[Optional[Tuple[int, int]], ...]:
+        """``(mtime, size)`` of each path, or None for a missing one."""
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                signature.append(None)
             else:
-                merged.append((start, end))
-        return merged
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
 
-    def remove_consecutive_short_lines(self, text: str, max_line_length: int = 100, min_consecutive: int = 3) -> str:
+    def data_changed(self) -> bool:
+        """Whether any file the service was opened from has been replaced, changed, added or removed since."""
+        return self.data_signature(self._data_paths) != self._data_signature
+
+    def close(self) -> None:
+        for pool in self._pools:
+            pool.close()
+        self._query_executor.shutdown(wait=False)
+        if self._shard_executor is not None:
+            self._shard_executor.shutdown(wait=False)
+
+    def _has_column(self, table: str, column: str) -> bool:
+        with self._pools[0].cursor() as cursor:
+            return cursor.execute("""
+                SELECT COUNT(*) FROM duckdb_columns() WHERE table_name = ? AND column_name = ?
+            """, [table, column]).fetchone()[0] > 0
+
+    @classmethod
+    def encode_topic_id(cls, rowid: int) -> str:
+        """Encode an article rowid as a compact base32 topic ID (stable for a given wiki.db build)."""
+        digits = []
+        while True:
+            rowid, remainder = divmod(rowid, 32)
+            digits.append(cls._TOPIC_ID_DIGITS[remainder])
+            if rowid == 0:
+                return "".join(reversed(digits))
+
+    @staticmethod
+    def decode_topic_id(topic_id: str) -> Optional[int]:
+        try:
+            return int(topic_id.strip().lower(), 32)
+        except (AttributeError, ValueError):
+            return None
+
+    @classmethod
+    def encode_continuation(cls, rowid: int, offset: int) -> str:
+        """Continuation token that resumes reading an article at a character offset of its cleaned text."""
+        return f"{cls.encode_topic_id(rowid)}:{offset}"
+
+    @classmethod
+    def decode_topic_reference(cls, reference: str) -> Tuple[Optional[int], Optional[int]]:
         """
-        Remove consecutive blocks of short lines that are likely noise.
-        
-        Args:
-            text: The input text to clean
-            max_line_length: Maximum length of a line to be considered "short"
-            min_consecutive: Minimum number of consecutive short lines to trigger removal
-            
-        Returns:
-            Cleaned text with consecutive short line blocks removed
-        """
-        lines = text.split('\n')
-        if len(lines) < min_consecutive:
-            return text
-            
-        # Track which lines to keep
-        keep_lines = [True] * len(lines)
-        
-        # Find consecutive blocks of short lines
-        i = 0
-        while i < len(lines):
-            # Check if current line is short
-            if len(lines[i].strip()) < max_line_length:
-                # Count consecutive short lines
-                consecutive_count = 0
-                j = i
-                while j < len(lines) and len(lines[j].strip()) < max_line_length:
-                    consecutive_count += 1
-                    j += 1
-                
-                # If we have enough consecutive short lines, mark them for removal
-                if consecutive_count >= min_consecutive:
-                    for k in range(i, j):
-                        keep_lines[k] = False
-                    i = j
-                else:
-                    i += 1
-            else:
-                i += 1
-        
-        # Filter out the lines marked for removal
-        filtered_lines = [line for line, keep in zip(lines, keep_lines) if keep]
-        
-        # Clean up multiple consecutive empty lines
-        result_lines = []
-        prev_empty = False
-        for line in filtered_lines:
-            is_empty = len(line.strip()) == 0
-            if not (is_empty and prev_empty):  # Skip if both current and previous are empty
-                result_lines.append(line)
-            prev_empty = is_empty
-        
-        return '\n'.join(result_lines)
+        Split a topic ID or continuation token into ``(rowid, offset)``.
 
-    def extract_contexts(self, text: str, term: str, ctx: int = 50) -> List[str]:
-        lower_text = text.lower()
-        spans: List[Tuple[int, int]] = [(0, min(len(text), 400))]
-        for word in term.split():
-            lw = word.lower()
-            for m in re.finditer(re.escape(lw), lower_text):
-                spans.append((m.start(), m.end()))
+        The offset is None for a plain topic ID; the rowid is None when the reference is invalid.
+        """
+        topic_id, separator, offset = str(reference).partition(":")
+        rowid = cls.decode_topic_id(topic_id)
+        if not separator:
+            return rowid, None
+        try:
+            start = int(offset)
+        except ValueError:
+            return None, None
+        return (rowid, start) if start >= 0 else (None, None)
 
-        if not spans:
-            return []
+    def remove_consecutive_short_lines(self, text: str, max_line_length: int = 100, min_consecutive: int = 3) -> str:
+        return remove_consecutive_short_lines(text, max_line_length, min_consecutive)
 
-        merged = self.merge_intervals(spans, gap=ctx)
-        snippets: List[str] = []
-        full_len = len(text)
-
-        for start, end in merged:
-            cs = max(0, start - ctx)
-            ce = min(full_len, end + ctx)
-            snippet = text[cs:ce].strip()
-            if cs > 0:
-                snippet = "… " + snippet
-            if ce < full_len:
-                snippet += " …"
-            snippets.append(snippet)
-
-        return snippets
-        
-    def fulltext_search(self, terms):
+    def search_cache_stats(self) -> Dict[str, float]:
+        return self._search_cache.stats()
+
+    def reader_pool_stats(self) -> List[Dict[str, float]]:
+        """Per-database reader pool statistics (one entry per shard, or one for wiki.db)."""
+        return [pool.stats() for pool in self._pools]
+
+    def _scatter(self, fn, items):
+        """Run ``fn`` over ``items`` on the shard executor, or inline when there is nothing to fan out."""
+        if self._shard_executor is None or len(items) <= 1:
+            return [fn(item) for item in items]
+        return list(self._shard_executor.map(fn, items))
+
+    def _use_fast_search(self, fast: Optional[bool]) -> bool:
+        """Whether a search builds snippets from precomputed leads (``fast=None`` follows WIKI_FAST_SEARCH)."""
+        return self._has_leads and (self._fast_search if fast is None else fast)
+
+    def fulltext_search(self, terms, fast: Optional[bool] = None):
+        """
+        Search articles and render the top hits with snippets.
+
+        With ``fast`` (default: WIKI_FAST_SEARCH) snippets come from the leads
+        precomputed by data/wiki/extract_leads.py, so most searches never read
+        article text; it has no effect on builds without leads.
+        """
         search_terms = [t.strip() for t in terms[:5] if t.strip()]
         if not search_terms:
             return ""
+        fast = self._use_fast_search(fast)
 
-        # Combine terms with OR for DuckDB FTS
-        fts_query = " OR ".join(search_terms)
-        
-        query = """
-        SELECT
-            title,
-            text,
-            fts_main_articles.match_bm25(rowid, ?) AS score
-        FROM articles
-        WHERE score IS NOT NULL
-        ORDER BY score DESC
-        LIMIT 25;
+        # Results do not depend on term order or case, so reordered repeats share an entry
+        cache_key = (fast, *sorted({" ".join(t.lower().split()) for t in search_terms}))
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = self._render_search(search_terms, fast=fast)
+        self._search_cache.put(cache_key, result)
+        return result
+
+    def expand_terms(self, search_terms: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Look search terms up in the redirect and disambiguation tables.
+
+        Returns:
+            ``(redirect_targets, disambiguation_targets)``: titles of the articles that
+            terms redirect to, and the first articles listed on disambiguation pages
+            named by a term
+        """
+        if not self._has_link_tables:
+            return [], []
+        keys = list(dict.fromkeys(" ".join(term.split()) for term in search_terms))
+        placeholders = ", ".join("lower(?)" for _ in keys)
+        with self._pools[0].cursor() as cursor:
+            redirect_targets = cursor.execute(f"""
+                SELECT DISTINCT target FROM redirects WHERE title_key IN ({placeholders}) ORDER BY target
+            """, keys).fetchall()
+            disambiguation_targets = cursor.execute(f"""
+                SELECT target FROM disambiguations
+                WHERE title_key IN ({placeholders}) AND position < ?
+                ORDER BY position, title_key
+            """, [*keys, self._MAX_DISAMBIGUATION_TARGETS]).fetchall()
+        return (
+            [target for target, in redirect_targets],
+            list(dict.fromkeys(target for target, in disambiguation_targets)),
+        )
+
+    def match_titles(self, search_terms: List[str], extra_titles: Optional[List[str]] = None) -> List[int]:
+        """
+        Return rowids of articles whose title (or a redirect to it) matches a search term.
+
+        Exact matches of every term come first, then ``extra_titles`` (e.g.
+        disambiguation targets), then the shortest titles starting with a term;
+        at most ``_MAX_TITLE_MATCHES`` rowids are returned.
         """
+        if self._title_index is None:
+            return []
+        rowids = []
+        for term in search_terms:
+            rowids.extend(self._title_index.exact(term))
+        for title in extra_titles or []:
+            rowids.extend(self._title_index.exact(title))
+        for term in search_terms:
+            if len(term) >= self._MIN_PREFIX_CHARS:
+                rowids.extend(self._title_index.prefix(term, limit=self._MAX_TITLE_MATCHES))
+        return list(dict.fromkeys(rowids))[:self._MAX_TITLE_MATCHES]
+
+    def _query_embedder(self):
+        """The embedder vectors.idx was built with, or None (BM25 only) when it is missing or cannot load."""
+        with self._embedder_lock:
+            if self._embedder is None and self._dense_index is not None:
+                spec = self._dense_index.embedder_spec
+                try:
+                    from dense_index import load_embedder
+                    embedder = load_embedder(spec)
+                    if embedder.dimension != self._dense_index.dimension:
+                        raise ValueError(f"embedder has {embedder.dimension} dimensions, vectors.idx has {self._dense_index.dimension}")
+                    self._embedder = embedder
+                except Exception:
+                    logger.warning("Cannot load embedder %r; searches use BM25 only", spec, exc_info=True)
+                    self._dense_index = None
+            return self._embedder
+
+    def dense_search(self, search_terms: List[str], limit: int = 25) -> List[int]:
+        """Rowids of the articles nearest to the search terms in vectors.idx, best first (empty without it)."""
+        embedder = self._query_embedder()
+        if embedder is None:
+            return []
+        query = embedder.embed([" ; ".join(search_terms)])[0]
+        return [rowid for rowid, _ in self._dense_index.search(query, k=limit, nprobe=self._dense_nprobe)]
+
+    def _search_hits(self, search_terms: List[str], fast: bool = False) -> List[Tuple[str, str, str]]:
+        """
+        Ranked ``(topic_id, title, snippet)`` hits for one search, best first (at most 25).
+
+        With ``fast``, snippets are the article summary followed by matches in the
+        precomputed lead; only hits whose lead never mentions a search word (and
+        that did not match by title) read a text window, unless match windows are off.
+        """
+        # A term that is a redirect ("JFK") also searches for the article it names;
+        # a term that names a disambiguation page brings in its listed articles instead of the page
+        redirect_targets, disambiguation_targets = self.expand_terms(search_terms)
+        expanded_terms = list(dict.fromkeys(search_terms + redirect_targets))
+
+        # Combine terms with OR for DuckDB FTS
+        fts_query = " OR ".join(expanded_terms)
         
-        cur = self._connection.cursor()
-        rows = cur.execute(query, [fts_query]).fetchall()
-        cur.close()
+        # Title lookups answer "Marie Curie"-style queries directly and go first
+        title_rowids = self.match_titles(search_terms, extra_titles=disambiguation_targets)
+
+        # Phase 1 scores against the FTS tables only; phase 2 pulls a bounded
+        # text window for the final top-k, so full article text is never
+        # materialized for candidates that are cut by the LIMIT.
+        scored = self.score_articles(fts_query, limit=25)
+        # With vectors.idx, BM25 and dense rankings are fused by reciprocal rank
+        dense_rowids = self.dense_search(expanded_terms)
+        if dense_rowids:
+            from dense_index import reciprocal_rank_fusion
+            scored = reciprocal_rank_fusion([[rowid for rowid, _ in scored], dense_rowids], limit=25)
+        candidates = [(rowid, None) for rowid in title_rowids] + scored
+        rowids = [rowid for rowid, _ in candidates]
+
+        # One alternation of every search word, matched in a single pass per article
+        context_pattern = compile_terms_pattern(expanded_terms)
 
-        all_results = []
+        leads = self.fetch_leads(rowids) if fast else {}
+        title_matched = set(title_rowids)
+        text_rowids = [
+            rowid for rowid in rowids
+            if rowid not in leads or (
+                self._fast_match_windows
+                and rowid not in title_matched
+                and (context_pattern is None or context_pattern.search(leads[rowid][1].lower()) is None)
+            )
+        ]
+        articles = self.fetch_articles(text_rowids, max_chars=self._SNIPPET_WINDOW_CHARS, exact=False)
+
+        hits = []
         seen = set()
-        match_no = 1
-        
-        # For context extraction, join all terms to find matches for any of them
-        context_query = " ".join(search_terms)
-
-        for title, text, score in rows:
-            if title not in self._title_to_id:
-                topic_id = str(uuid.uuid4())
-                self._title_to_id[title] = topic_id
-                self._id_to_title[topic_id] = title
+
+        for rowid, _ in candidates:
+            if rowid in articles:
+                title, cleaned_text, _ = articles[rowid]
+                snippet_source, lead_chars = cleaned_text, 400
+            elif rowid in leads:
+                title, lead, summary = leads[rowid]
+                snippet_source, lead_chars = lead, len(summary)
             else:
-                topic_id = self._title_to_id[title]
+                continue
+            topic_id = self.encode_topic_id(rowid)
 
-            if topic_id in seen:
+            # Builds that predate link_tables.py still index disambiguation pages as articles
+            if topic_id in seen or title.endswith("(disambiguation)"):
                 continue
             seen.add(topic_id)
 
+            best_context = build_snippet(snippet_source, context_pattern, ctx=50, lead_chars=lead_chars, max_chars=800)
+            hits.append((topic_id, title, best_context))
+
+        return hits[:25]
+
+    @staticmethod
+    def _render_hit(match_no: int, topic_id: str, title: str, snippet: str) -> str:
+        return (
+            f"# [{match_no}]: {title} ({topic_id})\n\n"
+            f"{snippet}\n\n"
+            "LLMs: Content is truncated. "
+            f"Use the `{get_full_topic_details_tool_name}(['{topic_id}'])` tool "
+            "to unlock full topic details."
+        )
+
+    def _render_search(self, search_terms: List[str], fast: bool = False) -> str:
+        hits = self._search_hits(search_terms, fast=fast)
+        return "\n\n---\n\n".join(self._render_hit(match_no, *hit) for match_no, hit in enumerate(hits, 1))
+
+    def fulltext_search_many(
+        self, term_sets: List[List[str]], limit_per_query: int = 10, fast: Optional[bool] = None
+    ) -> str:
+        """
+        Run several independent searches at once and render the results grouped per query.
+
+        Searches run concurrently on the reader pool. A topic is shown in full only
+        in the first group that ranks it; later groups list it by title and topic ID.
+
+        Args:
+            term_sets: Up to ``_MAX_BATCH_QUERIES`` lists of search terms, each searched like ``fulltext_search``
+            limit_per_query: Maximum topics shown in full per query
+            fast: Build snippets from precomputed leads, as in ``fulltext_search``
+
+        Returns:
+            The rendered groups, or an empty string when no query has terms
+        """
+        queries = [
+            [t.strip() for t in terms[:5] if isinstance(t, str) and t.strip()]
+            for terms in term_sets[:self._MAX_BATCH_QUERIES]
+        ]
+        queries = [terms for terms in queries if terms]
+        if not queries:
+            return ""
+        fast = self._use_fast_search(fast)
+        if len(queries) == 1:
+            hits_per_query = [self._search_hits(queries[0], fast=fast)]
+        else:
+            hits_per_query = list(self._query_executor.map(lambda terms: self._search_hits(terms, fast=fast), queries))
+
+        shown_in: Dict[str, int] = {}
+        groups = []
+        for number, (terms, hits) in enumerate(zip(queries, hits_per_query), 1):
+            rendered = []
+            repeated = []
+            for topic_id, title, snippet in hits:
+                if topic_id in shown_in:
+                    repeated.append(f"{title} ({topic_id}, query {shown_in[topic_id]})")
+                elif len(rendered) < limit_per_query:
+                    shown_in[topic_id] = number
+                    rendered.append(self._render_hit(len(rendered) + 1, topic_id, title, snippet))
+
+            parts = [f"## Query {number}: {', '.join(terms)}"]
+            parts.append("\n\n---\n\n".join(rendered) if rendered else "No new results for this query.")
+            if repeated:
+                parts.append("Also matches topics shown above: " + "; ".join(repeated))
+            groups.append("\n\n".join(parts))
+        return "\n\n===\n\n".join(groups)
+        
+    def score_articles(self, fts_query: str, limit: int = 25) -> List[Tuple[int, float]]:
+        """
+        Return ``(rowid, bm25 score)`` of the best matching articles, best first.
+
+        With shards, every shard returns its own top ``limit`` and the lists are
+        merged by score. Each shard's BM25 uses its own IDF and average document
+        length, so the scores are only comparable approximately and the merged
+        ranking can differ from what a single index over all articles would return.
+        """
+        id_column = self._id_column
+        query = f"""
+        SELECT {id_column}, score
+        FROM (
+            SELECT {id_column}, fts_main_articles.match_bm25({id_column}, ?) AS score
+            FROM articles
+        )
+        WHERE score IS NOT NULL
+        ORDER BY score DESC
+        LIMIT ?;
+        """
+
+        def score_shard(pool: _ReaderPool) -> List[Tuple[int, float]]:
+            with pool.cursor() as cursor:
+                return cursor.execute(query, [fts_query, limit]).fetchall()
+
+        shard_results = self._scatter(score_shard, self._pools)
+        if len(shard_results) == 1:
+            return shard_results[0]
+        return heapq.nlargest(limit, (row for rows in shard_results for row in rows), key=lambda row: row[1])
+
+    def fetch_articles(
+        self, rowids: List[int], max_chars: Optional[int] = None, offset: int = 0, exact: bool = True
+    ) -> Dict[int, Tuple[str, str, int]]:
+        """
+        Fetch several cleaned articles in one query.
+
+        Args:
+            rowids: Article rowids to fetch
+            max_chars: Optional limit on the number of characters of text pulled per article
+            offset: Character offset into the cleaned text where the returned text starts
+            exact: Read raw (not pre-cleaned) text whole, as pages need; False cleans
+                only the first ``offset + max_chars`` raw characters, which is enough for
+                a search window but leaves ``full_length`` the raw length
+
+        Offsets and ``full_length`` count characters of the cleaned article. Raw
+        text is read and cleaned whole for that: cleaning a prefix can keep a run of
+        short lines cut at its end, so it would not match the cleaned article.
+
+        Returns:
+            Mapping of rowid to ``(title, cleaned_text, full_length)`` for the rowids that exist
+        """
+        unique_rowids = list(dict.fromkeys(rowids))
+        if not unique_rowids:
+            return {}
+
+        by_shard: Dict[int, List[int]] = {}
+        for rowid in unique_rowids:
+            by_shard.setdefault(rowid % len(self._pools), []).append(rowid)
+
+        column = self._text_column
+        id_column = self._id_column
+        end = None if max_chars is None else offset + max_chars
+        # Pre-cleaned text is sliced in the query; raw text is cleaned first, so all of it (or its prefix) is read
+        raw_end = None if exact else end
+        sql_offset, sql_chars = (offset, max_chars) if self._precleaned else (0, raw_end)
+
+        def fetch_shard(shard_rowids: Tuple[int, List[int]]) -> list:
+            shard, shard_ids = shard_rowids
+            placeholders = ", ".join("?" for _ in shard_ids)
+            # Compacted builds (and incremental updates of them) keep empty rows where articles were deleted
+            if self._bodies is not None:
+                query = f"SELECT {id_column}, title FROM articles WHERE {id_column} IN ({placeholders}) AND title IS NOT NULL"
+                with self._pools[shard].cursor() as cursor:
+                    return cursor.execute(query, shard_ids).fetchall()
+            query = f"""
+                SELECT
+                    {id_column},
+                    title,
+                    CASE WHEN ? IS NULL THEN substr({column}, ? + 1) ELSE substr({column}, ? + 1, ?) END AS text,
+                    length({column}) AS full_length
+                FROM articles
+                WHERE {id_column} IN ({placeholders}) AND title IS NOT NULL
+            """
+            with self._pools[shard].cursor() as cursor:
+                return cursor.execute(query, [sql_chars, sql_offset, sql_offset, sql_chars, *shard_ids]).fetchall()
+
+        rows = [row for shard_rows in self._scatter(fetch_shard, list(by_shard.items())) for row in shard_rows]
+
+        if self._bodies is not None:
+            # Only the frames of the fetched articles are decompressed, and cleaned bodies only up to the end of the page
+            limit = end if self._precleaned else raw_end
+            decompressed = [(rowid, title, self._bodies.get(rowid, limit)) for rowid, title in rows]
+            rows = [(rowid, title, *body) for rowid, title, body in decompressed if body is not None]
+            sliced = False
+        else:
+            sliced = self._precleaned
+
+        if not self._precleaned:
             # Clean the text by removing consecutive short lines
-            cleaned_text = self.remove_consecutive_short_lines(text)
-            
-            contexts = self.extract_contexts(cleaned_text, context_query, ctx=50)
-            if not contexts:
-                best_context = cleaned_text
+            rows = [
+                (rowid, title, self.remove_consecutive_short_lines(text), full_length)
+                for rowid, title, text, full_length in rows
+            ]
+            if exact:
+                rows = [(rowid, title, text, len(text)) for rowid, title, text, _ in rows]
+        if not sliced:
+            rows = [(rowid, title, text[offset:end], full_length) for rowid, title, text, full_length in rows]
+        return {rowid: (title, text, full_length) for rowid, title, text, full_length in rows}
+
+    def fetch_leads(self, rowids: List[int]) -> Dict[int, Tuple[str, str, str]]:
+        """
+        Fetch the precomputed leads of several articles in one query per shard.
+
+        Returns:
+            Mapping of rowid to ``(title, lead, summary)`` for the rowids that exist and have a lead
+        """
+        unique_rowids = list(dict.fromkeys(rowids))
+        if not unique_rowids or not self._has_leads:
+            return {}
+
+        by_shard: Dict[int, List[int]] = {}
+        for rowid in unique_rowids:
+            by_shard.setdefault(rowid % len(self._pools), []).append(rowid)
+        id_column = self._id_column
+
+        def fetch_shard(shard_rowids: Tuple[int, List[int]]) -> list:
+            shard, shard_ids = shard_rowids
+            placeholders = ", ".join("?" for _ in shard_ids)
+            query = f"""
+                SELECT {id_column}, title, lead, summary
+                FROM articles
+                WHERE {id_column} IN ({placeholders}) AND title IS NOT NULL AND lead IS NOT NULL
+            """
+            with self._pools[shard].cursor() as cursor:
+                return cursor.execute(query, shard_ids).fetchall()
+
+        return {
+            rowid: (title, lead, summary or "")
+            for shard_rows in self._scatter(fetch_shard, list(by_shard.items()))
+            for rowid, title, lead, summary in shard_rows
+        }
+
+    def get_full_wikipedia_article(self, topic_ids, max_chars: Optional[int] = None, offset: int = 0):
+        """
+        Render articles in full, or one page of each when ``max_chars`` is set.
+
+        ``topic_ids`` may hold continuation tokens (``topic_id:offset``) from an
+        earlier page, which resume where that page ended; ``offset`` applies to
+        plain topic IDs. Pages that stop before the end of an article name the
+        token for the next page.
+        """
+        references = {}
+        for topic_id in topic_ids:
+            rowid, start = self.decode_topic_reference(topic_id)
+            if rowid is None:
+                logger.warning("Topic ID %r is not a valid topic ID", topic_id)
             else:
-                best_context = contexts[0]
-                for snippet in contexts[1:]:
-                    best_context = best_context.rstrip(" …")
-                    snippet = snippet.lstrip("… ")
-                    best_context = f"{best_context} … {snippet}"
-                    
-            if len(best_context) > 800:
-                logger.debug(
-                    "Truncating context for %s from %s to 800",
-                    title,
-                    len(best_context),
-                )
-                best_context = best_context[:800].rstrip() + " …"
-
-            all_results.append({
-                "content": (
-                    f"# [{match_no}]: {title} ({topic_id})\n\n"
-                    f"{best_context}\n\n"
-                    "LLMs: Content is truncated. "
-                    f"Use the `{get_full_topic_details_tool_name}(['{topic_id}'])` tool "
-                    "to unlock full topic details."
-                ),
-                "score": score
-            })
-            match_no += 1
-
-        return "\n\n---\n\n".join(r["content"] for r in all_results[:25])
-        
-    def get_full_wikipedia_article(self, topic_ids):
+                references[topic_id] = (rowid, offset if start is None else start)
+
+        # Pages of several topics usually share an offset, so this is typically a single fetch
+        by_offset: Dict[int, List[int]] = {}
+        for rowid, start in references.values():
+            by_offset.setdefault(start, []).append(rowid)
+        articles = {
+            (rowid, start): article
+            for start, rowids in by_offset.items()
+            for rowid, article in self.fetch_articles(rowids, max_chars=max_chars, offset=start).items()
+        }
+
         results = []
         for topic_id in topic_ids:
-            title = self._id_to_title.get(topic_id)
-            if not title:
-                logger.warning("Topic ID %r not found in mapping", topic_id)
-                results.append(f"Topic ID '{topic_id}' not found. Please run a new search to get valid IDs.")
-                continue
-                
-            cursor = self._connection.cursor()
-            article = cursor.execute("""
-                SELECT text FROM articles WHERE title = ?
-            """, [title]).fetchone()
-            cursor.close()
-            
+            article = articles.get(references.get(topic_id))
             if not article:
-                results.append(f"Article not found for title: {title}")
+                results.append(f"Topic ID '{topic_id}' not found. Please run a new search to get valid IDs.")
                 continue
 
-            # Clean the article text by removing consecutive short lines
-            cleaned_article = self.remove_consecutive_short_lines(article[0])
+            rowid, start = references[topic_id]
+            title, cleaned_article, full_length = article
+            end = start + len(cleaned_article)
+            if max_chars is not None and cleaned_article and end < full_length:
+                token = self.encode_continuation(rowid, end)
+                cleaned_article += (
+                    f"\n\n[Characters {start}-{end} of {full_length} of {title}; "
+                    f"continue with `{get_full_topic_details_tool_name}(['{token}'])`]"
+                )
+            elif start:
+                cleaned_article += f"\n\n[Characters {start}-{end} of {title}; end of topic]"
             results.append(cleaned_article)
         
         return "\n\n---\n\n".join(results)
-    
-offline_wikipedia_service = _OfflineWikipediaService()
\ No newline at end of file
+
+    def fetch_facts(self, title_keys: List[str]) -> Dict[str, Tuple[str, List[Tuple[str, str]]]]:
+        """Infobox facts by lowercased title: ``title_key -> (title, [(key, value), ...])`` in infobox order."""
+        if not title_keys or not self._has_facts:
+            return {}
+        placeholders = ", ".join("?" for _ in title_keys)
+        with self._pools[0].cursor() as cursor:
+            rows = cursor.execute(f"""
+                SELECT title_key, title, key, value FROM facts
+                WHERE title_key IN ({placeholders})
+                ORDER BY title_key, position
+            """, title_keys).fetchall()
+        facts: Dict[str, Tuple[str, List[Tuple[str, str]]]] = {}
+        for title_key, title, key, value in rows:
+            facts.setdefault(title_key, (title, []))[1].append((key, value))
+        return facts
+
+    def lookup_facts(self, subjects: List[str], keys: Optional[List[str]] = None) -> str:
+        """
+        Render the infobox facts of articles named by title, e.g. a birth date or a capital.
+
+        Subjects are matched on the indexed lowercase title; only subjects without
+        facts are looked up again through the redirect table ("JFK"). No article
+        text is read.
+
+        Args:
+            subjects: Article titles, at most ``_MAX_FACT_SUBJECTS``
+            keys: Optional field names to keep; a fact matches when a key occurs in its
+                field name ("birth" matches birth_date and birth_place). All fields otherwise.
+
+        Returns:
+            One block of ``key: value`` lines per subject, or an empty string when the build has no facts table
+        """
+        if not self._has_facts:
+            return ""
+        subjects = list(dict.fromkeys(s.strip() for s in subjects[:self._MAX_FACT_SUBJECTS] if s.strip()))
+        title_keys = {subject: " ".join(subject.lower().split()) for subject in subjects}
+        facts = self.fetch_facts(list(dict.fromkeys(title_keys.values())))
+
+        missing = [subject for subject in subjects if title_keys[subject] not in facts]
+        if missing and self._has_link_tables:
+            placeholders = ", ".join("?" for _ in missing)
+            with self._pools[0].cursor() as cursor:
+                redirects = cursor.execute(f"""
+                    SELECT title_key, lower(target) FROM redirects WHERE title_key IN ({placeholders})
+                """, [title_keys[subject] for subject in missing]).fetchall()
+            redirected = dict(redirects)
+            facts.update(self.fetch_facts(list(dict.fromkeys(redirected.values()))))
+            for subject in missing:
+                title_keys[subject] = redirected.get(title_keys[subject], title_keys[subject])
+
+        wanted = ["_".join(key.lower().replace("_", " ").split()) for key in keys or [] if key.strip()]
+        results = []
+        for subject in subjects:
+            if title_keys[subject] not in facts:
+                results.append(f"No infobox facts found for {subject!r}; search for it with `{perform_research_tool_name}`.")
+                continue
+            title, subject_facts = facts[title_keys[subject]]
+            if wanted:
+                subject_facts = [(key, value) for key, value in subject_facts if any(w in key for w in wanted)]
+            heading = f"# {title}"
+            if self._title_index is not None:
+                rowids = self._title_index.exact(title)
+                if rowids:
+                    heading += f" ({self.encode_topic_id(rowids[0])})"
+            lines = [f"{key}: {value}" for key, value in subject_facts[:self._MAX_FACTS_PER_SUBJECT]]
+            results.append("\n".join([heading, *(lines or [f"No infobox fields match {', '.join(keys or [])}."])]))
+        return "\n\n".join(results)
+
+    def iter_article_pages(self, topic_id: str, page_chars: int = 8000) -> Iterator[ArticlePage]:
+        """
+        Read one article page by page, starting at a topic ID or continuation token.
+
+        Each page is fetched (or decompressed) only when the consumer asks for it,
+        so a reader that stops early never loads the rest of the article. Raw text
+        has to be cleaned whole, so it is fetched and cleaned once and paged in memory.
+        """
+        rowid, offset = self.decode_topic_reference(topic_id)
+        if rowid is None:
+            return
+        offset = offset or 0
+        whole = None
+        if not self._precleaned:
+            whole = self.fetch_articles([rowid]).get(rowid)
+            if whole is None:
+                return
+        while True:
+            if whole is None:
+                article = self.fetch_articles([rowid], max_chars=page_chars, offset=offset).get(rowid)
+                if article is None:
+                    return
+            else:
+                title, cleaned_text, full_length = whole
+                article = (title, cleaned_text[offset:offset + page_chars], full_length)
+            title, text, full_length = article
+            end = offset + len(text)
+            more = bool(text) and end < full_length
+            yield ArticlePage(title, text, offset, full_length, self.encode_continuation(rowid, end) if more else None)
+            if not more:
+                return
+            offset = end
+
+    def fetch_sections(self, rowid: int, query: str) -> List[Tuple[str, int, str, str, Optional[float]]]:
+        """Return ``(title, position, heading, text, bm25 score or None)`` for every section of an article, in order."""
+        id_column = self._id_column
+        sql = f"""
+            SELECT a.title, s.position, s.heading, s.text, fts_main_sections.match_bm25(s.section_id, ?) AS score
+            FROM sections s
+            JOIN articles a ON a.page_id = s.page_id
+            WHERE a.{id_column} = ?
+            ORDER BY s.position
+        """
+        with self._pools[rowid % len(self._pools)].cursor() as cursor:
+            return cursor.execute(sql, [query, rowid]).fetchall()
+
+    def get_topic_sections(self, topic_ids: List[str], query: str, max_chars: int = 8000) -> str:
+        """
+        Return the sections of each topic that best match ``query`` instead of whole articles.
+
+        Sections are picked by BM25 score against ``query``; leftover budget is filled
+        with unmatched sections from the top of the article. Picked sections are
+        returned in article order.
+
+        Args:
+            topic_ids: Topic IDs from ``fulltext_search``
+            query: What the caller is looking for within the topics
+            max_chars: Character budget for the whole call, split evenly between topics
+
+        Returns:
+            The selected sections of each topic, separated like ``get_full_wikipedia_article``
+        """
+        per_topic = max(1, max_chars // max(1, len(topic_ids)))
+        if not self._has_sections:
+            return self.get_full_wikipedia_article(topic_ids, max_chars=per_topic)
+
+        results = []
+        for topic_id in topic_ids:
+            rowid = self.decode_topic_id(topic_id)
+            sections = self.fetch_sections(rowid, query) if rowid is not None else []
+            if not sections:
+                results.append(f"Topic ID '{topic_id}' not found. Please run a new search to get valid IDs.")
+                continue
+
+            ranked = sorted(
+                sections,
+                key=lambda section: (section[4] is None, -(section[4] or 0.0), section[1]),
+            )
+            picked = []
+            remaining = per_topic
+            for _, position, heading, text, _ in ranked:
+                if len(text) <= remaining:
+                    picked.append((position, heading, text))
+                    remaining -= len(text)
+                elif not picked:
+                    picked.append((position, heading, text[:remaining].rstrip() + " …"))
+                    remaining = 0
+            picked.sort()
+
+            title = sections[0][0]
+            parts = [f"# {title} ({topic_id})"]
+            for _, heading, text in picked:
+                parts.append(f"## {heading or 'Introduction'}\n{text}")
+            total_chars = sum(len(section[3]) for section in sections)
+            parts.append(
+                f"[{len(picked)} of {len(sections)} sections ({per_topic - remaining} of {total_chars} characters) "
+                f"selected for {query!r}; use `{get_full_topic_details_tool_name}(['{topic_id}'])` for the full topic]"
+            )
+            results.append("\n\n".join(parts))
+
+        return "\n\n---\n\n".join(results)
+
+
+class _LazyOfflineWikipediaService:
+    """
+    Opens the offline Wikipedia databases on first use instead of at import.
+
+    Importing the tool executor no longer pays for opening wiki.db (or fails when
+    it is missing); the first call does, unless ``prewarm`` opened it in the
+    background first. A failed open is retried on the next call.
+
+    When a data file changes (a rebuilt wiki.db swapped in, a new titles.idx), the
+    next call closes the service and opens a new one, with fresh connections and an
+    empty search cache. DuckDB hands out the database it already has open for a
+    path, so the old connections must be closed first: queries running on them
+    finish, and calls that try to start one afterwards fail with a retry hint.
+    """
+
+    def __init__(self):
+        self._service: Optional[_OfflineWikipediaService] = None
+        self._lock = Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._service is not None
+
+    def get(self) -> _OfflineWikipediaService:
+        service = self._service
+        if service is None or service.data_changed():
+            with self._lock:
+                if self._service is not None and self._service.data_changed():
+                    logger.info("Wiki data files changed, reopening offline Wikipedia")
+                    stale, self._service = self._service, None
+                    stale.close()
+                if self._service is None:
+                    started = time.perf_counter()
+                    self._service = _OfflineWikipediaService()
+                    logger.info("Offline Wikipedia opened in %.1f ms", (time.perf_counter() - started) * 1000)
+                service = self._service
+        return service
+
+    def prewarm(self) -> Thread:
+        """Open the databases on a background thread so the first search does not wait for it."""
+        def warm() -> None:
+            try:
+                self.get()
+            except Exception:
+                logger.exception("Offline Wikipedia pre-warm failed; it will be retried on first use")
+
+        thread = Thread(target=warm, name="wiki-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+offline_wikipedia_service = _LazyOfflineWikipediaService()
+
+
+def prewarm_from_env() -> None:
+    """Start the background pre-warm when ``WIKI_PREWARM=1``."""
+    if os.getenv("WIKI_PREWARM", "0") == "1":
+        offline_wikipedia_service.prewarm()
@@ -127,12 +127,65 @@ def search_offline_wikipedia(terms: list[str]) -> str:
 
 @m.tool()
 @log_tool_output
-def get_wikipedia_article(topic_ids: str) -> str:
+def search_offline_wikipedia_many(queries: list[list[str]]) -> str:
+    """
+    Run several unrelated offline Wikipedia searches at once, e.g. one per subtopic.
+
+    Args:
+        queries: Up to 5 queries, each a list of SIMPLE search term variations about one subtopic (up to 5 terms each)
+
+    Returns:
+        Wikipedia article snippets grouped per query; a topic is shown in full only under the first query that finds it
+    """
+    from offline_wikipedia_service import offline_wikipedia_service
+
+    if not queries:
+        return "No queries provided. Please provide one or more lists of search terms."
+
+    try:
+        results = offline_wikipedia_service.fulltext_search_many(queries)
+        return f"Wikipedia Search Results for {len(queries)} queries\n\n{results}" if results else "No results found."
+    except Exception as e:
+        logger.error(f"Wikipedia batch search failed: {e}")
+        return f"Error searching Wikipedia: {str(e)}"
+
+
+@m.tool()
+@log_tool_output
+def lookup_wikipedia_facts(subjects: list[str], keys: list[str] | None = None) -> str:
+    """
+    Look up infobox facts (birth date, population, capital, ...) of Wikipedia articles by exact title.
+
+    Args:
+        subjects: Up to 5 article titles (e.g. "Marie Curie")
+        keys: Optional facts to return (e.g. ["birth_date", "population"]); partial names match (default: all)
+
+    Returns:
+        ``key: value`` lines per article, with its topic ID when known
+    """
+    from offline_wikipedia_service import offline_wikipedia_service
+
+    if not subjects:
+        return "No subjects provided. Please provide one or more article titles."
+
+    try:
+        facts = offline_wikipedia_service.lookup_facts(subjects, keys)
+        return facts or "Infobox facts are not available in this build; use search_offline_wikipedia instead."
+    except Exception as e:
+        logger.error(f"Wikipedia fact lookup failed: {e}")
+        return f"Error looking up Wikipedia facts: {str(e)}"
+
+
+@m.tool()
+@log_tool_output
+def get_wikipedia_article(topic_ids: str, max_chars: int = 0, offset: int = 0) -> str:
     """
     Get full Wikipedia articles by their topic IDs.
 
     Args:
-        topic_ids: Comma-separated list of base64-encoded topic IDs
+        topic_ids: Comma-separated list of topic IDs returned by search_offline_wikipedia, or continuation tokens (topic_id:offset) from a truncated article
+        max_chars: Optional maximum number of characters to return per article (default: 0, no limit)
+        offset: Character offset to start reading plain topic IDs from (default: 0)
 
     Returns:
         Full Wikipedia article text(s)
@@ -143,16 +196,77 @@ def get_wikipedia_article(topic_ids: str) -> str:
     ids = [t.strip() for t in topic_ids.split(',') if t.strip()]
 
     if not ids:
-        return "No topic IDs provided. Please provide one or more base64-encoded topic IDs."
+        return "No topic IDs provided. Please provide one or more topic IDs."
 
     try:
-        articles = offline_wikipedia_service.get_full_wikipedia_article(ids)
+        articles = offline_wikipedia_service.get_full_wikipedia_article(ids, max_chars=max_chars or None, offset=max(0, offset))
         return f"Wikipedia Articles for: {topic_ids}\n\n{articles}"
     except Exception as e:
         logger.error(f"Wikipedia article retrieval failed: {e}")
         return f"Error retrieving Wikipedia articles: {str(e)}"
 
 
+@m.tool()
+@log_tool_output
+def read_wikipedia_article(topic_id: str, page_chars: int = 8000) -> str:
+    """
+    Read a long Wikipedia article incrementally, one page of text per call.
+
+    Args:
+        topic_id: A topic ID returned by search_offline_wikipedia, or the continuation token of the previous page
+        page_chars: Characters per page (default: 8000, minimum 1000)
+
+    Returns:
+        One page of the article, followed by the continuation token for the next page if the article goes on
+    """
+    from offline_wikipedia_service import offline_wikipedia_service
+
+    try:
+        # Only the requested page is read; the next call resumes from its continuation token
+        page = next(offline_wikipedia_service.iter_article_pages(topic_id.strip(), page_chars=max(1000, page_chars)), None)
+    except Exception as e:
+        logger.error(f"Wikipedia article read failed: {e}")
+        return f"Error reading Wikipedia article: {str(e)}"
+
+    if page is None:
+        return f"Topic ID '{topic_id}' not found. Please run a new search to get valid IDs."
+    end = page.offset + len(page.text)
+    if page.continuation:
+        footer = f"continue with read_wikipedia_article('{page.continuation}')"
+    else:
+        footer = "end of article"
+    return f"# {page.title}\n\n{page.text}\n\n[Characters {page.offset}-{end} of {page.full_length}; {footer}]"
+
+
+@m.tool()
+@log_tool_output
+def get_wikipedia_sections(topic_ids: str, query: str, max_chars: int = 8000) -> str:
+    """
+    Get only the sections of Wikipedia articles that are relevant to a question.
+
+    Args:
+        topic_ids: Comma-separated list of topic IDs returned by search_offline_wikipedia
+        query: What you are looking for within the articles (e.g. "early life", "population 2020")
+        max_chars: Total number of characters to return across all articles (default: 8000)
+
+    Returns:
+        The best-matching sections of each article, in article order
+    """
+    from offline_wikipedia_service import offline_wikipedia_service
+
+    ids = [t.strip() for t in topic_ids.split(',') if t.strip()]
+
+    if not ids:
+        return "No topic IDs provided. Please provide one or more topic IDs."
+
+    try:
+        sections = offline_wikipedia_service.get_topic_sections(ids, query, max_chars=max_chars)
+        return f"Wikipedia Sections for: {topic_ids}\n\n{sections}"
+    except Exception as e:
+        logger.error(f"Wikipedia section retrieval failed: {e}")
+        return f"Error retrieving Wikipedia sections: {str(e)}"
+
+
 @m.tool()
 @log_tool_output
 def save_memory(memory: str, media: str | None = None, tag_ids: list[int] | None = None) -> str:
@@ -279,6 +393,64 @@ def get_memories_by_tag_id(tag_id: int) -> str:
         return f"Error getting memories for tag ID {tag_id}: {str(e)}"
 
 
+@m.tool()
+@log_tool_output
+def query_memories(
+    search_terms: list[str] | None = None,
+    tag_ids: list[int] | None = None,
+    tag_match: Literal["any", "all"] = "any",
+    created_after: str = "",
+    created_before: str = "",
+    limit: int = 20,
+    offset: int = 0
+) -> str:
+    """
+    Filter memories by text, tags and creation date in one query.
+
+    Args:
+        search_terms: Optional terms to search for in memory text and tag labels (any may match)
+        tag_ids: Optional list of tag IDs to filter by
+        tag_match: 'any' to match memories with at least one of the tags, 'all' to require every tag (default: 'any')
+        created_after: Optional ISO date/time; only memories created at or after it are returned
+        created_before: Optional ISO date/time; only memories created before it are returned
+        limit: Maximum number of memories to return (default: 20)
+        offset: Number of matching memories to skip, for pagination (default: 0)
+
+    Returns:
+        Formatted list of matching memories, newest first
+    """
+    from memory_storage_service import query_memories as service_query_memories
+
+    try:
+        memories = service_query_memories(
+            text_terms=search_terms,
+            tag_ids=tag_ids,
+            tag_match=tag_match,
+            created_after=created_after or None,
+            created_before=created_before or None,
+            limit=limit,
+            offset=offset,
+        )
+
+        if not memories:
+            return "No memories found matching the given filters."
+
+        result_lines = [f"Found {len(memories)} memories (offset {offset}):"]
+
+        for memory_id, memory_text, image, created_at, tags in memories:
+            memory_preview = memory_text[:100].replace('\n', ' ') + ('...' if len(memory_text) > 100 else '')
+            tags_str = f"Tags: {', '.join(tags)}" if tags else "No tags"
+
+            result_lines.append(f"\nMemory [{memory_id}] (created at {created_at}):")
+            result_lines.append(f"  Preview: {memory_preview}")
+            result_lines.append(f"  {tags_str}")
+
+        return "\n".join(result_lines)
+    except Exception as e:
+        logger.error(f"Query memories failed: {e}")
+        return f"Error querying memories: {str(e)}"
+
+
 @m.tool()
 @log_tool_output
 def grep_files(
@@ -610,4 +782,7 @@ def list_files(
 
 
 if __name__ == "__main__":
+    # Wikipedia tools import the service lazily; WIKI_PREWARM=1 opens wiki.db in the background at startup
+    from offline_wikipedia_service import prewarm_from_env
+    prewarm_from_env()
     m.run(transport="streamable-http")
\ No newline at end of file
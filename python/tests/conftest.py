@@ -0,0 +1,16 @@
+import pytest
+
+import memory_storage_service
+
+
+@pytest.fixture
+def memory_db(tmp_path, monkeypatch):
+    """``memory_storage_service`` on a fresh database file, with the singleton (and any mirror) reset."""
+    monkeypatch.delenv("MEMORY_DB_MIRROR", raising=False)
+    monkeypatch.setattr(memory_storage_service, "db_path", str(tmp_path / "memories.duckdb"))
+    monkeypatch.setattr(memory_storage_service._MemoriesStorageService, "_instance", None)
+    monkeypatch.setattr(memory_storage_service._MemoriesStorageService, "_initialized", False)
+    yield memory_storage_service
+    service = memory_storage_service._MemoriesStorageService._instance
+    if service is not None and getattr(service, "_mirror", None) is not None:
+        service._mirror.close()
@@ -0,0 +1,47 @@
+from PIL import Image, ImageDraw
+
+from image_hashing import dhash
+
+
+def _gradient(size=(64, 48)):
+    image = Image.new("RGB", size)
+    draw = ImageDraw.Draw(image)
+    for x in range(size[0]):
+        draw.line([(x, 0), (x, size[1])], fill=(x * 4 % 256, 80, 255 - x * 4 % 256))
+    draw.ellipse([10, 10, 30, 30], fill=(255, 255, 255))
+    return image
+
+
+def _distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def test_rescaled_copy_hashes_close_and_other_image_far():
+    image = _gradient()
+    rescaled = image.resize((128, 96))
+    flipped = image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+
+    assert _distance(dhash(image), dhash(rescaled)) <= 4
+    assert _distance(dhash(image), dhash(flipped)) > 10
+
+
+def test_find_similar_images_by_distance(memory_db):
+    memory_db.save_memory("a", image_hash=0b1111, image_description="exact")
+    memory_db.save_memory("b", image_hash=0b0111, image_description="one bit off")
+    memory_db.save_memory("c", image_hash=0b1111 << 40, image_description="far")
+
+    assert [row[2] for row in memory_db.find_similar_images(0b1111, max_distance=0)] == ["exact"]
+    assert [(row[1], row[2]) for row in memory_db.find_similar_images(0b1111, max_distance=1)] == [
+        (0, "exact"),
+        (1, "one bit off"),
+    ]
+
+
+def test_find_similar_images_only_reuses_matching_prompt(memory_db):
+    memory_db.save_memory("a", image_hash=42, image_description="a receipt", image_prompt="what did I buy?")
+    memory_db.save_memory("b", image_hash=42, image_description="a photo", image_prompt="")
+
+    assert [row[2] for row in memory_db.find_similar_images(42, max_distance=0, image_prompt="")] == ["a photo"]
+    assert memory_db.find_similar_images(42, max_distance=0, image_prompt="who is this?") == []
+    # Without a prompt every matching hash is returned (similar-image browsing)
+    assert len(memory_db.find_similar_images(42, max_distance=0)) == 2
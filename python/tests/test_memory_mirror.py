@@ -0,0 +1,75 @@
+import duckdb
+
+
+def _disk_rows(memory_db, query):
+    conn = duckdb.connect(memory_db.db_path, read_only=True)
+    try:
+        return conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+
+def _mirror(memory_db):
+    return memory_db._MemoriesStorageService()._mirror
+
+
+def test_write_behind_replays_with_the_mirror_ids(memory_db, monkeypatch):
+    monkeypatch.setenv("MEMORY_DB_MIRROR", "write-behind")
+    monkeypatch.setenv("MEMORY_DB_CHECKPOINT_SECONDS", "3600")
+
+    alpha = memory_db.add_tag("alpha")
+    # The duplicate fails on the mirror but still consumes a sequence value there
+    assert memory_db.add_tag("alpha") == alpha
+    beta = memory_db.add_tag("beta")
+    memory_db.save_memory("tagged", tag_ids=[alpha, beta])
+
+    # Reads are served by the mirror before anything reaches disk
+    assert [row[1] for row in memory_db.get_all_tags()] == ["alpha", "beta"]
+    assert _disk_rows(memory_db, "SELECT COUNT(*) FROM tags;") == [(0,)]
+
+    _mirror(memory_db).checkpoint()
+
+    assert _disk_rows(memory_db, "SELECT id, label FROM tags ORDER BY id;") == [(alpha, "alpha"), (beta, "beta")]
+    assert _disk_rows(memory_db, "SELECT tag_id FROM memory_tags ORDER BY tag_id;") == [(alpha,), (beta,)]
+    assert _mirror(memory_db).quarantined == []
+
+
+def test_disk_sequences_catch_up_after_mirrored_writes(memory_db, monkeypatch):
+    monkeypatch.setenv("MEMORY_DB_MIRROR", "write-behind")
+    memory_db.add_tag("alpha")
+    memory_db.add_tag("alpha")
+    beta = memory_db.add_tag("beta")
+    _mirror(memory_db).close()
+
+    # Restart without the mirror: the on-disk sequence must not hand out beta's id again
+    monkeypatch.setenv("MEMORY_DB_MIRROR", "off")
+    monkeypatch.setattr(memory_db._MemoriesStorageService, "_initialized", False)
+    assert memory_db.add_tag("gamma") > beta
+
+
+def test_write_through_updates_disk_and_mirror(memory_db, monkeypatch):
+    monkeypatch.setenv("MEMORY_DB_MIRROR", "write-through")
+    tag = memory_db.add_tag("alpha")
+    memory_db.save_memory("first", tag_ids=[tag])
+
+    assert _disk_rows(memory_db, "SELECT memory FROM memories;") == [("first",)]
+    assert [row[1] for row in memory_db.get_memories_by_tag_id(tag)] == ["first"]
+
+
+def test_failing_replay_is_quarantined(memory_db, monkeypatch):
+    monkeypatch.setenv("MEMORY_DB_MIRROR", "write-behind")
+    monkeypatch.setenv("MEMORY_DB_CHECKPOINT_SECONDS", "3600")
+    mirror = _mirror(memory_db)
+    memory_db.add_tag("alpha")
+    # A write the disk keeps rejecting must not hold back the ones queued after it
+    mirror._pending.insert(0, ("INSERT INTO memory_tags (memory_id, tag_id) VALUES (?, ?);", (99, 99)))
+
+    for _ in range(mirror._MAX_REPLAY_ATTEMPTS - 1):
+        try:
+            mirror.checkpoint()
+        except duckdb.Error:
+            pass
+    mirror.checkpoint()
+
+    assert len(mirror.quarantined) == 1
+    assert _disk_rows(memory_db, "SELECT label FROM tags;") == [("alpha",)]
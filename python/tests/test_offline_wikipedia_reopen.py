@@ -0,0 +1,44 @@
+import os
+
+import duckdb
+
+import offline_wikipedia_service
+
+
+def _write_wiki(path, title, text):
+    conn = duckdb.connect(path)
+    conn.execute("CREATE TABLE articles (title VARCHAR, text VARCHAR);")
+    conn.execute("INSERT INTO articles VALUES (?, ?);", [title, text])
+    conn.close()
+
+
+def test_swapped_wiki_db_is_reopened(tmp_path, monkeypatch):
+    monkeypatch.setenv("WIKI_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("WIKI_SHARDS", raising=False)
+    wiki_path = str(tmp_path / "wiki.db")
+    _write_wiki(wiki_path, "Old build", "Text of the old build.")
+
+    lazy = offline_wikipedia_service._LazyOfflineWikipediaService()
+    first = lazy.get()
+    assert lazy.fetch_articles([0])[0][0] == "Old build"
+    assert lazy.get() is first
+
+    # update_wiki.sh builds next to wiki.db and renames the new file over it
+    _write_wiki(wiki_path + ".build", "New build", "Text of the new build, which is longer.")
+    os.replace(wiki_path + ".build", wiki_path)
+
+    assert lazy.fetch_articles([0])[0][0] == "New build"
+    assert lazy.get() is not first
+    lazy.get().close()
+
+
+def test_unchanged_files_keep_the_service(tmp_path, monkeypatch):
+    monkeypatch.setenv("WIKI_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("WIKI_SHARDS", raising=False)
+    _write_wiki(str(tmp_path / "wiki.db"), "Only build", "Text.")
+
+    lazy = offline_wikipedia_service._LazyOfflineWikipediaService()
+    service = lazy.get()
+    assert not service.data_changed()
+    assert lazy.get() is service
+    service.close()
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+
+class _FrozenDatetime(datetime):
+    current = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def memories(memory_db, monkeypatch):
+    # save_memory binds created_at itself; DuckDB cannot update a row that memory_tags references
+    monkeypatch.setattr(memory_db, "datetime", _FrozenDatetime)
+    work = memory_db.add_tag("work")
+    travel = memory_db.add_tag("travel")
+    saved = [
+        ("Booked the train to Lyon", [travel], datetime(2024, 1, 10)),
+        ("Quarterly report draft", [work], datetime(2024, 2, 1)),
+        ("Work trip to Berlin", [work, travel], datetime(2024, 3, 5)),
+        ("Grocery list", [], datetime(2024, 3, 20)),
+    ]
+    for text, tag_ids, created_at in saved:
+        _FrozenDatetime.current = created_at
+        memory_db.save_memory(text, tag_ids=tag_ids)
+    return memory_db, {"work": work, "travel": travel}
+
+
+def _texts(rows):
+    return [row[1] for row in rows]
+
+
+def test_text_terms_match_memory_text_or_tag_labels(memories):
+    memory_db, _ = memories
+    # Newest first; "travel" only appears as a tag label
+    assert _texts(memory_db.query_memories(text_terms=["TRAVEL"])) == ["Work trip to Berlin", "Booked the train to Lyon"]
+    assert _texts(memory_db.query_memories(text_terms=["grocery", "report"])) == ["Grocery list", "Quarterly report draft"]
+
+
+def test_tag_match_any_and_all(memories):
+    memory_db, tags = memories
+    tag_ids = [tags["work"], tags["travel"]]
+    assert len(memory_db.query_memories(tag_ids=tag_ids, tag_match="any")) == 3
+    assert _texts(memory_db.query_memories(tag_ids=tag_ids, tag_match="all")) == ["Work trip to Berlin"]
+    with pytest.raises(ValueError):
+        memory_db.query_memories(tag_ids=tag_ids, tag_match="some")
+
+
+def test_created_range_is_inclusive_then_exclusive(memories):
+    memory_db, _ = memories
+    rows = memory_db.query_memories(created_after=datetime(2024, 2, 1), created_before=datetime(2024, 3, 20))
+    assert _texts(rows) == ["Work trip to Berlin", "Quarterly report draft"]
+
+
+def test_filters_combine_and_page(memories):
+    memory_db, tags = memories
+    rows = memory_db.query_memories(text_terms=["trip", "train"], tag_ids=[tags["travel"]], created_after=datetime(2024, 2, 1))
+    assert _texts(rows) == ["Work trip to Berlin"]
+    assert sorted(rows[0][4]) == ["travel", "work"]
+
+    assert _texts(memory_db.query_memories(limit=2, offset=1)) == ["Work trip to Berlin", "Quarterly report draft"]
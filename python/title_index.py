@@ -0,0 +1,127 @@
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import unicodedata
+from array import array
+from typing import Iterable, List, Tuple
+
+_MAGIC = b"WIKITIX1"
+_HEADER = struct.Struct("<8sQ")
+
+
+def normalize_title(title: str) -> str:
+    """Fold a title for lookup: strip accents, lowercase, ``_`` to space, collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", title)
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c)).replace("_", " ").lower()
+    return " ".join(folded.split())
+
+
+def write_title_index(path: str, entries: Iterable[Tuple[str, int]]) -> int:
+    """
+    Write a sorted title index file.
+
+    Layout: header (magic, count), ``count + 1`` key offsets, ``count`` rowids, then
+    the UTF-8 keys back to back. Integers use native byte order, so the file is
+    built on the machine that serves it.
+
+    Args:
+        path: Output path, replaced atomically
+        entries: ``(normalized_title, rowid)`` sorted by the UTF-8 bytes of the title
+
+    Returns:
+        Number of entries written
+    """
+    offsets = array("q", [0])
+    rowids = array("q")
+    previous = b""
+    with tempfile.TemporaryFile() as blob:
+        for key, rowid in entries:
+            encoded = key.encode("utf-8")
+            if encoded < previous:
+                raise ValueError(f"title index entries are not sorted: {key!r}")
+            previous = encoded
+            blob.write(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+            rowids.append(rowid)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(_HEADER.pack(_MAGIC, len(rowids)))
+            offsets.tofile(out)
+            rowids.tofile(out)
+            blob.seek(0)
+            shutil.copyfileobj(blob, out)
+    os.replace(tmp_path, path)
+    return len(rowids)
+
+
+class TitleIndex:
+    """
+    Memory-mapped sorted title index for exact and prefix title lookups.
+
+    Lookups binary-search the mapped keys, so only the touched pages are read and
+    an exact match costs ~log2(n) key comparisons.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as index_file:
+            self._map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a title index")
+        view = memoryview(self._map)
+        start = _HEADER.size
+        self._offsets = view[start:start + (count + 1) * 8].cast("q")
+        start += (count + 1) * 8
+        self._rowids = view[start:start + count * 8].cast("q")
+        self._keys_start = start + count * 8
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _key(self, i: int) -> bytes:
+        return self._map[self._keys_start + self._offsets[i]:self._keys_start + self._offsets[i + 1]]
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def exact(self, title: str) -> List[int]:
+        """Rowids whose title (or redirect title) normalizes to the same key as ``title``."""
+        key = normalize_title(title).encode("utf-8")
+        rowids = []
+        i = self._lower_bound(key)
+        while i < self._count and self._key(i) == key:
+            rowids.append(self._rowids[i])
+            i += 1
+        return list(dict.fromkeys(rowids))
+
+    def prefix(self, title: str, limit: int = 5, scan: int = 64) -> List[int]:
+        """
+        Rowids of the shortest titles starting with ``title``.
+
+        Only the first ``scan`` keys in sort order are considered, so very short
+        prefixes stay cheap.
+        """
+        key = normalize_title(title).encode("utf-8")
+        if not key:
+            return []
+        matches = []
+        i = self._lower_bound(key)
+        while i < self._count and len(matches) < scan:
+            candidate = self._key(i)
+            if not candidate.startswith(key):
+                break
+            matches.append((len(candidate), i))
+            i += 1
+        matches.sort()
+        return list(dict.fromkeys(self._rowids[i] for _, i in matches))[:limit]
@@ -1,5 +1,8 @@
 get_full_topic_details_tool_name = "get_full_topic_details"
+get_topic_sections_tool_name = "get_topic_sections"
 perform_research_tool_name = "perform_research"
+perform_research_batch_tool_name = "perform_research_batch"
+lookup_facts_tool_name = "lookup_facts"
 search_memories_tool_name = "search_memories"
 extract_webpage_content_tool_name = "extract_webpage_content"
 
@@ -118,6 +121,64 @@ def get_tool_definitions():
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": f"{perform_research_batch_tool_name}",
+            "description": "Run several unrelated searches at once (e.g. one per subtopic), instead of several separate searches; each query is a list of simple term variations",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "queries": {
+                        "type": "array",
+                        "items": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "minItems": 1,
+                            "maxItems": 5
+                        },
+                        "description": "List of queries, each a list of SIMPLE search term variations about one subtopic (up to 5 queries of up to 5 terms)",
+                        "maxItems": 5,
+                        "minItems": 1
+                    }
+                },
+                "required": ["queries"]
+            },
+            "returns": {
+                "type": "string",
+                "description": "Matching topics grouped per query, each with a `topic_id`; a topic is shown in full only under the first query that finds it"
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": f"{lookup_facts_tool_name}",
+            "description": "Look up infobox facts (e.g. birth date, population, capital) of topics by exact title, without a search or reading the full topic",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "subjects": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Exact topic titles (e.g. 'Marie Curie', 'France')",
+                        "minItems": 1,
+                        "maxItems": 5
+                    },
+                    "keys": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional facts to return (e.g. 'birth_date', 'population', 'capital'); partial names match (omit for all facts)"
+                    }
+                },
+                "required": ["subjects"]
+            },
+            "returns": {
+                "type": "string",
+                "description": "`key: value` lines per subject, with its `topic_id` when known"
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -129,15 +190,49 @@ def get_tool_definitions():
                     "topic_ids": {
                         "type": "array",
                         "items": {"type": "string"},
-                        "description": "Required list of `topic_id`s to get full information about",
+                        "description": "Required list of `topic_id`s to get full information about, or continuation tokens (`topic_id:offset`) to read the next part of a truncated topic",
                         "minItems": 0,
                         "maxItems": 5
                     },
+                    "max_chars": {
+                        "type": "integer",
+                        "description": "Optional maximum number of characters to return per topic (omit for full details); long topics can then be read part by part",
+                        "minimum": 1000
+                    },
                 },
                 "required": ["topic_ids"]
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": f"{get_topic_sections_tool_name}",
+            "description": "Get only the sections of specific topics that are relevant to a question, instead of the full topic details",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "topic_ids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Required list of `topic_id`s to read",
+                        "minItems": 1,
+                        "maxItems": 5
+                    },
+                    "query": {
+                        "type": "string",
+                        "description": "What you are looking for within the topics (e.g. 'early life', 'population 2020')"
+                    },
+                    "max_chars": {
+                        "type": "integer",
+                        "description": "Optional total number of characters to return across all topics (default 8000)",
+                        "minimum": 1000
+                    },
+                },
+                "required": ["topic_ids", "query"]
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
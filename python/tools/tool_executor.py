@@ -7,6 +7,8 @@ from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 from offline_wikipedia_service import offline_wikipedia_service
 from tools.tool_definitions import (
     get_full_topic_details_tool_name,
+    get_topic_sections_tool_name,
+    perform_research_batch_tool_name,
     perform_research_tool_name,
 )
 from tools.web_extractor import extract_webpage_content
@@ -299,22 +301,71 @@ def execute_tool_call(
                 result += f"""
                     
 To unlock full topic details, use the `{get_full_topic_details_tool_name}(['topic_id'])` tool for up to 5 of the above topics.
+For long topics, `{get_topic_sections_tool_name}(['topic_id'], 'what you need')` returns only the relevant sections.
 
 If these matches aren't useful, simply attempt different keywords in a new `{perform_research_tool_name}` tool call.
 """
             else:
                 result = "No results found, try different keywords."
 
+        case "perform_research_batch":
+            queries = arguments.get("queries", [])
+            if not isinstance(queries, list) or not all(isinstance(terms, list) for terms in queries):
+                return "Error: `queries` must be a list of term lists."
+            logger.info("Searching Wikipedia for %s queries: %s", len(queries), queries)
+            result = offline_wikipedia_service.fulltext_search_many(queries)
+            if result:
+                result += f"""
+
+To unlock full topic details, use the `{get_full_topic_details_tool_name}(['topic_id'])` tool for up to 5 of the above topics.
+For long topics, `{get_topic_sections_tool_name}(['topic_id'], 'what you need')` returns only the relevant sections.
+"""
+            else:
+                result = f"No results found, try different keywords in a new `{perform_research_batch_tool_name}` tool call."
+
+        case "lookup_facts":
+            subjects = arguments.get("subjects", [])
+            keys = arguments.get("keys")
+            if not isinstance(subjects, list) or not all(isinstance(subject, str) for subject in subjects):
+                return "Error: `subjects` must be a list of titles."
+            if keys is not None and (not isinstance(keys, list) or not all(isinstance(key, str) for key in keys)):
+                return "Error: `keys` must be a list of strings."
+            logger.info("Looking up Wikipedia facts %s for subjects: %s", keys, subjects)
+            result = offline_wikipedia_service.lookup_facts(subjects, keys)
+            if not result:
+                result = f"Infobox facts are not available; use `{perform_research_tool_name}` instead."
+
         case "get_full_topic_details":
             topic_ids = arguments.get("topic_ids", [])
+            max_chars = arguments.get("max_chars")
             logger.info("Getting full Wikipedia article details for topic IDs: %s", topic_ids)
-            result = offline_wikipedia_service.get_full_wikipedia_article(topic_ids)
+
+            if max_chars is not None:
+                try:
+                    max_chars = int(max_chars)
+                except (TypeError, ValueError):
+                    return "Error: `max_chars` must be an integer."
+
+            result = offline_wikipedia_service.get_full_wikipedia_article(topic_ids, max_chars=max_chars)
             if result:
                 result += f"""
                     
 Retreived full topic details for [{topic_ids}]
 """
 
+        case "get_topic_sections":
+            topic_ids = arguments.get("topic_ids", [])
+            query = arguments.get("query", "")
+            max_chars = arguments.get("max_chars", 8000)
+            logger.info("Getting Wikipedia sections matching %r for topic IDs: %s", query, topic_ids)
+
+            try:
+                max_chars = int(max_chars)
+            except (TypeError, ValueError):
+                return "Error: `max_chars` must be an integer."
+
+            result = offline_wikipedia_service.get_topic_sections(topic_ids, query, max_chars=max_chars)
+
         case "extract_webpage_content":
             url = arguments.get("url", "")
             max_pages = arguments.get("max_pages", 3)
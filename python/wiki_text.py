@@ -0,0 +1,211 @@
+import re
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+
+def remove_consecutive_short_lines(text: str, max_line_length: int = 100, min_consecutive: int = 3) -> str:
+    """
+    Remove consecutive blocks of short lines that are likely noise.
+    
+    Args:
+        text: The input text to clean
+        max_line_length: Maximum length of a line to be considered "short"
+        min_consecutive: Minimum number of consecutive short lines to trigger removal
+        
+    Returns:
+        Cleaned text with consecutive short line blocks removed
+    """
+    lines = text.split('\n')
+    if len(lines) < min_consecutive:
+        return text
+        
+    # Track which lines to keep
+    keep_lines = [True] * len(lines)
+    
+    # Find consecutive blocks of short lines
+    i = 0
+    while i < len(lines):
+        # Check if current line is short
+        if len(lines[i].strip()) < max_line_length:
+            # Count consecutive short lines
+            consecutive_count = 0
+            j = i
+            while j < len(lines) and len(lines[j].strip()) < max_line_length:
+                consecutive_count += 1
+                j += 1
+            
+            # If we have enough consecutive short lines, mark them for removal
+            if consecutive_count >= min_consecutive:
+                for k in range(i, j):
+                    keep_lines[k] = False
+                i = j
+            else:
+                i += 1
+        else:
+            i += 1
+    
+    # Filter out the lines marked for removal
+    filtered_lines = [line for line, keep in zip(lines, keep_lines) if keep]
+    
+    # Clean up multiple consecutive empty lines
+    result_lines = []
+    prev_empty = False
+    for line in filtered_lines:
+        is_empty = len(line.strip()) == 0
+        if not (is_empty and prev_empty):  # Skip if both current and previous are empty
+            result_lines.append(line)
+        prev_empty = is_empty
+    
+    return '\n'.join(result_lines)
+
+
+def compile_terms_pattern(terms: Iterable[str]) -> Optional[Pattern[str]]:
+    """Compile every lowercased word of ``terms`` into one alternation, longest words first."""
+    words = sorted({word.lower() for term in terms for word in term.split()}, key=len, reverse=True)
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(word) for word in words))
+
+
+def build_snippet(
+    text: str,
+    pattern: Optional[Pattern[str]],
+    ctx: int = 50,
+    lead_chars: int = 400,
+    max_chars: int = 800,
+    window_chars: Optional[int] = None,
+) -> str:
+    """
+    Build a search snippet from the article lead plus the best term matches.
+
+    ``pattern`` comes from ``compile_terms_pattern``. Matches are found in a single
+    scan of the first ``window_chars`` characters and merged on the fly into spans
+    no more than ``ctx`` characters apart. Spans are ranked by how many distinct
+    terms they contain (then by hit count), picked until ``max_chars`` is reached,
+    and emitted in document order.
+    """
+    full_len = len(text)
+    window_end = full_len if window_chars is None else min(full_len, window_chars)
+
+    # Each span is [start, end, distinct matched words, hit count]
+    spans = [[0, min(full_len, lead_chars), set(), 0]]
+    if pattern is not None:
+        # Matching a lowercased copy is several times faster than re.IGNORECASE
+        haystack = text[:window_end].lower()
+        if len(haystack) != window_end:
+            # Lowercasing shifted offsets (e.g. "İ"), so match the original case-insensitively
+            haystack = text[:window_end]
+            pattern = re.compile(pattern.pattern, re.IGNORECASE)
+        for match in pattern.finditer(haystack):
+            start, end = match.span()
+            current = spans[-1]
+            if start <= current[1] + ctx:
+                current[1] = max(current[1], end)
+            else:
+                current = [start, end, set(), 0]
+                spans.append(current)
+            current[2].add(match.group().lower())
+            current[3] += 1
+
+    snippets = []
+    for index, (start, end, words, hits) in enumerate(spans):
+        cs = max(0, start - ctx)
+        ce = min(full_len, end + ctx)
+        snippets.append((index, cs, ce, len(words), hits))
+
+    lead, candidates = snippets[0], snippets[1:]
+    candidates.sort(key=lambda snippet: (-snippet[3], -snippet[4], snippet[0]))
+
+    picked = [lead]
+    budget = max_chars - (lead[2] - lead[1])
+    for snippet in candidates:
+        if budget <= 0:
+            break
+        picked.append(snippet)
+        budget -= snippet[2] - snippet[1] + 3
+    picked.sort()
+
+    parts = [text[cs:ce].strip() for _, cs, ce, _, _ in picked]
+    best_context = " … ".join(part for part in parts if part)
+    if picked[0][1] > 0:
+        best_context = "… " + best_context
+    if picked[-1][2] < full_len:
+        best_context += " …"
+
+    if len(best_context) > max_chars:
+        best_context = best_context[:max_chars].rstrip() + " …"
+    return best_context
+
+
+def split_sections(text: str, max_chars: int = 2000, max_heading_length: int = 100) -> List[Tuple[str, str]]:
+    """
+    Split raw article text into ``(heading, text)`` sections of at most ~``max_chars``.
+
+    Short lines between paragraphs are section headings (``"History."``); two in a
+    row are nested headings and are joined with " > ". Runs of three or more short
+    lines are lists or infobox residue and are dropped, as in
+    ``remove_consecutive_short_lines``. Long sections are split at paragraph
+    boundaries and every chunk keeps its heading; the lead section's heading is "".
+    """
+    sections: List[Tuple[str, str]] = []
+    heading = ""
+    body: List[str] = []
+    size = 0
+    short_lines: List[str] = []
+
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) < max_heading_length:
+            short_lines.append(line)
+            continue
+        if short_lines:
+            if len(short_lines) < 3:
+                if body:
+                    sections.append((heading, "\n\n".join(body)))
+                    body, size = [], 0
+                heading = " > ".join(short.rstrip(".") for short in short_lines)
+            short_lines = []
+        if body and size + len(line) > max_chars:
+            sections.append((heading, "\n\n".join(body)))
+            body, size = [], 0
+        body.append(line)
+        size += len(line) + 2
+
+    if body:
+        sections.append((heading, "\n\n".join(body)))
+    return sections
+
+
+def truncate_at_sentence(text: str, max_chars: int) -> str:
+    """Cut ``text`` to at most ``max_chars``, at the last sentence end in the second half if there is one, else at a word."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    sentence_end = max(cut.rfind(". "), cut.rfind(".\n"))
+    if sentence_end >= max_chars // 2:
+        return cut[:sentence_end + 1]
+    word_end = cut.rfind(" ")
+    return (cut[:word_end] if word_end > 0 else cut).rstrip() + " …"
+
+
+def extract_lead(text: str, max_chars: int = 1500, summary_chars: int = 300) -> Tuple[str, str]:
+    """
+    Return ``(lead, summary)`` of raw article text.
+
+    The lead is the article's first section as ``split_sections`` finds it (the
+    text before the first heading), cut to ``max_chars``; the summary is its
+    first sentences, at most ``summary_chars``, so a search snippet can start
+    with the summary and continue with matches further into the lead.
+    """
+    sections = split_sections(text, max_chars=max_chars)
+    if not sections:
+        return "", ""
+    first_heading = sections[0][0]
+    parts = []
+    for heading, section_text in sections:
+        if heading != first_heading:
+            break
+        parts.append(section_text)
+    lead = truncate_at_sentence("\n\n".join(parts), max_chars)
+    return lead, truncate_at_sentence(lead, summary_chars)